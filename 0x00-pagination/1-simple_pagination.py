@@ -6,10 +6,12 @@ page_size with a default value 10.
 """
 
 
-import csv
 import math
+import threading
 from typing import List
 
+from dataset_loader import load_dataset
+
 
 def index_range(page: int, page_size: int) -> int:
     """
@@ -23,20 +25,34 @@ class Server:
     """
     DATA_FILE = "Popular_Baby_Names.csv"
 
-    def __init__(self):
+    def __init__(self, backend: str = "list", snapshot: bool = False,
+                 workers: int = 1):
         """
         This is a constructor for the class
+        backend selects how the dataset is held in memory: "list" (plain
+        lists of str), "columnar" (see columnar_store) or "mmap" (see
+        mmap_store).
+        snapshot loads the dataset from a binary snapshot of DATA_FILE,
+        written on the first parse (see snapshot).
+        workers is the number of processes parsing DATA_FILE in parallel
+        (see parallel_loader).
         """
+        self.backend = backend
+        self.snapshot = snapshot
+        self.workers = workers
         self.__dataset = None
+        self.__lock = threading.Lock()
 
     def dataset(self) -> List[List]:
         """Cached dataset
         """
         if self.__dataset is None:
-            with open(self.DATA_FILE) as f:
-                reader = csv.reader(f)
-                dataset = [row for row in reader]
-            self.__dataset = dataset[1:]
+            # Concurrent first requests only load the file once
+            with self.__lock:
+                if self.__dataset is None:
+                    self.__dataset = load_dataset(
+                        self.DATA_FILE, self.backend, self.snapshot,
+                        self.workers)
 
         return self.__dataset
 
@@ -5,20 +5,44 @@ Pagination module for managing and retrieving pages of a dataset.
 This module defines a Server class that loads and paginates a dataset
 of popular baby names. It includes a get_page method for retrieving a
 specific page of data and a get_hyper method for retrieving pagination
-metadata along with the dataset page. The index_range function is also
-provided to calculate start and end indexes for a given page number
-and page size.
+metadata along with the dataset page, both optionally filtered through
+bitmap indexes. It also provides keyset (cursor) pagination over
+precomputed sort orders (get_after), paginated first name lookups (search)
+and cached, paginated group-by queries (aggregate). Runs of pages are
+fetched in batches (get_pages) or streamed lazily (iter_pages), and hot
+pages can be kept in a bounded page cache or served from rows encoded to
+JSON and CSV once (get_page_encoded, get_hyper_encoded). The index_range
+function is also provided to calculate start and end indexes for a given
+page number and page size.
 
 Classes:
     Server: Loads and paginates a dataset of baby names.
 
+The Server is safe to share between threads: its dataset and indexes are
+built once, by whichever request needs them first, and refreshes bump a
+version counter that readers check, so every page is built from one
+consistent version of the dataset.
+
 Functions:
     index_range: Calculates start and end indexes for pagination.
 """
 
-import csv
 import math
-from typing import List
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from aggregation import aggregate
+from bitmap_index import BitmapIndex, popcount, select_bits
+from dataset_loader import load_dataset, read_header
+from encoded_rows import EncodedRows, json_array, splice_json
+from name_index import NameIndex
+from page_cache import PageCache
+from sort_index import SortIndex, resolve_order
+from tail_reader import extend_dataset
+
+DEFAULT_ORDER = ("Year", "Rank")
 
 
 def index_range(page: int, page_size: int) -> int:
@@ -39,12 +63,51 @@ class Server:
     """Server class to paginate a database of popular baby names.
     """
     DATA_FILE = "Popular_Baby_Names.csv"
+    # Orderings whose sort permutation is precomputed for get_after
+    SORT_ORDERS = (DEFAULT_ORDER, ("Name",), ("Count",))
 
-    def __init__(self):
+    def __init__(self, backend: str = "list", snapshot: bool = False,
+                 workers: int = 1, page_cache: Optional[str] = None,
+                 page_cache_size: Optional[int] = None,
+                 pre_encode: bool = False):
         """
         Initializes the Server instance with an empty dataset cache.
+
+        Args:
+            backend (str): How the dataset is held in memory, "list" for
+                plain lists of str, "columnar" for a ColumnarStore or
+                "mmap" for a lazily decoded MmapStore.
+            snapshot (bool): Whether to load the dataset from the binary
+                snapshot of DATA_FILE, written on the first parse.
+            workers (int): Number of processes parsing DATA_FILE in
+                parallel, for the list and columnar backends.
+            page_cache (str): Eviction policy of a cache of the unfiltered
+                get_hyper pages ("fifo", "lifo", "lru", "mru" or "lfu"),
+                None to build every page.
+            page_cache_size (int): Number of pages the page cache keeps,
+                the MAX_ITEMS of the caching policies by default.
+            pre_encode (bool): Whether to encode every row to JSON and CSV
+                as soon as the dataset is loaded, rather than on the first
+                get_page_encoded or get_hyper_encoded call.
         """
+        self.backend = backend
+        self.snapshot = snapshot
+        self.workers = workers
+        self.pre_encode = pre_encode
         self.__dataset = None
+        self.__encoded_rows = None
+        self.__tail = None
+        self.__sort_indexes = {}
+        self.__bitmap_index = None
+        self.__name_index = None
+        self.__aggregates = {}
+        # Makes lazy loads single-flight and serializes refreshes
+        self.__lock = threading.RLock()
+        self.__page_cache = None if page_cache is None else PageCache(
+            page_cache, page_cache_size)
+        # Odd while a refresh is mutating, bumped by 2 per refresh that
+        # changes the dataset
+        self.__version = 0
 
     def dataset(self) -> List[List]:
         """
@@ -54,20 +117,141 @@ class Server:
             List of list: The cached dataset, excluding the header row.
         """
         if self.__dataset is None:
-            with open(self.DATA_FILE) as f:
-                reader = csv.reader(f)
-                dataset = [row for row in reader]
-            self.__dataset = dataset[1:]
+            with self.__lock:
+                if self.__dataset is None:
+                    dataset = load_dataset(
+                        self.DATA_FILE, self.backend, self.snapshot,
+                        self.workers)
+                    if self.pre_encode:
+                        self.__encoded_rows = EncodedRows(dataset)
+                    self.__sort_indexes = self._common_sort_indexes(dataset)
+                    self.__dataset = dataset
 
         return self.__dataset
 
-    def get_page(self, page: int = 1, page_size: int = 10) -> List[List]:
+    def refresh(self) -> int:
+        """
+        Picks up the rows appended to DATA_FILE since it was loaded, parsing
+        only the appended bytes. The dataset, its encodings, bitmap and name
+        indexes and sort orders are extended in place, cached aggregates
+        and cached pages are rebuilt on their next use. If the file was
+        rewritten rather than appended to, everything is dropped and
+        reloaded on next access.
+
+        Returns:
+            int: The number of rows added, -1 if the file was rewritten.
+        """
+        if self.__dataset is None:
+            return 0
+        with self._writing() as changed:
+            extended = extend_dataset(
+                self.__dataset, self.DATA_FILE, self.__tail)
+            if extended is None:
+                if hasattr(self.__dataset, "close"):
+                    self.__dataset.close()
+                self.__dataset = None
+                self.__tail = None
+                self.__encoded_rows = None
+                self.__bitmap_index = None
+                self.__name_index = None
+                self.__sort_indexes = {}
+                self.__aggregates = {}
+                self._invalidate_pages()
+                return -1
+
+            rows, self.__tail = extended
+            if rows:
+                if self.__encoded_rows is not None:
+                    self.__encoded_rows.extend(rows)
+                if self.__bitmap_index is not None:
+                    self.__bitmap_index.extend(rows)
+                if self.__name_index is not None:
+                    self.__name_index.extend(rows)
+                for index in self.__sort_indexes.values():
+                    index.extend(len(rows))
+                self.__aggregates = {}
+                self._invalidate_pages()
+            else:
+                changed[0] = False
+            return len(rows)
+
+    def version(self) -> int:
+        """
+        Version of the dataset, bumped by every refresh that changes it.
+        """
+        return self.__version
+
+    @contextmanager
+    def _writing(self):
+        """
+        Holds the lock and flags the version as in flux. A writer that
+        changed nothing sets the yielded flag (changed[0]) to False, and
+        the version is restored instead of bumped.
+        """
+        with self.__lock:
+            version = self.__version
+            self.__version += 1
+            changed = [True]
+            try:
+                yield changed
+            finally:
+                self.__version = version + 2 if changed[0] else version
+
+    def _read(self, build: Callable):
+        """
+        Runs build against one consistent version of the dataset, running
+        it again if a refresh changed it in the meantime.
+        """
+        while True:
+            version = self.__version
+            if version % 2 == 0:
+                try:
+                    result = build()
+                except (IndexError, ValueError):
+                    # Torn read of rows being appended, or of a mapping
+                    # closed because the file was rewritten
+                    if self.__version == version:
+                        raise
+                    continue
+                if self.__version == version:
+                    return result
+            # Let the refresh finish its (short) update
+            time.sleep(0)
+
+    def _invalidate_pages(self) -> None:
+        """
+        Drops the cached pages after a change of the dataset.
+        """
+        if self.__page_cache is not None:
+            self.__page_cache.clear()
+
+    def bitmap_index(self) -> BitmapIndex:
+        """
+        Builds and caches the bitmap indexes used by filtered pages.
+
+        Returns:
+            BitmapIndex: Per-value bitmaps of the Gender, Ethnicity and
+            Year of Birth columns.
+        """
+        if self.__bitmap_index is None:
+            with self.__lock:
+                if self.__bitmap_index is None:
+                    self.__bitmap_index = BitmapIndex(
+                        self.dataset(), read_header(self.DATA_FILE))
+        return self.__bitmap_index
+
+    def get_page(self, page: int = 1, page_size: int = 10,
+                 filters: Optional[Dict] = None) -> List[List]:
         """
         Retrieve a specific page of the dataset based on page no and size.
 
         Args:
             page (int): The current page number (1-indexed).
             page_size (int): The number of items per page.
+            filters (dict): Optional column name (or alias such as "Year")
+                to a value or list of values, e.g.
+                {"Gender": "FEMALE", "Year": [2015, 2016]}. Values of one
+                column are OR-ed together and columns are AND-ed.
 
         Returns:
             list of list: The dataset page, or an empty list if the page
@@ -83,16 +267,29 @@ class Server:
             page_size, int
         ) and page_size > 0, "Page size must be a positive integer"
 
+        def build() -> List[List]:
+            matches = self.bitmap_index().match(filters) if filters else None
+            return self._page(page, page_size, matches)
+        return self._read(build)
+
+    def _page(self, page: int, page_size: int,
+              matches: Optional[int] = None) -> List[List]:
+        """
+        Slices a page of the dataset, or of the rows set in matches.
+        """
         # Calculate index range
         start, end = index_range(page, page_size)
 
         # Fetch dataset and slice the desired page
         data = self.dataset()
+        if matches is not None:
+            return [data[i] for i in select_bits(matches, start, end)]
         if start >= len(data):
             return []
         return data[start:end]
 
-    def get_hyper(self, page: int = 1, page_size: int = 10) -> List[List]:
+    def get_hyper(self, page: int = 1, page_size: int = 10,
+                  filters: Optional[Dict] = None) -> List[List]:
         """
         Retrieve a dictionary with pagination details and data for a
         specific page.
@@ -100,6 +297,8 @@ class Server:
         Args:
             page (int): The current page number (1-indexed).
             page_size (int): The number of items per page.
+            filters (dict): Optional filters, as for get_page. Pages and
+                total_pages then only count the matching rows.
 
         Returns:
             dict: A dictionary containing:
@@ -109,12 +308,246 @@ class Server:
                 - next_page: Number of the next page, None if no next page
                 - prev_page: Number of the previous page, else None.
                 - total_pages: The total number of pages in the dataset
+
+            With a page cache, the unfiltered pages are shared between
+            calls and must not be modified.
+        """
+        cache = self.__page_cache
+        if cache is not None and not filters:
+            assert isinstance(
+                page, int) and page > 0, "Page must be a positive integer"
+            assert isinstance(
+                page_size, int
+            ) and page_size > 0, "Page size must be a positive integer"
+            hyper = cache.get((page, page_size))
+            if hyper is None:
+                version = self.__version
+                hyper = self._read(lambda: self._hyper(
+                    page, page_size, self._page(page, page_size),
+                    len(self.dataset())))
+                with self.__lock:
+                    # Not if the dataset changed while the page was built
+                    if self.__version == version:
+                        cache.put((page, page_size), hyper)
+            return hyper
+
+        assert isinstance(
+            page, int) and page > 0, "Page must be a positive integer"
+        assert isinstance(
+            page_size, int
+        ) and page_size > 0, "Page size must be a positive integer"
+
+        def build() -> Dict:
+            if not filters:
+                data = self._page(page, page_size)
+                return self._hyper(page, page_size, data,
+                                   len(self.dataset()))
+            # Match the filters once, for the page and the total of pages
+            matches = self.bitmap_index().match(filters)
+            data = self._page(page, page_size, matches)
+            return self._hyper(page, page_size, data, popcount(matches))
+        return self._read(build)
+
+    def encoded_rows(self) -> EncodedRows:
+        """
+        Encodes and caches every row of the dataset to JSON and CSV.
+
+        Returns:
+            EncodedRows: The encoded rows.
+        """
+        if self.__encoded_rows is None:
+            with self.__lock:
+                if self.__encoded_rows is None:
+                    self.__encoded_rows = EncodedRows(self.dataset())
+        return self.__encoded_rows
+
+    def _encoded_page(self, page: int, page_size: int, fmt: str,
+                      filters: Optional[Dict]) -> Tuple[bytes, int, int]:
+        """
+        Returns the encoded rows of a page, how many they are and the
+        number of (matching) rows in the dataset.
         """
-        # Get the requested page data
-        data = self.get_page(page, page_size)
+        assert isinstance(
+            page, int) and page > 0, "Page must be a positive integer"
+        assert isinstance(
+            page_size, int
+        ) and page_size > 0, "Page size must be a positive integer"
+        start, end = index_range(page, page_size)
+
+        def build() -> Tuple[bytes, int, int]:
+            encoded = self.encoded_rows()
+            if filters:
+                matches = self.bitmap_index().match(filters)
+                positions = list(select_bits(matches, start, end))
+                return (encoded.join(positions, fmt), len(positions),
+                        popcount(matches))
+            total_items = len(encoded)
+            stop = min(end, total_items)
+            return (encoded.view(start, stop, fmt), max(stop - start, 0),
+                    total_items)
+        return self._read(build)
+
+    def get_page_encoded(self, page: int = 1, page_size: int = 10,
+                         fmt: str = "json",
+                         filters: Optional[Dict] = None) -> bytes:
+        """
+        Retrieve a page of the dataset already encoded, as get_page would
+        return it once serialized.
+
+        Args:
+            page (int): The current page number (1-indexed).
+            page_size (int): The number of items per page.
+            fmt (str): "json" for the JSON array of the rows, "csv" for
+                their CSV lines (a memoryview of the encoded dataset when
+                unfiltered).
+            filters (dict): Optional filters, as for get_page.
+
+        Returns:
+            bytes: The encoded page.
+
+        Raises:
+            AssertionError: If page or page_size are not positive integers.
+            ValueError: If the format is unknown.
+        """
+        body = self._encoded_page(page, page_size, fmt, filters)[0]
+        return json_array(body) if fmt == "json" else body
+
+    def get_hyper_encoded(self, page: int = 1, page_size: int = 10,
+                          filters: Optional[Dict] = None) -> bytes:
+        """
+        Retrieve the JSON encoding of get_hyper, byte for byte what
+        json.dumps(get_hyper(...)) returns, without encoding any row.
+
+        Args:
+            page (int): The current page number (1-indexed).
+            page_size (int): The number of items per page.
+            filters (dict): Optional filters, as for get_page.
+
+        Returns:
+            bytes: The encoded dictionary.
+
+        Raises:
+            AssertionError: If page or page_size are not positive integers.
+        """
+        body, count, total_items = self._encoded_page(
+            page, page_size, "json", filters)
+        hyper = self._hyper(page, page_size, range(count), total_items)
+        return splice_json(hyper, "data", json_array(body))
+
+    def _pager(self, filters: Optional[Dict] = None
+               ) -> Tuple[Callable[[int, int], List[List]], int]:
+        """
+        Resolves filters once for a run of pages.
+
+        Returns:
+            tuple: A function returning the rows between two positions of
+            the (filtered) dataset, and the number of rows it holds.
+        """
+        data = self.dataset()
+        if filters:
+            matches = self.bitmap_index().match(filters)
+
+            def fetch(start: int, end: int) -> List[List]:
+                return [data[i] for i in select_bits(matches, start, end)]
+            return fetch, popcount(matches)
+
+        size = len(data)
+
+        def fetch(start: int, end: int) -> List[List]:
+            return data[start:min(end, size)] if start < size else []
+        return fetch, size
+
+    def _page_builder(self, page_size: int, filters: Optional[Dict] = None
+                      ) -> Callable[[int], Dict]:
+        """
+        Returns a function building the get_hyper dictionary of a page
+        under _read, the filters being resolved once per version of the
+        dataset rather than once per page.
+        """
+        # Version the pager was resolved for, and the pager
+        state = [None, None]
+
+        def build(page: int) -> Dict:
+            if state[0] != self.__version:
+                version = self.__version
+                state[1] = self._pager(filters)
+                state[0] = version
+            fetch, total_items = state[1]
+            start, end = index_range(page, page_size)
+            return self._hyper(page, page_size, fetch(start, end),
+                               total_items)
+        return lambda page: self._read(lambda: build(page))
+
+    def get_pages(self, pages: Iterable[int], page_size: int = 10,
+                  filters: Optional[Dict] = None) -> Iterator[Dict]:
+        """
+        Retrieve several pages, in the order given, as get_hyper would.
+
+        The dataset size (or the filtered rows) is computed once for all
+        the pages (again if a refresh changes the dataset), and pages are
+        only built as they are consumed, each from one consistent version.
 
-        # calculate total number of pages
-        total_items = len(self.dataset())
+        Args:
+            pages (iterable of int): The page numbers (1-indexed).
+            page_size (int): The number of items per page.
+            filters (dict): Optional filters, as for get_page.
+
+        Yields:
+            dict: The get_hyper dictionary of each page.
+
+        Raises:
+            AssertionError: If a page or page_size are not positive
+            integers.
+        """
+        assert isinstance(
+            page_size, int
+        ) and page_size > 0, "Page size must be a positive integer"
+        build = self._page_builder(page_size, filters)
+        for page in pages:
+            assert isinstance(
+                page, int) and page > 0, "Page must be a positive integer"
+            yield build(page)
+
+    def iter_pages(self, page_size: int = 10, start: int = 1,
+                   filters: Optional[Dict] = None) -> Iterator[Dict]:
+        """
+        Stream the pages of the dataset, from page start to the last one.
+
+        Args:
+            page_size (int): The number of items per page.
+            start (int): The first page number (1-indexed).
+            filters (dict): Optional filters, as for get_page.
+
+        Yields:
+            dict: The get_hyper dictionary of each page.
+
+        Raises:
+            AssertionError: If page_size or start are not positive
+            integers.
+        """
+        assert isinstance(
+            start, int) and start > 0, "Page must be a positive integer"
+        assert isinstance(
+            page_size, int
+        ) and page_size > 0, "Page size must be a positive integer"
+        build = self._page_builder(page_size, filters)
+        page = start
+        while True:
+            hyper = build(page)
+            # Up to the last page of the version each page is built from
+            if page > hyper["total_pages"]:
+                return
+            yield hyper
+            if hyper["next_page"] is None:
+                return
+            page += 1
+
+    @staticmethod
+    def _hyper(page: int, page_size: int, data: List[List],
+               total_items: int) -> Dict:
+        """
+        Builds the get_hyper dictionary of a page out of total_items rows.
+        """
         total_pages = math.ceil(total_items / page_size)
 
         # Determine next and previous pages
@@ -130,3 +563,186 @@ class Server:
             "prev_page": prev_page,
             "total_pages": total_pages
         }
+
+    def name_index(self) -> NameIndex:
+        """
+        Builds and caches the first name search index.
+
+        Returns:
+            NameIndex: Prefix and trigram index of Child's First Name.
+        """
+        if self.__name_index is None:
+            with self.__lock:
+                if self.__name_index is None:
+                    self.__name_index = NameIndex(
+                        self.dataset(), read_header(self.DATA_FILE))
+        return self.__name_index
+
+    def search(self, term: str, page: int = 1, page_size: int = 10,
+               match: str = "prefix") -> Dict:
+        """
+        Retrieve a page of the rows whose first name matches a search term,
+        case insensitively, ordered by name then by position.
+
+        Args:
+            term (str): The prefix or substring to look for.
+            page (int): The current page number (1-indexed).
+            page_size (int): The number of items per page.
+            match (str): "prefix" for names starting with term, "substring"
+                for names containing it.
+
+        Returns:
+            dict: Same keys as get_hyper, counting only the matching rows.
+
+        Raises:
+            AssertionError: If page or page_size are not positive integers,
+            or if term or match are invalid.
+        """
+        assert isinstance(
+            page, int) and page > 0, "Page must be a positive integer"
+        assert isinstance(
+            page_size, int
+        ) and page_size > 0, "Page size must be a positive integer"
+        assert isinstance(term, str), "Search term must be a string"
+        assert match in ("prefix", "substring"), \
+            "Match must be prefix or substring"
+
+        start, end = index_range(page, page_size)
+
+        def build() -> Dict:
+            index = self.name_index()
+            if match == "prefix":
+                total_items = index.count_prefix(term)
+                positions = index.rows_with_prefix(term, start, end)
+            else:
+                names = index.substring(term)
+                total_items = index.count(names)
+                positions = index.rows(names, start, end)
+
+            dataset = self.dataset()
+            data = [dataset[i] for i in positions]
+            return self._hyper(page, page_size, data, total_items)
+        return self._read(build)
+
+    def _common_sort_indexes(self, dataset: List[List]
+                             ) -> Dict[Tuple[str, ...], SortIndex]:
+        """ Builds the sort indexes of the orderings listed in SORT_ORDERS """
+        header = read_header(self.DATA_FILE)
+        return {
+            resolve_order(order_by): SortIndex(dataset, header, order_by)
+            for order_by in self.SORT_ORDERS
+        }
+
+    def sort_index(self, order_by: Tuple[str, ...] = DEFAULT_ORDER
+                   ) -> SortIndex:
+        """
+        Returns the sort permutation of the dataset for an ordering.
+
+        The orderings listed in SORT_ORDERS are built when the dataset is
+        loaded, any other one on demand. All of them are cached, and
+        refresh inserts the rows it adds into them.
+
+        Args:
+            order_by (tuple of str): Column names (or aliases) to sort on.
+
+        Returns:
+            SortIndex: The cached sort index.
+        """
+        order_by = resolve_order(order_by)
+        self.dataset()
+        indexes = self.__sort_indexes
+        if order_by in indexes:
+            return indexes[order_by]
+        with self.__lock:
+            # Build into a new dict, readers keep using the published one
+            indexes = dict(self.__sort_indexes)
+            if order_by not in indexes:
+                indexes[order_by] = SortIndex(
+                    self.dataset(), read_header(self.DATA_FILE), order_by)
+            self.__sort_indexes = indexes
+        return indexes[order_by]
+
+    def get_after(self, cursor: Optional[str] = None, page_size: int = 10,
+                  order_by: Tuple[str, ...] = DEFAULT_ORDER) -> Dict:
+        """
+        Retrieve the page of rows following a cursor in a sorted order.
+
+        Args:
+            cursor (str): next_cursor of a previous call, None for the
+                first page.
+            page_size (int): The number of items per page.
+            order_by (tuple of str): Column names (or aliases) to sort on.
+
+        Returns:
+            dict: A dictionary containing:
+                - cursor: The cursor the page was requested with
+                - next_cursor: Cursor of the next page, None if no next page
+                - order_by: The column names of the ordering
+                - page_size: Length of the returned dataset page
+                - data: The dataset page
+
+        Raises:
+            AssertionError: If page_size is not a positive integer or if
+            the cursor is invalid for this ordering.
+        """
+        assert isinstance(
+            page_size, int
+        ) and page_size > 0, "Page size must be a positive integer"
+        return self._read(
+            lambda: self.sort_index(order_by).after(cursor, page_size))
+
+    def aggregate(self, group_by: Tuple[str, ...], page: int = 1,
+                  page_size: int = 10, value: str = "Count",
+                  func: str = "sum", top: Optional[int] = None,
+                  within: Tuple[str, ...] = ()) -> Dict:
+        """
+        Retrieve a page of a group-by aggregation of the dataset.
+
+        Results are materialized once per distinct query and cached, e.g.:
+            - total Count per name: aggregate(("Name",))
+            - top 10 names per ethnicity per year:
+              aggregate(("Year", "Ethnicity", "Name"), top=10,
+                        within=("Year", "Ethnicity"))
+            - rank trend of each name: aggregate(("Name", "Year"),
+              value="Rank", func="min")
+
+        Args:
+            group_by (tuple of str): Column names (or aliases) to group on.
+            page (int): The current page number (1-indexed).
+            page_size (int): The number of items per page.
+            value (str): Numeric column to aggregate.
+            func (str): One of "sum", "count", "min", "max" or "mean".
+            top (int): Only keep the top groups of each partition.
+            within (tuple of str): Columns of group_by partitioning top.
+
+        Returns:
+            dict: Same keys as get_hyper, data holding one row per group:
+            the group values followed by the aggregate.
+
+        Raises:
+            AssertionError: If page or page_size are not positive integers
+            or if the query is invalid.
+        """
+        assert isinstance(
+            page, int) and page > 0, "Page must be a positive integer"
+        assert isinstance(
+            page_size, int
+        ) and page_size > 0, "Page size must be a positive integer"
+
+        query = (resolve_order(group_by), value, func, top,
+                 resolve_order(within))
+        start, end = index_range(page, page_size)
+
+        def build() -> Dict:
+            result = self.__aggregates.get(query)
+            if result is None:
+                with self.__lock:
+                    result = self.__aggregates.get(query)
+                    if result is None:
+                        result = aggregate(self.dataset(),
+                                           read_header(self.DATA_FILE),
+                                           *query)
+                        self.__aggregates[query] = result
+            return self._hyper(page, page_size, result[start:end],
+                               len(result))
+        return self._read(build)
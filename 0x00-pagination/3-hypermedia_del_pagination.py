@@ -1,41 +1,252 @@
 #!/usr/bin/env python3
 """
 Deletion-resilient hypermedia pagination
+
+The Server is safe to share between threads: lazy loading is single-flight
+(concurrent first requests parse the CSV once) and mutations (deletions,
+refresh) bump a version counter that readers check, so every page is built
+from one consistent version of the live rows without readers ever taking
+the writers' lock.
 """
 
-import csv
 import math
-from typing import List, Dict, Optional
+import threading
+import time
+from contextlib import contextmanager
+from typing import (Callable, Dict, Iterable, Iterator, List, Optional,
+                    Tuple)
+
+from columnar_store import ColumnarStore
+from dataset_loader import load_dataset, load_with_snapshot, read_header
+from encoded_rows import EncodedRows, json_array, splice_json
+from live_index import LiveRowIndex
+from mmap_store import build_offsets
+from snapshot import write_snapshot
+from sort_index import SortIndex, resolve_order
+from tail_reader import extend_dataset
+
+DEFAULT_ORDER = ("Year", "Rank")
 
 
 class Server:
     """Server class to paginate a database of popular baby names."""
 
     DATA_FILE = "Popular_Baby_Names.csv"
+    # Orderings whose sort permutation is precomputed for get_after
+    SORT_ORDERS = (DEFAULT_ORDER, ("Name",), ("Count",))
 
-    def __init__(self):
+    def __init__(self, backend: str = "list", snapshot: bool = False,
+                 workers: int = 1):
+        self.backend = backend
+        self.snapshot = snapshot
+        self.workers = workers
         self.__dataset = None
+        self.__tail = None
+        self.__encoded_rows = None
+        self.__offsets = None
         self.__indexed_dataset = None
+        self.__live_rows = None
+        self.__sort_indexes = {}
+        # Serializes lazy loads and writers, readers never take it
+        self.__lock = threading.RLock()
+        # Odd while a writer is mutating, bumped by 2 per mutation that
+        # changes the live rows
+        self.__version = 0
 
     def dataset(self) -> List[List]:
         """Loads and caches the dataset."""
         if self.__dataset is None:
-            with open(self.DATA_FILE) as f:
-                reader = csv.reader(f)
-                dataset = [row for row in reader]
-            self.__dataset = dataset[1:]  # Exclude the header row
+            with self.__lock:
+                if self.__dataset is None and self.snapshot:
+                    # Deletions saved with the snapshot are restored too
+                    dataset, loaded = load_with_snapshot(
+                        self.DATA_FILE, self.backend, self.workers)
+                    self.__live_rows = LiveRowIndex(len(dataset))
+                    self.__live_rows.delete_many(loaded.deleted)
+                    self.__offsets = loaded.offsets
+                    self.__sort_indexes = self._common_sort_indexes(dataset)
+                    self.__dataset = dataset
+                elif self.__dataset is None:
+                    dataset = load_dataset(
+                        self.DATA_FILE, self.backend, workers=self.workers)
+                    self.__sort_indexes = self._common_sort_indexes(dataset)
+                    self.__dataset = dataset
 
         return self.__dataset
 
+    def version(self) -> int:
+        """
+        Version of the live rows, bumped by every deletion or refresh that
+        changes them.
+        """
+        return self.__version
+
+    @contextmanager
+    def _writing(self):
+        """
+        Holds the writers' lock and flags the version as in flux. A writer
+        that changed nothing sets the yielded flag (changed[0]) to False,
+        and the version is restored instead of bumped.
+        """
+        with self.__lock:
+            version = self.__version
+            self.__version += 1
+            changed = [True]
+            try:
+                yield changed
+            finally:
+                self.__version = version + 2 if changed[0] else version
+
+    def _read(self, build: Callable):
+        """
+        Runs build against one consistent version of the live rows,
+        running it again if a writer changed them in the meantime.
+        """
+        while True:
+            version = self.__version
+            if version % 2 == 0:
+                try:
+                    result = build()
+                except (IndexError, ValueError):
+                    # Torn read of rows being appended or deleted, or of a
+                    # mapping closed because the file was rewritten
+                    if self.__version == version:
+                        raise
+                    continue
+                if self.__version == version:
+                    return result
+            # Let the writer finish its (short) update
+            time.sleep(0)
+
+    def refresh(self) -> int:
+        """
+        Pick up the rows appended to DATA_FILE since it was loaded, parsing
+        only the appended bytes. New rows are live and extend the indexed
+        dataset, the live-row index and the sort orders in place; deletions
+        are kept. If the file was rewritten rather than appended to,
+        everything (deletions included) is dropped and reloaded on next
+        access.
+
+        Returns:
+            int: The number of rows added, -1 if the file was rewritten.
+        """
+        if self.__dataset is None:
+            return 0
+        with self._writing() as changed:
+            extended = extend_dataset(
+                self.__dataset, self.DATA_FILE, self.__tail)
+            if extended is None:
+                if hasattr(self.__dataset, "close"):
+                    self.__dataset.close()
+                self.__dataset = None
+                self.__tail = None
+                self.__encoded_rows = None
+                self.__offsets = None
+                self.__indexed_dataset = None
+                self.__live_rows = None
+                self.__sort_indexes = {}
+                return -1
+
+            rows, self.__tail = extended
+            if rows:
+                start = len(self.__dataset) - len(rows)
+                if self.__encoded_rows is not None:
+                    self.__encoded_rows.extend(rows)
+                if self.__live_rows is not None:
+                    self.__live_rows.extend(len(rows))
+                if self.__indexed_dataset is not None:
+                    self.__indexed_dataset.update(enumerate(rows, start))
+                # Offsets are recomputed by the next save_snapshot
+                self.__offsets = None
+                for index in self.__sort_indexes.values():
+                    index.extend(len(rows))
+            else:
+                changed[0] = False
+            return len(rows)
+
+    def live_rows(self) -> LiveRowIndex:
+        """Index of the positions that have not been deleted."""
+        dataset = self.dataset()
+        if self.__live_rows is None:
+            with self.__lock:
+                if self.__live_rows is None:
+                    self.__live_rows = LiveRowIndex(len(dataset))
+        return self.__live_rows
+
     def indexed_dataset(self) -> Dict[int, List]:
         """Dataset indexed by position, accounting for deletions."""
         if self.__indexed_dataset is None:
-            dataset = self.dataset()
-            self.__indexed_dataset = {
-                i: dataset[i] for i in range(len(dataset))
-            }
+            with self.__lock:
+                dataset = self.dataset()
+                live = self.live_rows()
+                if self.__indexed_dataset is None:
+                    self.__indexed_dataset = {
+                        i: dataset[i] for i in range(len(dataset))
+                        if live.is_live(i)
+                    }
         return self.__indexed_dataset
 
+    def save_snapshot(self) -> bool:
+        """
+        Write the binary snapshot of DATA_FILE, deletions included, so the
+        next Server created with snapshot=True starts from this state.
+
+        Returns:
+            bool: True if the snapshot was written.
+        """
+        with self.__lock:
+            dataset = self.dataset()
+            if not isinstance(dataset, ColumnarStore):
+                dataset = ColumnarStore.from_rows(
+                    read_header(self.DATA_FILE), dataset)
+            if self.__offsets is None:
+                with open(self.DATA_FILE, "rb") as f:
+                    self.__offsets = build_offsets(f.read())
+            return write_snapshot(self.DATA_FILE, dataset, self.__offsets,
+                                  self.live_rows().deleted())
+
+    def delete(self, index: int) -> bool:
+        """
+        Delete the row at a given position.
+
+        Args:
+            index (int): The position of the row in the dataset.
+
+        Returns:
+            bool: True if the row was deleted, False if it already was.
+
+        Raises:
+            AssertionError: If index is out of range.
+        """
+        return self.delete_many((index,)) == 1
+
+    def delete_many(self, indices: Iterable[int]) -> int:
+        """
+        Delete the rows at several positions.
+
+        Args:
+            indices (iterable of int): The positions of the rows.
+
+        Returns:
+            int: The number of rows actually deleted.
+
+        Raises:
+            AssertionError: If an index is out of range, rows listed
+            before it are deleted.
+        """
+        live = self.live_rows()
+        deleted = 0
+        with self._writing() as changed:
+            for index in indices:
+                assert isinstance(index, int) and 0 <= index < len(live), \
+                    "Index out of range."
+                if live.delete(index):
+                    deleted += 1
+                    if self.__indexed_dataset is not None:
+                        self.__indexed_dataset.pop(index, None)
+            changed[0] = deleted > 0
+        return deleted
+
     def get_hyper_index(self, index: int = None, page_size: int = 10) -> Dict:
         """
         Return a dictionary with pagination information that is resilient
@@ -55,25 +266,163 @@ class Server:
         Raises:
             AssertionError: If index is out of range.
         """
-        assert 0 <= index < len(self.indexed_dataset()), "Index out of range."
+        return self._read(lambda: self._hyper_index(index, page_size))
 
-        data = []
-        current_index = index
-        dataset = self.indexed_dataset()
+    def _hyper_index(self, index: int, page_size: int,
+                     rows: Optional[Callable] = None) -> Dict:
+        """
+        Builds the get_hyper_index page from the current live rows, its
+        data being rows(positions) if given, the rows themselves otherwise.
+        """
+        live = self.live_rows()
+        assert 0 <= index < len(live), "Index out of range."
 
-        # Collect page data
-        while len(data) < page_size and current_index < len(dataset):
-            item = dataset.get(current_index)
-            if item is not None:
-                data.append(item)
-            current_index += 1
+        # Positions of the next page_size live rows, deleted ones skipped
+        positions = live.next_live(index, page_size)
+        if rows is None:
+            dataset = self.dataset()
+            data = [dataset[i] for i in positions]
+        else:
+            data = rows(positions)
 
         # Next index to query based on current data position
-        next_index = current_index if current_index < len(dataset) else None
+        if len(positions) < page_size:
+            current_index = len(live)
+        else:
+            current_index = positions[-1] + 1
+        next_index = current_index if current_index < len(live) else None
 
         return {
             "index": index,
             "next_index": next_index,
-            "page_size": len(data),
+            "page_size": len(positions),
             "data": data,
         }
+
+    def encoded_rows(self) -> EncodedRows:
+        """Every row of the dataset, deleted or not, encoded to JSON."""
+        if self.__encoded_rows is None:
+            with self.__lock:
+                if self.__encoded_rows is None:
+                    self.__encoded_rows = EncodedRows(self.dataset())
+        return self.__encoded_rows
+
+    def get_hyper_index_encoded(self, index: int = None,
+                                page_size: int = 10) -> bytes:
+        """
+        Return the JSON encoding of get_hyper_index, byte for byte what
+        json.dumps(get_hyper_index(...)) returns, without encoding any row.
+
+        Args:
+            index (int): The starting index for the page.
+            page_size (int): The number of items per page.
+
+        Returns:
+            bytes: The encoded dictionary.
+
+        Raises:
+            AssertionError: If index is out of range.
+        """
+        encoded = self.encoded_rows()
+        hyper = self._read(lambda: self._hyper_index(
+            index, page_size, encoded.join))
+        return splice_json(hyper, "data", json_array(hyper["data"]))
+
+    def iter_pages(self, page_size: int = 10, start: int = 0
+                   ) -> Iterator[Dict]:
+        """
+        Stream the get_hyper_index pages of the live rows, from index start
+        to the end of the dataset, following each page's next_index.
+
+        Each page is built from one consistent version of the live rows.
+        Rows deleted while iterating are skipped if not yet reached and
+        never shift the pages that follow, so no live row is returned
+        twice or missed.
+
+        Args:
+            page_size (int): The number of items per page.
+            start (int): The index of the first page.
+
+        Yields:
+            dict: The get_hyper_index dictionary of each page.
+
+        Raises:
+            AssertionError: If page_size is not a positive integer or
+            start is out of range.
+        """
+        assert isinstance(
+            page_size, int
+        ) and page_size > 0, "Page size must be a positive integer"
+        index = start
+        while index is not None:
+            page = self._read(lambda: self._hyper_index(index, page_size))
+            yield page
+            index = page["next_index"]
+
+    def _common_sort_indexes(self, dataset: List[List]
+                             ) -> Dict[Tuple[str, ...], SortIndex]:
+        """ Builds the sort indexes of the orderings listed in SORT_ORDERS """
+        header = read_header(self.DATA_FILE)
+        return {
+            resolve_order(order_by): SortIndex(dataset, header, order_by)
+            for order_by in self.SORT_ORDERS
+        }
+
+    def sort_index(self, order_by: Tuple[str, ...] = DEFAULT_ORDER
+                   ) -> SortIndex:
+        """
+        Returns the sort permutation of the dataset for an ordering.
+
+        The orderings listed in SORT_ORDERS are built when the dataset is
+        loaded, any other one on demand. All of them are cached, and
+        refresh inserts the rows it adds into them.
+
+        Args:
+            order_by (tuple of str): Column names (or aliases) to sort on.
+
+        Returns:
+            SortIndex: The cached sort index.
+        """
+        order_by = resolve_order(order_by)
+        self.dataset()
+        indexes = self.__sort_indexes
+        if order_by in indexes:
+            return indexes[order_by]
+        with self.__lock:
+            # Build into a new dict, readers keep using the published one
+            indexes = dict(self.__sort_indexes)
+            if order_by not in indexes:
+                indexes[order_by] = SortIndex(
+                    self.dataset(), read_header(self.DATA_FILE), order_by)
+            self.__sort_indexes = indexes
+        return indexes[order_by]
+
+    def get_after(self, cursor: Optional[str] = None, page_size: int = 10,
+                  order_by: Tuple[str, ...] = DEFAULT_ORDER) -> Dict:
+        """
+        Retrieve the page of live rows following a cursor in a sorted
+        order. Deleted rows are skipped and never shift later pages.
+
+        Args:
+            cursor (str): next_cursor of a previous call, None for the
+                first page.
+            page_size (int): The number of items per page.
+            order_by (tuple of str): Column names (or aliases) to sort on.
+
+        Returns:
+            dict: A dictionary containing:
+                - cursor: The cursor the page was requested with
+                - next_cursor: Cursor of the next page, None if no next page
+                - order_by: The column names of the ordering
+                - page_size: Length of the returned dataset page
+                - data: The dataset page
+
+        Raises:
+            AssertionError: If page_size is not a positive integer or if
+            the cursor is invalid for this ordering.
+        """
+        assert isinstance(
+            page_size, int
+        ) and page_size > 0, "Page size must be a positive integer"
+        return self._read(lambda: self.sort_index(order_by).after(
+            cursor, page_size, self.live_rows().flags()))
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Group-by aggregation over the columns of the dataset.
+
+Aggregations work column at a time: the grouping and value columns are
+pulled out once (straight from the typed buffers and dictionary codes of a
+ColumnarStore, without materializing any row) and zipped together, so
+grouping compares small integers instead of whole rows of strings. Every
+value is then appended to the list of its group by builtins chained with
+map, so no Python code runs per row, and each list is reduced by sum, len,
+min or max, in C too. Codes are only decoded back to text for the groups
+of the result.
+
+Functions:
+    aggregate: Groups the rows of a dataset and aggregates a column.
+"""
+
+from collections import defaultdict, deque
+from itertools import repeat
+from typing import Callable, List, Sequence, Tuple
+
+from columnar_store import NUMERIC_COLUMNS, ColumnarStore
+from sort_index import resolve_order
+
+# Reduces the values of a group to its aggregate
+FUNCTIONS = {
+    "sum": sum,
+    "count": len,
+    "min": min,
+    "max": max,
+    "mean": lambda numbers: sum(numbers) / len(numbers),
+}
+
+
+def _column(dataset: Sequence[List], header: Sequence[str],
+            name: str) -> Tuple[Sequence, Callable]:
+    """
+    Returns the values of a column, as integers for numeric columns or as
+    comparable codes otherwise, along with the function mapping them back
+    to the text of the CSV file.
+    """
+    if isinstance(dataset, ColumnarStore):
+        categories = dataset.categories(name)
+        if categories is None:
+            return dataset.column(name), str
+        return dataset.column(name), categories.__getitem__
+    col = list(header).index(name)
+    if name in NUMERIC_COLUMNS:
+        return [int(row[col]) for row in dataset], str
+    return [row[col] for row in dataset], str
+
+
+def aggregate(dataset: Sequence[List], header: Sequence[str],
+              group_by: Sequence[str], value: str = "Count",
+              func: str = "sum", top: int = None,
+              within: Sequence[str] = ()) -> List[List]:
+    """
+    Groups the rows of a dataset and aggregates a numeric column.
+
+    Args:
+        dataset (list of list): The rows to aggregate.
+        header (list of str): The column names of the rows.
+        group_by (tuple of str): Columns (or aliases) to group on.
+        value (str): Numeric column to aggregate.
+        func (str): One of "sum", "count", "min", "max" or "mean".
+        top (int): If set, only keep the top groups, by decreasing
+            aggregate, of each partition.
+        within (tuple of str): Columns of group_by partitioning the groups
+            for top. An empty tuple ranks all the groups together.
+
+    Returns:
+        list of list: One row per group, the group values (as text)
+        followed by the aggregate. Rows are sorted by group, or with top,
+        by partition then decreasing aggregate.
+
+    Raises:
+        AssertionError: If a column or the function is invalid.
+    """
+    group_by = resolve_order(group_by)
+    within = resolve_order(within)
+    value = resolve_order((value,))[0]
+    assert func in FUNCTIONS, "Unknown aggregate: {}".format(func)
+    for name in group_by + (value,):
+        assert name in header, "Unknown column: {}".format(name)
+    assert value in NUMERIC_COLUMNS, "Cannot aggregate: {}".format(value)
+    assert set(within) <= set(group_by), "within must be part of group_by"
+    assert top is None or (isinstance(top, int) and top > 0), \
+        "top must be a positive integer"
+
+    columns = [_column(dataset, header, name) for name in group_by]
+    values, _ = _column(dataset, header, value)
+    keys = zip(*(column for column, _ in columns)) if columns else repeat(
+        (), len(values))
+
+    # Appends every value to the list of its group, all of it in C
+    groups = defaultdict(list)
+    deque(map(list.append, map(groups.__getitem__, keys), values),
+          maxlen=0)
+    reduce = FUNCTIONS[func]
+    totals = {key: reduce(numbers) for key, numbers in groups.items()}
+
+    numeric = [name in NUMERIC_COLUMNS for name in group_by]
+
+    def decode(key):
+        """ Decodes a group key back to text """
+        return [decoder(code) for code, (_, decoder) in zip(key, columns)]
+
+    def sort_key(key):
+        """ Orders groups on their typed values """
+        return tuple(
+            int(text) if is_number else text
+            for text, is_number in zip(decode(key), numeric))
+
+    if top is None:
+        return [decode(key) + [totals[key]]
+                for key in sorted(totals, key=sort_key)]
+
+    positions = [group_by.index(name) for name in within]
+    ranked = sorted(totals, key=lambda key: (
+        tuple(sort_key(key)[i] for i in positions), -totals[key],
+        sort_key(key)))
+    result = []
+    partition, kept = None, 0
+    for key in ranked:
+        current = tuple(key[i] for i in positions)
+        if current != partition:
+            partition, kept = current, 0
+        if kept < top:
+            result.append(decode(key) + [totals[key]])
+            kept += 1
+    return result
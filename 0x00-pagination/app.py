@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+HTTP API over the pagination servers.
+
+Routes:
+    GET /api/v1/names: get_hyper of the hypermedia Server.
+    GET /api/v1/names/indexed: get_hyper_index of the deletion-resilient
+        Server.
+    GET /api/v1/names/export: The whole dataset, as CSV or JSON, streamed
+        in chunks.
+
+Every response carries a strong ETag derived from the dataset it was
+built from and from the request arguments, and a request whose
+If-None-Match lists it gets an empty 304 response instead. The dataset is
+identified by the size, modification time and CRC32 of its CSV file (read
+once per version) along with its version, which only changes when a
+refresh or deletion changes the rows: processes serving the same file
+with the same changes applied agree on the ETags, whatever the number of
+refreshes that found nothing new.
+
+Pages are served from rows encoded once (see encoded_rows), and exports
+are streamed one chunk of rows at a time, each encoded from the dataset
+as it is sent, so they never hold the whole response in memory.
+"""
+import csv
+import hashlib
+import io
+from typing import Callable, Iterator, Tuple
+
+from flask import Flask
+from flask import abort, request
+
+from dataset_loader import read_header
+from encoded_rows import encode_rows
+from snapshot import csv_signature
+
+HyperServer = __import__('2-hypermedia_pagination').Server
+IndexServer = __import__('3-hypermedia_del_pagination').Server
+
+# Rows per chunk of an export
+EXPORT_CHUNK = 1000
+EXPORT_FORMATS = {"csv": "text/csv", "json": "application/json"}
+# Version of the dataset of every server, with the signature of its file
+signatures = {}
+
+
+# Instantiate the application object
+app = Flask(__name__)
+
+hyper_server = HyperServer(pre_encode=True)
+index_server = IndexServer()
+
+
+def int_arg(name: str, default: int) -> int:
+    """
+    Reads an integer query argument
+    Args:
+        name (str): argument name
+        default (int): value when the argument is missing
+    Returns:
+        (int): the argument value, aborting with 400 if not an integer
+    """
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        abort(400, "{} must be an integer".format(name))
+
+
+def dataset_signature(server, version: int) -> Tuple[int, int, int]:
+    """
+    Identifies the file a server answers from
+    Args:
+        server: the pagination server
+        version (int): version of its dataset
+    Returns:
+        (tuple): size, modification time and CRC32 of its CSV file, read
+        once per version of the dataset
+    """
+    known = signatures.get(server)
+    if known is None or known[0] != version:
+        known = signatures[server] = (version,
+                                      csv_signature(server.DATA_FILE))
+    return known[1]
+
+
+def make_etag(server, version: int) -> str:
+    """
+    Computes the ETag of the current request
+    Args:
+        server: the pagination server answering it
+        version (int): version of the dataset the response is built from
+    Returns:
+        (str): the ETag, unquoted
+    """
+    key = "{}:{}:{}:{}".format(dataset_signature(server, version), version,
+                               request.path,
+                               sorted(request.args.items(multi=True)))
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def versioned(version: Callable[[], int],
+              build: Callable[[], bytes]) -> Tuple[bytes, int]:
+    """
+    Builds a response body along with the version it was built from
+    Args:
+        version (callable): returns the current dataset version
+        build (callable): builds the body
+    Returns:
+        (tuple): the body and its version, retried if a writer changed
+        the dataset while the body was built
+    """
+    while True:
+        before = version()
+        try:
+            body = build()
+        except AssertionError as e:
+            abort(400, str(e))
+        if version() == before:
+            return body, before
+
+
+def respond(server, build: Callable, mimetype: str = "application/json"):
+    """
+    Answers the current request with a body or a 304
+    Args:
+        server: the pagination server the body is built from
+        build (callable): builds the body (bytes or an iterator of bytes)
+        mimetype (str): content type of the body
+    Returns:
+        (Response): the response, with its ETag
+    """
+    if request.if_none_match:
+        etag = make_etag(server, server.version())
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+    body, current = versioned(server.version, build)
+    response = app.response_class(body, mimetype=mimetype)
+    response.set_etag(make_etag(server, current))
+    # Caches may store responses but have to revalidate them
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+@app.route('/api/v1/names', strict_slashes=False)
+def names():
+    """
+    Serves get_hyper: ?page=<int>&page_size=<int>
+    """
+    page = int_arg("page", 1)
+    page_size = int_arg("page_size", 10)
+    return respond(hyper_server,
+                   lambda: hyper_server.get_hyper_encoded(page, page_size))
+
+
+@app.route('/api/v1/names/indexed', strict_slashes=False)
+def names_indexed():
+    """
+    Serves get_hyper_index: ?index=<int>&page_size=<int>
+    """
+    index = int_arg("index", 0)
+    page_size = int_arg("page_size", 10)
+    return respond(index_server,
+                   lambda: index_server.get_hyper_index_encoded(
+                       index, page_size))
+
+
+def export_chunks(fmt: str) -> Iterator[bytes]:
+    """
+    Encodes the whole dataset, chunk by chunk
+    Args:
+        fmt (str): "csv" (header included) or "json" (array of rows)
+    Returns:
+        (iterator): the chunks of the export, of the rows loaded when
+        called (rows appended while streaming are left for the next one)
+    """
+    data = hyper_server.dataset()
+    total = len(data)
+
+    def chunks() -> Iterator[bytes]:
+        """ Yields the export, one chunk of rows at a time """
+        if fmt == "csv":
+            header = io.StringIO()
+            csv.writer(header, lineterminator="\n").writerow(
+                read_header(hyper_server.DATA_FILE))
+            yield header.getvalue().encode()
+        else:
+            yield b"["
+        for start in range(0, total, EXPORT_CHUNK):
+            if fmt == "json" and start:
+                yield b", "
+            end = min(start + EXPORT_CHUNK, total)
+            yield encode_rows(data[start:end], fmt)
+        if fmt == "json":
+            yield b"]"
+    return chunks()
+
+
+@app.route('/api/v1/names/export', strict_slashes=False)
+def export():
+    """
+    Streams the whole dataset: ?format=csv|json
+    """
+    fmt = request.args.get("format", "csv")
+    if fmt not in EXPORT_FORMATS:
+        abort(400, "format must be csv or json")
+    # Chunks are only encoded while the response is sent
+    return respond(hyper_server, lambda: export_chunks(fmt),
+                   EXPORT_FORMATS[fmt])
+
+
+if __name__ == '__main__':
+    app.run()
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Benchmarks of the pagination servers on reproducible synthetic datasets.
+
+Every (rows, backend) case runs in its own process, so its peak RSS is its
+own. A case writes (or reuses) a synthetic CSV file of that many rows,
+generated from the seed, then measures:
+
+    - load: loads of the dataset by a new Server, "cold" without any
+      persisted offset index and with the file evicted from the OS page
+      cache (where posix_fadvise can, "cold-cached" with the file left in
+      the page cache otherwise), and "warm" with the file in the page
+      cache and its offset index on disk.
+    - index_range, get_page, get_hyper: random pages of the whole dataset.
+    - get_hyper_index: random indexes, once per deletion density (the
+      fraction of the rows deleted beforehand).
+
+Every measurement is repeated (loads at least MIN_LOAD_RUNS times), the
+calls being preceded by untimed warm-up calls, and reported as the median
+over the repeats of the throughput (calls per second, rows per second for
+loads) and of the p50 and p99 latencies (in microseconds), along with the
+peak RSS of the case (in KiB), as JSON, e.g.:
+
+    ./benchmark.py --rows 10000 1000000 --output results.json
+    ./benchmark.py --baseline results.json --threshold 0.2
+
+Given a baseline (a previous output), results that are slower or bigger
+by more than the threshold (the looser p99 threshold for p99 latencies,
+the noisiest measurement) are listed on stderr and the exit status is 1.
+A case whose process dies (out of memory for example) is reported as
+failed, on stderr and in the "failures" of the output, the other cases
+still running; the exit status is then 1 too.
+
+Functions:
+    write_dataset: Writes a reproducible synthetic dataset.
+    drop_page_cache: Evicts a file from the OS page cache.
+    run_case: Benchmarks one dataset size with one backend.
+    compare: Lists the regressions of results against a baseline.
+"""
+import argparse
+import csv
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from array import array
+from typing import Dict, Iterable, List, Sequence
+
+from dataset_loader import BACKENDS
+
+index_range = __import__('0-simple_helper_function').index_range
+SimpleServer = __import__('1-simple_pagination').Server
+HyperServer = __import__('2-hypermedia_pagination').Server
+IndexServer = __import__('3-hypermedia_del_pagination').Server
+
+HEADER = ["Year of Birth", "Gender", "Ethnicity", "Child's First Name",
+          "Count", "Rank"]
+GENDERS = ["FEMALE", "MALE"]
+ETHNICITIES = ["ASIAN AND PACIFIC ISLANDER", "BLACK NON HISPANIC",
+               "HISPANIC", "WHITE NON HISPANIC"]
+# Fields identifying a result, the others being measurements
+KEY_FIELDS = ("rows", "backend", "op", "phase", "deletion_density")
+# Loads are single calls, too few samples below this many runs
+MIN_LOAD_RUNS = 5
+
+
+def write_dataset(path: str, rows: int, seed: int = 0) -> None:
+    """
+    Writes a synthetic dataset with the columns of DATA_FILE.
+
+    Args:
+        path (str): Where to write the CSV file.
+        rows (int): The number of rows, header excluded.
+        seed (int): The seed the rows are generated from.
+    """
+    rng = random.Random(seed)
+    names = ["NAME{}".format(i) for i in range(2000)]
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(HEADER)
+        for _ in range(rows):
+            writer.writerow([
+                rng.randint(2011, 2020), rng.choice(GENDERS),
+                rng.choice(ETHNICITIES), rng.choice(names),
+                rng.randint(10, 300), rng.randint(1, 100)])
+
+
+def percentile(samples: Sequence[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of sorted samples.
+    """
+    rank = max(math.ceil(fraction * len(samples)) - 1, 0)
+    return samples[min(rank, len(samples) - 1)]
+
+
+def median(values: Sequence[float]) -> float:
+    """
+    Median of values.
+    """
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2
+
+
+def summarize(op: str, runs: List[List[int]], count: int = 1,
+              **key) -> Dict:
+    """
+    Builds the result of an operation out of its latencies (ns).
+
+    Args:
+        op (str): The operation.
+        runs (list of list of int): The latency of every call, per repeat.
+        count (int): Items processed per call, for the throughput.
+        key: The other fields identifying the result.
+
+    Returns:
+        dict: The result, every measurement being the median over the
+        repeats.
+    """
+    throughputs, p50s, p99s = [], [], []
+    for samples in runs:
+        samples = sorted(samples)
+        throughputs.append(len(samples) * count * 1e9 / (sum(samples) or 1))
+        p50s.append(percentile(samples, 0.50))
+        p99s.append(percentile(samples, 0.99))
+    result = dict(key, op=op)
+    result.update({
+        "calls": len(runs[0]),
+        "repeats": len(runs),
+        "throughput": round(median(throughputs), 1),
+        "p50_us": round(median(p50s) / 1e3, 2),
+        "p99_us": round(median(p99s) / 1e3, 2),
+    })
+    return result
+
+
+def timed(call, arguments: Iterable) -> List[int]:
+    """
+    Calls a function once per argument tuple, returning every latency (ns).
+    """
+    samples = []
+    clock = time.perf_counter_ns
+    for args in arguments:
+        start = clock()
+        call(*args)
+        samples.append(clock() - start)
+    return samples
+
+
+def measure(call, arguments: Sequence, repeats: int,
+            warmup: int) -> List[List[int]]:
+    """
+    Times the calls of every argument tuple repeats times, after untimed
+    calls of the first warmup ones, returning the latencies of each repeat.
+    """
+    for args in arguments[:warmup]:
+        call(*args)
+    return [timed(call, arguments) for _ in range(repeats)]
+
+
+def drop_page_cache(path: str) -> bool:
+    """
+    Evicts a file from the OS page cache, where posix_fadvise is available.
+
+    Returns:
+        bool: True if the eviction was requested, False if it cannot be.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        # Dirty pages are not evicted, written back first
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    except OSError:
+        return False
+    finally:
+        os.close(fd)
+    return True
+
+
+def _remove_indexes(path: str) -> None:
+    """ Removes the offset index and snapshot persisted for a dataset """
+    for suffix in (".idx", ".snap"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def run_case(path: str, rows: int, backend: str, calls: int,
+             page_size: int, densities: Sequence[float], seed: int,
+             repeats: int = 5, warmup: int = 100) -> List[Dict]:
+    """
+    Benchmarks the servers on one dataset with one backend.
+
+    Args:
+        path (str): The synthetic dataset.
+        rows (int): Its number of rows.
+        backend (str): The dataset backend (see dataset_loader).
+        calls (int): Calls per measured operation.
+        page_size (int): The page size of the calls.
+        densities (list of float): Deletion densities for get_hyper_index.
+        seed (int): Seed of the random pages, indexes and deletions.
+        repeats (int): Times every measurement is repeated.
+        warmup (int): Untimed calls preceding the measured ones.
+
+    Returns:
+        list of dict: One result per operation, with the peak RSS.
+    """
+    classes = {
+        cls: type(cls.__name__, (cls,), {"DATA_FILE": path})
+        for cls in (SimpleServer, HyperServer, IndexServer)
+    }
+    key = {"rows": rows, "backend": backend, "deletion_density": None}
+    results = []
+
+    load_runs = max(repeats, MIN_LOAD_RUNS)
+    for phase in ("cold", "warm"):
+        runs = []
+        for _ in range(load_runs):
+            if phase != "warm":
+                _remove_indexes(path)
+                if not drop_page_cache(path):
+                    phase = "cold-cached"
+            # One dataset in memory at a time
+            server = None
+            server = classes[SimpleServer](backend=backend)
+            runs.append(timed(server.dataset, [()]))
+        results.append(summarize("load", runs, rows, phase=phase, **key))
+
+    rng = random.Random(seed)
+    pages = max(math.ceil(rows / page_size), 1)
+    arguments = [(rng.randint(1, pages), page_size) for _ in range(calls)]
+    key["phase"] = "warm"
+    results.append(summarize(
+        "index_range", measure(index_range, arguments, repeats, warmup),
+        **key))
+    results.append(summarize(
+        "get_page", measure(server.get_page, arguments, repeats, warmup),
+        **key))
+    del server
+    hyper = classes[HyperServer](backend=backend)
+    hyper.dataset()
+    results.append(summarize(
+        "get_hyper", measure(hyper.get_hyper, arguments, repeats, warmup),
+        **key))
+    del hyper
+
+    indexed = classes[IndexServer](backend=backend)
+    indexed.dataset()
+    order = array('L', range(rows))
+    rng.shuffle(order)
+    deleted = 0
+    for density in sorted(densities):
+        target = int(rows * density)
+        indexed.delete_many(order[deleted:target])
+        deleted = max(deleted, target)
+        arguments = [(rng.randrange(rows), page_size) for _ in range(calls)]
+        key["deletion_density"] = density
+        results.append(summarize(
+            "get_hyper_index",
+            measure(indexed.get_hyper_index, arguments, repeats, warmup),
+            **key))
+
+    # Peak of this process, in KiB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    for result in results:
+        result["peak_rss_kb"] = peak
+    return results
+
+
+def _run_case(conn, *args) -> None:
+    """ Runs a case in a child process, sending back its results """
+    conn.send(run_case(*args))
+    conn.close()
+
+
+def compare(results: List[Dict], baseline: List[Dict], threshold: float,
+            p99_threshold: float = None) -> List[str]:
+    """
+    Lists the results worse than their baseline by more than a threshold.
+
+    Args:
+        results (list of dict): The new results.
+        baseline (list of dict): Previous results of the same benchmark.
+        threshold (float): Tolerated relative change, e.g. 0.2 for 20%.
+        p99_threshold (float): Tolerated relative change of the p99
+            latencies, threshold if None.
+
+    Returns:
+        list of str: One line per regression.
+    """
+    if p99_threshold is None:
+        p99_threshold = threshold
+    reference = {tuple(r.get(k) for k in KEY_FIELDS): r for r in baseline}
+    regressions = []
+    for result in results:
+        base = reference.get(tuple(result.get(k) for k in KEY_FIELDS))
+        if base is None:
+            continue
+        checks = (("throughput", -1, threshold), ("p50_us", 1, threshold),
+                  ("p99_us", 1, p99_threshold),
+                  ("peak_rss_kb", 1, threshold))
+        for field, sign, tolerance in checks:
+            old, new = base.get(field), result.get(field)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if change * sign > tolerance:
+                regressions.append("{}: {} {} -> {} ({:+.0%})".format(
+                    "/".join(str(result.get(k)) for k in KEY_FIELDS),
+                    field, old, new, change))
+    return regressions
+
+
+def main(argv: Sequence[str] = None) -> int:
+    """
+    Runs the benchmarks given on the command line.
+
+    Returns:
+        int: The exit status, 1 if there are regressions or failed cases.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, nargs="+",
+                        default=[10 ** 4, 10 ** 5, 10 ** 6],
+                        help="dataset sizes, up to 10**7 and beyond")
+    parser.add_argument("--backends", nargs="+", default=["list"],
+                        choices=BACKENDS)
+    parser.add_argument("--densities", type=float, nargs="+",
+                        default=[0.0, 0.1, 0.5, 0.9],
+                        help="deletion densities for get_hyper_index")
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=5,
+                        help="runs of every measurement, medians reported"
+                        " (at least {} for loads)".format(MIN_LOAD_RUNS))
+    parser.add_argument("--warmup", type=int, default=100,
+                        help="untimed calls before the measured ones")
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir",
+                        help="where datasets are kept (temporary if unset)")
+    parser.add_argument("--output", help="JSON file, stdout if unset")
+    parser.add_argument("--baseline", help="JSON output to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--p99-threshold", type=float, default=0.5,
+                        help="tolerance of the p99 latencies")
+    args = parser.parse_args(argv)
+    if args.repeats < 1:
+        parser.error("--repeats must be at least 1")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="pagination-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    results = []
+    failures = []
+    for rows in args.rows:
+        path = os.path.join(workdir, "synthetic-{}-{}.csv".format(
+            rows, args.seed))
+        if not os.path.exists(path):
+            write_dataset(path, rows, args.seed)
+        for backend in args.backends:
+            conn, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_run_case,
+                args=(child, path, rows, backend, args.calls,
+                      args.page_size, args.densities, args.seed,
+                      args.repeats, args.warmup))
+            process.start()
+            child.close()
+            try:
+                results.extend(conn.recv())
+            except EOFError:
+                # The case process died without sending its results
+                process.join()
+                failures.append({"rows": rows, "backend": backend,
+                                 "exitcode": process.exitcode})
+                print("FAILED: {} rows, {} backend (exit code {})".format(
+                    rows, backend, process.exitcode), file=sys.stderr)
+            conn.close()
+            process.join()
+        if not args.workdir:
+            for suffix in ("", ".idx", ".snap"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+    if not args.workdir:
+        os.rmdir(workdir)
+
+    report = json.dumps({
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "calls": args.calls,
+            "repeats": args.repeats,
+            "warmup": args.warmup,
+            "page_size": args.page_size,
+        },
+        "results": results,
+        "failures": failures,
+    }, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold,
+                              args.p99_threshold)
+        for line in regressions:
+            print("REGRESSION: " + line, file=sys.stderr)
+        if regressions:
+            return 1
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
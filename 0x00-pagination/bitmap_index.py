@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Bitmap secondary indexes over the categorical columns of a dataset.
+
+For every distinct value of an indexed column, a BitmapIndex keeps a bitmap
+(a Python int, bit i set when row i holds the value). Filters are combined
+with bitwise OR (several values of one column) and AND (several columns),
+which run in C over whole machine words, the number of matching rows is the
+popcount of the result and a page of matches is found by skipping whole
+chunks of the bitmap by their popcount.
+
+Classes:
+    BitmapIndex: Per-value bitmaps over some columns of a dataset.
+
+Functions:
+    popcount: Number of set bits of a bitmap.
+    select_bits: Positions of a rank range of set bits of a bitmap.
+"""
+
+from typing import Dict, Iterable, List, Sequence, Union
+
+from sort_index import resolve_order
+
+FILTER_COLUMNS = ("Gender", "Ethnicity", "Year of Birth")
+# Bytes of bitmap skipped at once when seeking a page of matches
+CHUNK_SIZE = 4096
+
+FilterValue = Union[str, int, Iterable[Union[str, int]]]
+
+
+def popcount(bitmap: int) -> int:
+    """
+    Returns the number of set bits of a bitmap.
+    """
+    return bitmap.bit_count()
+
+
+def select_bits(bitmap: int, start: int, stop: int) -> List[int]:
+    """
+    Returns the positions of the set bits of rank start to stop - 1.
+
+    Args:
+        bitmap (int): The bitmap.
+        start (int): Rank of the first set bit to return (0-based).
+        stop (int): Rank after the last set bit to return.
+
+    Returns:
+        list of int: Increasing bit positions.
+    """
+    positions = []
+    wanted = stop - start
+    if wanted <= 0 or bitmap <= 0:
+        return positions
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    seen = 0
+    for offset in range(0, len(data), CHUNK_SIZE):
+        chunk = int.from_bytes(data[offset:offset + CHUNK_SIZE], "little")
+        count = popcount(chunk)
+        if seen + count <= start:
+            seen += count
+            continue
+        base = offset * 8
+        while chunk and len(positions) < wanted:
+            low = chunk & -chunk
+            if seen >= start:
+                positions.append(base + low.bit_length() - 1)
+            seen += 1
+            chunk ^= low
+        if len(positions) >= wanted:
+            break
+    return positions
+
+
+class BitmapIndex:
+    """Per-value bitmaps over some columns of a dataset.
+    """
+
+    def __init__(self, dataset: Sequence[List], header: Sequence[str],
+                 columns: Sequence[str] = FILTER_COLUMNS):
+        """
+        Builds one bitmap per distinct value of each indexed column.
+
+        Args:
+            dataset (list of list): The rows to index.
+            header (list of str): The column names of the rows.
+            columns (tuple of str): The columns to index.
+        """
+        self.columns = resolve_order(columns)
+        self.__size = 0
+        self.__bitmaps = {name: {} for name in self.columns}
+        self.__positions = [list(header).index(name) for name in self.columns]
+        self.extend(dataset)
+
+    def extend(self, rows: Iterable[List]) -> None:
+        """
+        Indexes rows appended after the ones already indexed.
+
+        Args:
+            rows (iterable of list): The new rows, in dataset order.
+        """
+        start = self.__size
+        added = [dict() for _ in self.columns]
+        for i, row in enumerate(rows, start):
+            for values, col in zip(added, self.__positions):
+                values.setdefault(row[col], []).append(i)
+            self.__size = i + 1
+        for name, values in zip(self.columns, added):
+            bitmaps = self.__bitmaps[name]
+            for value, rows_of_value in values.items():
+                bits = bytearray((self.__size + 7) // 8)
+                for i in rows_of_value:
+                    bits[i >> 3] |= 1 << (i & 7)
+                bitmaps[value] = bitmaps.get(value, 0) | int.from_bytes(
+                    bits, "little")
+
+    def __len__(self) -> int:
+        """ Number of rows indexed """
+        return self.__size
+
+    def values(self, column: str) -> List[str]:
+        """
+        Returns the distinct values of an indexed column.
+        """
+        return sorted(self.__bitmaps[resolve_order((column,))[0]])
+
+    def bitmap(self, column: str, value: FilterValue) -> int:
+        """
+        Returns the rows holding a value (or any of several values) in a
+        column.
+
+        Raises:
+            AssertionError: If the column is not indexed.
+        """
+        name = resolve_order((column,))[0]
+        assert name in self.__bitmaps, "Unknown filter: {}".format(column)
+        bitmaps = self.__bitmaps[name]
+        if isinstance(value, (str, int)):
+            value = (value,)
+        result = 0
+        for one in value:
+            result |= bitmaps.get(str(one), 0)
+        return result
+
+    def match(self, filters: Dict[str, FilterValue]) -> int:
+        """
+        Returns the bitmap of the rows matching every filter.
+
+        Args:
+            filters (dict): Column name (or alias) to a value or a list of
+                values. Values of one column are OR-ed, columns are AND-ed.
+
+        Returns:
+            int: The bitmap of matching rows.
+        """
+        result = (1 << self.__size) - 1
+        for column, value in filters.items():
+            result &= self.bitmap(column, value)
+        return result
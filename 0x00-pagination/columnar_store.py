@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Columnar storage for the popular baby names dataset.
+
+Instead of keeping one Python list of strings per CSV row, the ColumnarStore
+keeps one compact buffer per column:
+
+    - numeric columns (Year of Birth, Count, Rank) live in typed
+      `array('l')` buffers.
+    - every other column is dictionary encoded: each distinct value is
+      stored once and rows only hold an `array('I')` of integer codes.
+
+Rows are only materialized (as lists of str, exactly as `csv.reader` would
+return them) when they are indexed or sliced, so a store can stand in for
+the `List[List]` returned by `Server.dataset()`.
+
+Classes:
+    ColumnarStore: Column oriented, dictionary encoded row store.
+
+Functions:
+    load_columnar: Parses a CSV file into a ColumnarStore.
+"""
+
+import csv
+from array import array
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+NUMERIC_COLUMNS = ("Year of Birth", "Count", "Rank")
+
+
+class ColumnarStore:
+    """Column oriented, dictionary encoded store of CSV rows.
+    """
+
+    def __init__(self, header: Sequence[str],
+                 numeric: Iterable[str] = NUMERIC_COLUMNS):
+        """
+        Initializes an empty store for the given header.
+
+        Args:
+            header (list of str): The column names.
+            numeric (iterable of str): Column names to store as integers.
+        """
+        self.header = list(header)
+        numeric = set(numeric)
+        self._columns = []
+        # Rows every column holds, published after the columns grew
+        self._length = 0
+        # Distinct values and their codes, None for numeric columns
+        self._values = []
+        self._codes = []
+        for name in self.header:
+            if name in numeric:
+                self._columns.append(array('l'))
+                self._values.append(None)
+                self._codes.append(None)
+            else:
+                self._columns.append(array('I'))
+                self._values.append([])
+                self._codes.append({})
+
+    @classmethod
+    def from_rows(cls, header: Sequence[str],
+                  rows: Iterable[Sequence[str]]) -> "ColumnarStore":
+        """
+        Builds a store from an iterable of rows.
+
+        Args:
+            header (list of str): The column names.
+            rows (iterable of list): The rows, as returned by csv.reader.
+
+        Returns:
+            ColumnarStore: The populated store.
+        """
+        store = cls(header)
+        store.extend(rows)
+        return store
+
+    @classmethod
+    def from_buffers(cls, header: Sequence[str], columns: Sequence[array],
+                     values: Sequence[Optional[List[str]]]
+                     ) -> "ColumnarStore":
+        """
+        Rebuilds a store from the buffers of another one (see buffers).
+
+        Args:
+            header (list of str): The column names.
+            columns (list of array): The buffer of every column.
+            values (list): The distinct values of every dictionary encoded
+                column, indexed by code, None for numeric columns.
+
+        Returns:
+            ColumnarStore: The store.
+        """
+        store = cls(header, ())
+        store._columns = list(columns)
+        store._length = len(store._columns[0]) if store._columns else 0
+        store._values = [None if v is None else list(v) for v in values]
+        store._codes = [
+            None if v is None else {value: code for code, value in
+                                    enumerate(v)}
+            for v in store._values
+        ]
+        return store
+
+    def buffers(self):
+        """
+        Returns the raw state of the store: the buffer of every column and
+        the distinct values of every dictionary encoded column (None for
+        numeric ones).
+        """
+        return list(self._columns), list(self._values)
+
+    def append(self, row: Sequence[str]) -> None:
+        """
+        Appends one row to the store. Concurrent readers only see the row
+        once every column holds it.
+
+        Args:
+            row (list of str): The row, one string per column.
+        """
+        encoded = []
+        for col, value in enumerate(row):
+            if self._values[col] is None:
+                try:
+                    number = int(value)
+                except ValueError:
+                    number = None
+                if number is None or str(number) != value:
+                    # Value would not round-trip, keep it as text instead
+                    self._demote(col)
+                else:
+                    encoded.append(number)
+                    continue
+            encoded.append(self._encode(col, value))
+        for column, value in zip(self._columns, encoded):
+            column.append(value)
+        self._length += 1
+
+    def extend(self, rows: Iterable[Sequence[str]]) -> None:
+        """
+        Appends every row of an iterable to the store.
+
+        Args:
+            rows (iterable of list): The rows to append.
+        """
+        for row in rows:
+            self.append(row)
+
+    def merge(self, other: "ColumnarStore") -> None:
+        """
+        Appends the rows of another store with the same header, remapping
+        its dictionary codes instead of materializing its rows.
+
+        Args:
+            other (ColumnarStore): The store whose rows to append.
+        """
+        if [v is None for v in self._values] != [
+                v is None for v in other._values]:
+            # Column kinds differ (a numeric column was demoted)
+            self.extend(other)
+            return
+        added = len(other)
+        for col, values in enumerate(other._values):
+            if values is None:
+                self._columns[col].extend(other._columns[col][:added])
+                continue
+            remap = [self._encode(col, value) for value in values]
+            self._columns[col].extend(array(
+                'I', map(remap.__getitem__, other._columns[col][:added])))
+        self._length += added
+
+    def _encode(self, col: int, value: str) -> int:
+        """
+        Returns the dictionary code of a value, adding it if unseen.
+        """
+        codes = self._codes[col]
+        code = codes.get(value)
+        if code is None:
+            code = len(self._values[col])
+            codes[value] = code
+            self._values[col].append(value)
+        return code
+
+    def _demote(self, col: int) -> None:
+        """
+        Converts a numeric column to a dictionary encoded one.
+        """
+        numbers = self._columns[col]
+        self._values[col] = []
+        self._codes[col] = {}
+        self._columns[col] = array('I')
+        for number in numbers:
+            self._columns[col].append(self._encode(col, str(number)))
+
+    def column_index(self, name: str) -> int:
+        """
+        Returns the position of a column given its name.
+
+        Raises:
+            ValueError: If the column does not exist.
+        """
+        return self.header.index(name)
+
+    def column(self, name: str) -> array:
+        """
+        Returns the raw buffer of a column: the integers of a numeric
+        column or the codes of a dictionary encoded one.
+        """
+        return self._columns[self.column_index(name)]
+
+    def categories(self, name: str) -> Optional[List[str]]:
+        """
+        Returns the distinct values of a dictionary encoded column, indexed
+        by code, or None for a numeric column.
+        """
+        return self._values[self.column_index(name)]
+
+    def code_of(self, name: str, value: str) -> Optional[int]:
+        """
+        Returns the code of a value in a dictionary encoded column, or None
+        if the value never occurs.
+        """
+        codes = self._codes[self.column_index(name)]
+        return None if codes is None else codes.get(value)
+
+    def row(self, index: int) -> List[str]:
+        """
+        Materializes a single row.
+
+        Args:
+            index (int): The row position.
+
+        Returns:
+            list of str: The row as csv.reader would return it.
+        """
+        row = []
+        for column, values in zip(self._columns, self._values):
+            if values is None:
+                row.append(str(column[index]))
+            else:
+                row.append(values[column[index]])
+        return row
+
+    def __len__(self) -> int:
+        """ Number of rows in the store """
+        return self._length
+
+    def __getitem__(self, key):
+        """
+        Materializes a row (int key) or a list of rows (slice key).
+        """
+        if isinstance(key, slice):
+            return [self.row(i) for i in range(*key.indices(len(self)))]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("ColumnarStore index out of range")
+        return self.row(key)
+
+    def __iter__(self) -> Iterator[List[str]]:
+        """ Iterates over materialized rows """
+        for i in range(len(self)):
+            yield self.row(i)
+
+
+def load_columnar(path: str) -> ColumnarStore:
+    """
+    Parses a CSV file into a ColumnarStore, skipping the header row.
+
+    Args:
+        path (str): Path of the CSV file.
+
+    Returns:
+        ColumnarStore: The rows of the file, excluding the header.
+    """
+    with open(path) as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        return ColumnarStore.from_rows(header, reader)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Dataset loading backends shared by the pagination servers.
+
+Functions:
+    load_dataset: Loads the rows of a CSV file with the chosen backend.
+    load_with_snapshot: Loads the rows of a CSV file through its snapshot.
+    read_header: Reads the column names of a CSV file.
+"""
+
+import csv
+from typing import List, Tuple
+
+from columnar_store import load_columnar
+from mmap_store import MmapStore
+from parallel_loader import load_parallel
+from snapshot import Snapshot, load_or_build
+
+BACKENDS = ("list", "columnar", "mmap")
+
+
+def load_dataset(path: str, backend: str = "list",
+                 snapshot: bool = False, workers: int = 1) -> List[List]:
+    """
+    Loads the rows of a CSV file, excluding the header row.
+
+    Args:
+        path (str): Path of the CSV file.
+        backend (str): "list" for a list of lists of str, "columnar"
+            for a ColumnarStore that materializes rows on access, or "mmap"
+            for a MmapStore that decodes rows straight from the mapped file.
+        snapshot (bool): Whether to load the rows from the binary snapshot
+            of the file (see load_with_snapshot).
+        workers (int): Number of processes parsing the file in parallel
+            for the list and columnar backends (see parallel_loader).
+
+    Returns:
+        list of list: The rows of the file (or a sequence behaving like one).
+
+    Raises:
+        ValueError: If the backend is unknown, or does not support
+            snapshots.
+    """
+    if snapshot:
+        return load_with_snapshot(path, backend, workers)[0]
+    if backend in ("list", "columnar") and workers > 1:
+        return load_parallel(path, workers, backend == "columnar")
+    if backend == "list":
+        with open(path) as f:
+            reader = csv.reader(f)
+            dataset = [row for row in reader]
+        return dataset[1:]
+    if backend == "columnar":
+        return load_columnar(path)
+    if backend == "mmap":
+        return MmapStore(path)
+    raise ValueError("Unknown dataset backend: {}".format(backend))
+
+
+def load_with_snapshot(path: str, backend: str = "list", workers: int = 1
+                       ) -> Tuple[List[List], Snapshot]:
+    """
+    Loads the rows of a CSV file from its binary snapshot, parsing the file
+    and writing the snapshot first if it is missing or out of date.
+
+    Args:
+        path (str): Path of the CSV file.
+        backend (str): "list" or "columnar". The mmap backend already
+            persists its own offset index and does not use snapshots.
+        workers (int): Number of processes parsing the file when the
+            snapshot has to be built.
+
+    Returns:
+        tuple: The rows of the file, excluding the header, and the
+        Snapshot they were loaded from.
+
+    Raises:
+        ValueError: If the backend does not support snapshots.
+    """
+    if backend not in ("list", "columnar"):
+        raise ValueError(
+            "Snapshots are not supported by backend: {}".format(backend))
+    loaded = load_or_build(path, workers=workers)
+    if backend == "columnar":
+        return loaded.store, loaded
+    return list(loaded.store), loaded
+
+
+def read_header(path: str) -> List[str]:
+    """
+    Reads the header row of a CSV file.
+
+    Args:
+        path (str): Path of the CSV file.
+
+    Returns:
+        list of str: The column names, empty if the file is empty.
+    """
+    with open(path) as f:
+        return next(csv.reader(f), [])
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Rows of the dataset pre-encoded to JSON and CSV.
+
+Serving a page over HTTP used to mean serializing every row of the page
+again on every request. EncodedRows serializes each row once, when the
+dataset is loaded, into one contiguous bytes buffer per format along with
+an `array('Q')` of row offsets. A page of consecutive rows is then a
+memoryview slice of that buffer (no copy at all), and any other set of
+rows a single `bytes.join` of such slices.
+
+JSON rows are encoded exactly as `json.dumps` encodes them and separated by
+", ", so the slice of a page is the body of the JSON array of its rows and
+splice_json builds byte for byte what `json.dumps` would return for a whole
+response. CSV rows are encoded by `csv.writer` with "\\n" line endings, like
+DATA_FILE.
+
+Buffers are never modified once published: extending the rows builds new
+ones, so views handed out earlier stay valid.
+
+Classes:
+    EncodedRows: JSON and CSV encodings of rows, addressable by position.
+
+Functions:
+    encode_rows: Encodes rows in one format, without keeping them.
+    json_array: Wraps encoded JSON rows into a JSON array.
+    splice_json: Encodes a dictionary, one of its values being raw JSON.
+"""
+
+import csv
+import json
+from array import array
+from itertools import accumulate
+from typing import Dict, Hashable, Iterable, List, Sequence
+
+FORMATS = ("json", "csv")
+# Follows every JSON row in the buffer, as json.dumps separates items
+JSON_SEPARATOR = b", "
+
+
+class _Lines(list):
+    """ File-like list collecting the lines written by csv.writer """
+    write = list.append
+
+
+def _encode(rows: Iterable[Sequence[str]]):
+    """
+    Encodes rows, returning the JSON and CSV encodings of every row.
+    """
+    dumps = json.JSONEncoder().encode
+    lines = _Lines()
+    writer = csv.writer(lines, lineterminator="\n")
+    json_parts = []
+    for row in rows:
+        json_parts.append(dumps(list(row)).encode() + JSON_SEPARATOR)
+        writer.writerow(row)
+    return json_parts, [line.encode() for line in lines]
+
+
+def _append(buf: bytes, offsets: array, parts: List[bytes]):
+    """
+    Returns new copies of a buffer and its offsets extended with parts.
+    """
+    base = offsets[-1]
+    offsets = array('Q', offsets)
+    offsets.extend(base + end for end in accumulate(map(len, parts)))
+    return buf + b"".join(parts), offsets
+
+
+class EncodedRows:
+    """JSON and CSV encodings of rows, addressable by position.
+    """
+
+    def __init__(self, rows: Iterable[Sequence[str]] = ()):
+        """
+        Encodes rows.
+
+        Args:
+            rows (iterable of list): The rows, e.g. a Server's dataset.
+        """
+        empty = array('Q', [0])
+        # Swapped as a whole, so readers always see matching buffers
+        self.__state = {fmt: (b"", empty) for fmt in FORMATS}
+        self.extend(rows)
+
+    def extend(self, rows: Iterable[Sequence[str]]) -> None:
+        """
+        Encodes rows and appends them after the rows already encoded.
+
+        Args:
+            rows (iterable of list): The rows to append.
+        """
+        json_parts, csv_parts = _encode(rows)
+        if not json_parts:
+            return
+        state = self.__state
+        self.__state = {
+            "json": _append(*state["json"], json_parts),
+            "csv": _append(*state["csv"], csv_parts),
+        }
+
+    def __len__(self) -> int:
+        """ Number of encoded rows """
+        return len(self.__state["json"][1]) - 1
+
+    def view(self, start: int, end: int, fmt: str = "json") -> memoryview:
+        """
+        Returns the encoding of consecutive rows, without copying it.
+
+        Args:
+            start (int): Position of the first row.
+            end (int): Position following the last row, clamped to the
+                number of rows.
+            fmt (str): "json" for the body (without brackets) of the JSON
+                array of the rows, "csv" for their CSV lines.
+
+        Returns:
+            memoryview: The encoded rows, empty if there are none.
+
+        Raises:
+            ValueError: If the format is unknown.
+        """
+        buf, offsets = self._buffer(fmt)
+        end = min(end, len(offsets) - 1)
+        if start >= end:
+            return memoryview(b"")
+        stop = offsets[end]
+        if fmt == "json":
+            stop -= len(JSON_SEPARATOR)
+        return memoryview(buf)[offsets[start]:stop]
+
+    def join(self, positions: Iterable[int], fmt: str = "json") -> bytes:
+        """
+        Returns the encoding of any rows, in the order given.
+
+        Args:
+            positions (iterable of int): The positions of the rows.
+            fmt (str): "json" or "csv", as for view.
+
+        Returns:
+            bytes: The encoded rows.
+
+        Raises:
+            ValueError: If the format is unknown.
+            IndexError: If a position is out of range.
+        """
+        buf, offsets = self._buffer(fmt)
+        view = memoryview(buf)
+        encoded = b"".join([view[offsets[i]:offsets[i + 1]]
+                            for i in positions])
+        if fmt == "json" and encoded:
+            return encoded[:-len(JSON_SEPARATOR)]
+        return encoded
+
+    def _buffer(self, fmt: str):
+        """
+        Returns the buffer and the offsets of a format.
+        """
+        if fmt not in FORMATS:
+            raise ValueError("Unknown encoding format: {}".format(fmt))
+        return self.__state[fmt]
+
+
+def encode_rows(rows: Iterable[Sequence[str]], fmt: str = "json") -> bytes:
+    """
+    Encodes rows as EncodedRows.view returns them, for rows encoded once
+    and then dropped (a stream of chunks for example).
+
+    Args:
+        rows (iterable of list): The rows to encode.
+        fmt (str): "json" or "csv", as for EncodedRows.view.
+
+    Returns:
+        bytes: The encoded rows.
+
+    Raises:
+        ValueError: If the format is unknown.
+    """
+    if fmt == "json":
+        dumps = json.JSONEncoder().encode
+        return JSON_SEPARATOR.join(dumps(list(row)).encode() for row in rows)
+    if fmt == "csv":
+        lines = _Lines()
+        csv.writer(lines, lineterminator="\n").writerows(rows)
+        return "".join(lines).encode()
+    raise ValueError("Unknown encoding format: {}".format(fmt))
+
+
+def json_array(body) -> bytes:
+    """
+    Wraps the body returned by EncodedRows (JSON format) into an array.
+    """
+    return b"".join((b"[", body, b"]"))
+
+
+def splice_json(fields: Dict[str, object], key: Hashable, raw) -> bytes:
+    """
+    Encodes a dictionary as json.dumps would, the value of one key being
+    given already encoded.
+
+    Args:
+        fields (dict): The dictionary to encode, in order.
+        key (str): The key whose value is replaced by raw.
+        raw (bytes-like): The JSON encoding of that value.
+
+    Returns:
+        bytes: The encoded dictionary.
+    """
+    parts = []
+    for name, value in fields.items():
+        parts.append(json.dumps(name).encode() + b": ")
+        parts.append(raw if name == key else json.dumps(value).encode())
+        parts.append(JSON_SEPARATOR)
+    if parts:
+        parts.pop()
+    return b"".join([b"{"] + parts + [b"}"])
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Index of the rows still alive in a dataset subject to deletions.
+
+LiveRowIndex is a Fenwick (binary indexed) tree over row positions holding
+1 for every live row and 0 for every deleted one, next to a bytearray of the
+same flags. It answers, in O(log n):
+
+    - rank(i): how many live rows come before position i.
+    - select(k): the position of the k-th live row.
+
+so finding the first of "the next page_size live rows starting at index"
+costs at most O(log n) however many deleted rows precede it; the others are
+found by scanning the flags (in C), one run of live rows at a time.
+
+Classes:
+    LiveRowIndex: Fenwick tree over the live rows of a dataset.
+"""
+
+from array import array
+from typing import Iterable, List
+
+
+class LiveRowIndex:
+    """Fenwick tree over the live rows of a dataset.
+    """
+
+    def __init__(self, size: int):
+        """
+        Initializes an index where all size rows are live.
+
+        Args:
+            size (int): The number of rows (positions) to track.
+        """
+        self.__size = 0
+        self.__live = 0
+        self.__flags = bytearray()
+        self.__tree = array('l', [0])
+        self.__top = 0
+        self.extend(size)
+
+    def extend(self, count: int) -> None:
+        """
+        Appends count live rows at the end of the index.
+
+        Args:
+            count (int): The number of new positions.
+        """
+        for _ in range(count):
+            self.__size += 1
+            pos = self.__size
+            # A new node covers (pos - lowbit(pos), pos]: the new row plus
+            # the sums of the nodes it absorbs.
+            total = 1
+            step = 1
+            low = pos & -pos
+            while step < low:
+                total += self.__tree[pos - step]
+                step <<= 1
+            self.__tree.append(total)
+        self.__flags.extend(b'\x01' * count)
+        self.__live += count
+        # Largest power of two not above size, where select() starts
+        self.__top = 1 << max(self.__size.bit_length() - 1, 0)
+
+    def __len__(self) -> int:
+        """ Number of positions tracked, deleted ones included """
+        return self.__size
+
+    def live_count(self) -> int:
+        """ Number of live rows """
+        return self.__live
+
+    def is_live(self, index: int) -> bool:
+        """ Whether the row at position index has not been deleted """
+        return 0 <= index < self.__size and self.__flags[index] == 1
+
+    def flags(self) -> bytearray:
+        """
+        Live flag of every position, 1 if live and 0 if deleted. This is
+        the index's own array, callers must not modify it.
+        """
+        return self.__flags
+
+    def delete(self, index: int) -> bool:
+        """
+        Marks the row at position index as deleted.
+
+        Args:
+            index (int): The position of the row.
+
+        Returns:
+            bool: True if the row was live, False if already deleted.
+        """
+        if not self.is_live(index):
+            return False
+        self.__flags[index] = 0
+        self.__live -= 1
+        pos = index + 1
+        while pos <= self.__size:
+            self.__tree[pos] -= 1
+            pos += pos & -pos
+        return True
+
+    def delete_many(self, indices: Iterable[int]) -> int:
+        """
+        Marks several rows as deleted.
+
+        Returns:
+            int: The number of rows that were live before the call.
+        """
+        return sum(1 for index in indices if self.delete(index))
+
+    def deleted(self) -> List[int]:
+        """
+        Returns the positions of the deleted rows, in increasing order.
+        """
+        positions = []
+        pos = self.__flags.find(0)
+        while pos != -1:
+            positions.append(pos)
+            pos = self.__flags.find(0, pos + 1)
+        return positions
+
+    def rank(self, index: int) -> int:
+        """
+        Returns the number of live rows at positions lower than index.
+        """
+        total = 0
+        pos = min(index, self.__size)
+        while pos > 0:
+            total += self.__tree[pos]
+            pos -= pos & -pos
+        return total
+
+    def select(self, k: int) -> int:
+        """
+        Returns the position of the k-th live row (0-based), or -1 if there
+        are not that many live rows.
+        """
+        if not 0 <= k < self.__live:
+            return -1
+        pos = 0
+        remaining = k + 1
+        step = self.__top
+        while step:
+            nxt = pos + step
+            if nxt <= self.__size and self.__tree[nxt] < remaining:
+                pos = nxt
+                remaining -= self.__tree[nxt]
+            step >>= 1
+        return pos
+
+    def next_live(self, index: int, count: int) -> List[int]:
+        """
+        Returns the positions of up to count live rows starting at index.
+
+        Args:
+            index (int): The first position to consider.
+            count (int): The maximum number of positions to return.
+
+        Returns:
+            list of int: Increasing positions of live rows >= index.
+        """
+        if count < 1:
+            return []
+        # Only a deleted index needs the tree to find the next live row
+        pos = index if self.is_live(index) else self.select(self.rank(index))
+        positions = []
+        flags = self.__flags
+        while pos != -1:
+            # Take the run of live rows from pos at once
+            end = min(pos + count - len(positions), self.__size)
+            gap = flags.find(0, pos, end)
+            if gap == -1:
+                positions.extend(range(pos, end))
+                break
+            positions.extend(range(pos, gap))
+            pos = flags.find(1, gap + 1)
+        return positions
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped, lazily decoded storage for the popular baby names dataset.
+
+The MmapStore maps the CSV file read-only and keeps nothing but a compact
+index of row start offsets (`array('Q')`). Indexing or slicing the store
+decodes only the requested rows, so fetching one page costs the same
+whatever the size of the file, and several processes mapping the same file
+share the OS page cache instead of each holding a parsed copy.
+
+The offset index is persisted next to the CSV file (`<file>.idx`) and is
+reused as long as the size and modification time of the CSV still match,
+so a cold start does not even need to scan the file.
+
+Classes:
+    MmapStore: Row store backed by a memory-mapped CSV file.
+
+Functions:
+    build_offsets: Computes the row start offsets of a CSV buffer.
+    next_line: Offset following the CSV record starting at a given offset.
+    load_offsets: Reads a persisted offset index if it is still valid.
+    save_offsets: Persists an offset index next to its CSV file.
+"""
+
+import csv
+import io
+import mmap
+import os
+import struct
+from array import array
+from typing import Iterator, List, Optional
+
+INDEX_MAGIC = b"PGIDX1\0\0"
+INDEX_HEADER = struct.Struct("<8sQQ")
+
+
+def build_offsets(buf) -> array:
+    """
+    Computes the start offset of every row of a CSV buffer, header excluded.
+
+    The returned array holds one more entry than there are rows: its last
+    item is the end of the data, so row i spans offsets[i]:offsets[i + 1].
+
+    Args:
+        buf (bytes or mmap): The content of the CSV file.
+
+    Returns:
+        array: The row start offsets, as unsigned 64 bit integers.
+    """
+    size = len(buf)
+    offsets = array('Q')
+    quoted = buf.find(b'"') != -1
+    pos = next_line(buf, 0, quoted)  # Skip the header row
+    while pos < size:
+        offsets.append(pos)
+        pos = next_line(buf, pos, quoted)
+    offsets.append(size)
+    return offsets
+
+
+def next_line(buf, pos: int, quoted: bool) -> int:
+    """
+    Returns the offset following the record that starts at pos.
+
+    Newlines inside quoted fields only need special care when the file
+    contains quotes at all, so the fast path is a plain newline search.
+    """
+    if not quoted:
+        end = buf.find(b'\n', pos)
+        return len(buf) if end == -1 else end + 1
+    in_quotes = False
+    size = len(buf)
+    while pos < size:
+        char = buf[pos:pos + 1]
+        pos += 1
+        if char == b'"':
+            in_quotes = not in_quotes
+        elif char == b'\n' and not in_quotes:
+            return pos
+    return size
+
+
+def _index_path(path: str) -> str:
+    """ Returns where the offset index of a CSV file is persisted """
+    return path + ".idx"
+
+
+def load_offsets(path: str, index_path: Optional[str] = None
+                 ) -> Optional[array]:
+    """
+    Reads the persisted offset index of a CSV file.
+
+    Args:
+        path (str): Path of the CSV file.
+        index_path (str): Path of the index, defaults to `<path>.idx`.
+
+    Returns:
+        array: The offsets, or None if there is no index or if it was built
+        for a different version of the file.
+    """
+    index_path = index_path or _index_path(path)
+    try:
+        stat = os.stat(path)
+        with open(index_path, "rb") as f:
+            header = f.read(INDEX_HEADER.size)
+            if len(header) != INDEX_HEADER.size:
+                return None
+            magic, size, mtime = INDEX_HEADER.unpack(header)
+            if (magic != INDEX_MAGIC or size != stat.st_size or
+                    mtime != stat.st_mtime_ns):
+                return None
+            offsets = array('Q')
+            offsets.frombytes(f.read())
+    except (OSError, ValueError):
+        return None
+    return offsets
+
+
+def save_offsets(path: str, offsets: array,
+                 index_path: Optional[str] = None) -> bool:
+    """
+    Persists the offset index of a CSV file, tagged with its size and
+    modification time.
+
+    Args:
+        path (str): Path of the CSV file.
+        offsets (array): The offsets to persist.
+        index_path (str): Path of the index, defaults to `<path>.idx`.
+
+    Returns:
+        bool: True if the index was written, False if it could not be
+        (read-only directory for example).
+    """
+    index_path = index_path or _index_path(path)
+    tmp_path = "{}.{}.tmp".format(index_path, os.getpid())
+    try:
+        stat = os.stat(path)
+        with open(tmp_path, "wb") as f:
+            f.write(INDEX_HEADER.pack(
+                INDEX_MAGIC, stat.st_size, stat.st_mtime_ns))
+            f.write(offsets.tobytes())
+        os.replace(tmp_path, index_path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+class MmapStore:
+    """Row store backed by a memory-mapped CSV file.
+    """
+
+    def __init__(self, path: str, index_path: Optional[str] = None,
+                 persist: bool = True):
+        """
+        Maps the CSV file and loads (or builds) its row offset index.
+
+        Args:
+            path (str): Path of the CSV file.
+            index_path (str): Path of the offset index, `<path>.idx` by
+                default.
+            persist (bool): Whether to write a freshly built index to disk.
+        """
+        self.path = path
+        self.__index_path = index_path
+        self.__persist = persist
+        self.__file = open(path, "rb")
+        if os.fstat(self.__file.fileno()).st_size:
+            self.__buf = mmap.mmap(
+                self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # Empty files cannot be mapped
+            self.__buf = b""
+        self.offsets = load_offsets(path, index_path)
+        if self.offsets is None or self.offsets[-1] != len(self.__buf):
+            self.offsets = build_offsets(self.__buf)
+            if persist:
+                save_offsets(path, self.offsets, index_path)
+
+    def refresh(self) -> int:
+        """
+        Maps the rows appended to the file since it was mapped. Only
+        complete (newline terminated) rows are picked up, a row still being
+        written is left for the next refresh.
+
+        Returns:
+            int: The number of rows added.
+
+        Raises:
+            ValueError: If the file shrank or its mapped content changed,
+            in which case it has to be loaded again.
+        """
+        end = self.offsets[-1]
+        size = os.fstat(self.__file.fileno()).st_size
+        if size < end or (end and self.__buf[end - 1:end] != b"\n"):
+            raise ValueError("{} was rewritten".format(self.path))
+        if size == end:
+            return 0
+        buf = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        if end and buf[end - 1:end] != b"\n":
+            buf.close()
+            raise ValueError("{} was rewritten".format(self.path))
+        # Readers may still be slicing the old mapping, it is unmapped
+        # when the last of them drops it. The new one is published before
+        # the offsets of the rows it adds.
+        self.__buf = buf
+        limit = buf.rfind(b"\n", end) + 1
+        quoted = buf.find(b'"', end, limit) != -1
+        if len(self) == 0 and end == 0:
+            # The file was empty, its first line is the header
+            end = next_line(buf, 0, quoted)
+            if end > limit:
+                return 0
+            self.offsets[-1] = end
+        added = 0
+        pos = end
+        while pos < limit:
+            pos = next_line(buf, pos, quoted)
+            self.offsets.append(pos)
+            added += 1
+        if added and self.__persist:
+            save_offsets(self.path, self.offsets, self.__index_path)
+        return added
+
+    def close(self) -> None:
+        """ Unmaps and closes the underlying file """
+        if isinstance(self.__buf, mmap.mmap):
+            self.__buf.close()
+        self.__file.close()
+
+    def _decode(self, start: int, stop: int) -> List[List[str]]:
+        """
+        Decodes the rows in [start, stop) from the mapped file.
+        """
+        if start >= stop:
+            return []
+        # The mapping first: it holds every row of the offsets read after
+        buf = self.__buf
+        raw = buf[self.offsets[start]:self.offsets[stop]]
+        return list(csv.reader(io.StringIO(raw.decode(), newline="")))
+
+    def __len__(self) -> int:
+        """ Number of rows, header excluded """
+        return len(self.offsets) - 1
+
+    def __getitem__(self, key):
+        """
+        Decodes a row (int key) or a list of rows (slice key).
+        """
+        size = len(self)
+        if isinstance(key, slice):
+            start, stop, step = key.indices(size)
+            if step == 1:
+                return self._decode(start, stop)
+            return [self[i] for i in range(start, stop, step)]
+        if key < 0:
+            key += size
+        if not 0 <= key < size:
+            raise IndexError("MmapStore index out of range")
+        return self._decode(key, key + 1)[0]
+
+    def __iter__(self) -> Iterator[List[str]]:
+        """ Iterates over decoded rows """
+        for i in range(len(self)):
+            yield self[i]
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Prefix and substring search over the first names of the dataset.
+
+A NameIndex keeps, for every distinct (case folded) first name, the sorted
+positions of the rows holding it, and:
+
+    - the sorted list of distinct names with the cumulative number of rows
+      before each one, so a prefix is a contiguous range of names found
+      with two bisections and any page of its rows is found with a third.
+    - a trigram index from every 3 letter sequence to the names containing
+      it, so a substring search only verifies the names sharing all of its
+      trigrams instead of scanning every row.
+
+Rows are returned ordered by name, then by position.
+
+Classes:
+    NameIndex: Search index over a name column.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Sequence, Set
+
+NAME_COLUMN = "Child's First Name"
+
+
+def _trigrams(name: str) -> Set[str]:
+    """ Returns the 3 character sequences of a name """
+    return {name[i:i + 3] for i in range(len(name) - 2)}
+
+
+class NameIndex:
+    """Search index over a name column.
+    """
+
+    def __init__(self, dataset: Sequence[List], header: Sequence[str],
+                 column: str = NAME_COLUMN):
+        """
+        Indexes the name column of every row of the dataset.
+
+        Args:
+            dataset (list of list): The rows to index.
+            header (list of str): The column names of the rows.
+            column (str): The column holding the names.
+        """
+        self.__column = list(header).index(column)
+        self.__size = 0
+        self.__postings = {}
+        self.__trigrams = {}
+        self.__names = []
+        self.__cumulative = array('Q', [0])
+        self.extend(dataset)
+
+    def extend(self, rows: Iterable[List]) -> None:
+        """
+        Indexes rows appended after the ones already indexed.
+
+        Args:
+            rows (iterable of list): The new rows, in dataset order.
+        """
+        added = False
+        for i, row in enumerate(rows, self.__size):
+            name = row[self.__column].casefold()
+            postings = self.__postings.get(name)
+            if postings is None:
+                postings = self.__postings[name] = array('I')
+                for trigram in _trigrams(name):
+                    self.__trigrams.setdefault(trigram, set()).add(name)
+            postings.append(i)
+            self.__size = i + 1
+            added = True
+        if added:
+            self.__names = sorted(self.__postings)
+            self.__cumulative = array('Q', [0])
+            for name in self.__names:
+                self.__cumulative.append(
+                    self.__cumulative[-1] + len(self.__postings[name]))
+
+    def prefix(self, prefix: str) -> List[str]:
+        """
+        Returns the sorted distinct names starting with prefix.
+        """
+        low, high = self._prefix_range(prefix.casefold())
+        return self.__names[low:high]
+
+    def substring(self, term: str) -> List[str]:
+        """
+        Returns the sorted distinct names containing term.
+        """
+        term = term.casefold()
+        grams = _trigrams(term)
+        if not grams:
+            candidates = self.__names
+        else:
+            sets = sorted((self.__trigrams.get(g, set()) for g in grams),
+                          key=len)
+            candidates = set.intersection(*sets)
+        return sorted(name for name in candidates if term in name)
+
+    def _prefix_range(self, prefix: str):
+        """
+        Returns the range of sorted names starting with a case folded
+        prefix.
+        """
+        low = bisect_left(self.__names, prefix)
+        high = bisect_right(self.__names, prefix + "\U0010ffff", low)
+        return low, high
+
+    def count_prefix(self, prefix: str) -> int:
+        """
+        Returns the number of rows whose name starts with prefix.
+        """
+        low, high = self._prefix_range(prefix.casefold())
+        return self.__cumulative[high] - self.__cumulative[low]
+
+    def rows_with_prefix(self, prefix: str, start: int, stop: int
+                         ) -> List[int]:
+        """
+        Returns the positions of the matching rows of rank start to
+        stop - 1, for rows whose name starts with prefix.
+        """
+        low, high = self._prefix_range(prefix.casefold())
+        base = self.__cumulative[low]
+        stop = min(base + stop, self.__cumulative[high])
+        return self._slice(
+            self.__names, self.__cumulative, base + start, stop)
+
+    def count(self, names: Iterable[str]) -> int:
+        """
+        Returns the number of rows holding any of the given names.
+        """
+        return sum(len(self.__postings[name]) for name in names)
+
+    def rows(self, names: Sequence[str], start: int, stop: int) -> List[int]:
+        """
+        Returns the positions of the rows of rank start to stop - 1 among
+        the rows holding the given (sorted, case folded) names.
+        """
+        cumulative = [0]
+        for name in names:
+            cumulative.append(cumulative[-1] + len(self.__postings[name]))
+        return self._slice(names, cumulative, start, min(stop, cumulative[-1]))
+
+    def _slice(self, names: Sequence[str], cumulative: Sequence[int],
+               start: int, stop: int) -> List[int]:
+        """
+        Concatenates the postings of names, restricted to the ranks
+        [start, stop) given their cumulative row counts.
+        """
+        positions = []
+        i = bisect_right(cumulative, start) - 1
+        while start < stop and i < len(names):
+            postings = self.__postings[names[i]]
+            offset = start - cumulative[i]
+            take = min(stop - start, len(postings) - offset)
+            positions.extend(postings[offset:offset + take])
+            start += take
+            i += 1
+        return positions
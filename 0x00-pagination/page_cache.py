@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Bounded cache of built pages, evicting with a 0x01-caching policy.
+
+Pages are cached whole (the dictionary returned by get_hyper) under their
+(page, page_size) key, so a hit costs one lookup instead of a slice and a
+dictionary build. The cache is bounded in pages (MAX_ITEMS of the
+caching policies by default), and cleared as a whole by the server
+whenever its dataset changes, so no stale page is ever served.
+
+Classes:
+    PageCache: Thread-safe page cache backed by an eviction policy.
+
+Functions:
+    load_policy: Returns the caching class of a policy name.
+"""
+
+import os
+import sys
+import threading
+from typing import Dict, Hashable, Optional
+
+CACHING_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "0x01-caching")
+# Policy name to (module, class) in CACHING_DIR
+POLICIES = {
+    "fifo": ("1-fifo_cache", "FIFOCache"),
+    "lifo": ("2-lifo_cache", "LIFOCache"),
+    "lru": ("3-lru_cache", "LRUCache"),
+    "mru": ("4-mru_cache", "MRUCache"),
+    "lfu": ("100-lfu_cache", "LFUCache"),
+}
+
+
+def load_policy(name: str) -> type:
+    """
+    Returns the caching class implementing an eviction policy.
+
+    Args:
+        name (str): One of the POLICIES names, e.g. "lru".
+
+    Returns:
+        type: The BaseCaching subclass.
+
+    Raises:
+        ValueError: If the policy is unknown.
+    """
+    if name not in POLICIES:
+        raise ValueError("Unknown cache policy: {}".format(name))
+    if CACHING_DIR not in sys.path:
+        sys.path.append(CACHING_DIR)
+    module, cls = POLICIES[name]
+    return getattr(__import__(module), cls)
+
+
+class PageCache:
+    """Thread-safe cache of built pages backed by an eviction policy.
+    """
+
+    def __init__(self, policy: str = "lru", max_items: Optional[int] = None):
+        """
+        Initializes an empty cache.
+
+        Args:
+            policy (str): The eviction policy, one of the POLICIES names.
+            max_items (int): The number of pages kept, MAX_ITEMS of the
+                policy by default.
+        """
+        self.policy = policy
+        self.max_items = max_items
+        self.__cls = load_policy(policy)
+        # Evictions are not printed by a server
+        self.__cache = self.__cls(max_items, verbose=False)
+        # The policies themselves are not thread-safe
+        self.__lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Dict]:
+        """
+        Returns the page cached under a key, None on a miss.
+        """
+        with self.__lock:
+            return self.__cache.get(key)
+
+    def put(self, key: Hashable, page: Dict) -> None:
+        """
+        Caches a page, evicting another one if the cache is full.
+        """
+        with self.__lock:
+            self.__cache.put(key, page)
+
+    def clear(self) -> None:
+        """
+        Drops every cached page.
+        """
+        with self.__lock:
+            self.__cache = self.__cls(self.max_items, verbose=False)
+
+    def __len__(self) -> int:
+        """ Number of cached pages """
+        return len(self.__cache.cache_data)
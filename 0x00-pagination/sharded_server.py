@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+"""
+Partitioned pagination server for datasets larger than one process.
+
+The rows of one or several CSV files (sharing the same header) are split
+into shards, each loaded and owned by a worker process. The coordinator,
+ShardedServer, only keeps the global offset at which every shard starts:
+the index_range of a page is mapped onto the shards it overlaps, which are
+queried in parallel over pipes, and the rows they return are concatenated.
+
+Two partitionings are available:
+
+    - "rows": shards are consecutive byte ranges of the files, balanced by
+      size, so the global order of the rows is the order of the files.
+    - "year": shards are consecutive ranges of Year of Birth, balanced by
+      row count; the global order is by shard, then by position in the
+      files. The coordinator reads the years in a single pass, recording
+      the byte runs of the rows of every shard, so each worker only parses
+      its own rows.
+
+Deletions are tracked by every shard for its own rows, so get_hyper_index
+is resilient to deletions exactly like the deletion-resilient Server.
+
+Classes:
+    ShardedServer: Coordinator of the shard worker processes.
+
+Functions:
+    partition_rows: Splits CSV files into byte ranges, one list per shard.
+    partition_years: Splits CSV files into byte runs by year, one list per
+        shard.
+"""
+
+import csv
+import io
+import math
+import multiprocessing
+import os
+import threading
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from columnar_store import ColumnarStore
+from dataset_loader import read_header
+from live_index import LiveRowIndex
+from parallel_loader import split_ranges
+
+index_range = __import__('0-simple_helper_function').index_range
+
+PARTITIONS = ("rows", "year")
+YEAR_COLUMN = "Year of Birth"
+
+
+def _row_spans(path: str) -> Iterator[Tuple[int, int, List[str]]]:
+    """
+    Yields the start and end offsets and the fields of every row of a CSV
+    file, header and empty rows excluded. csv.reader pulls the lines of a
+    record (several if quoted fields hold newlines) and no more, so the
+    position of the file after every record is where the next one starts.
+    """
+    with open(path, "rb") as f:
+        reader = csv.reader(map(bytes.decode, f))
+        next(reader, None)
+        start = f.tell()
+        for row in reader:
+            end = f.tell()
+            if row:
+                yield start, end, row
+            start = end
+
+
+def _file_ranges(path: str, count: int) -> List[Tuple[int, int]]:
+    """
+    Cuts the rows of a CSV file into about count byte ranges, even if its
+    quoted fields hold newlines.
+    """
+    ranges = split_ranges(path, count)[1]
+    if ranges is not None:
+        return ranges
+    offsets = array('Q')
+    end = 0
+    for start, end, _ in _row_spans(path):
+        offsets.append(start)
+    offsets.append(end)
+    rows = len(offsets) - 1
+    cuts = sorted({offsets[rows * i // count] for i in range(count)} |
+                  {offsets[-1]})
+    return list(zip(cuts, cuts[1:]))
+
+
+def partition_rows(paths: Sequence[str], shards: int
+                   ) -> List[List[Tuple[str, int, int]]]:
+    """
+    Splits the rows of CSV files into consecutive byte ranges, balanced
+    by size.
+
+    Args:
+        paths (list of str): The CSV files, in order.
+        shards (int): The number of shards.
+
+    Returns:
+        list: For every shard, its (path, start, end) byte ranges.
+    """
+    pieces = [(path, start, end) for path in paths
+              for start, end in _file_ranges(path, shards)]
+    total = sum(end - start for _, start, end in pieces) or 1
+    groups = [[] for _ in range(shards)]
+    done = 0
+    for path, start, end in pieces:
+        # The shard owning the middle of the range gets all of it
+        middle = done + (end - start) // 2
+        groups[min(middle * shards // total, shards - 1)].append(
+            (path, start, end))
+        done += end - start
+    return groups
+
+
+def _year_codes(path: str, col: int, codes: Dict[str, int]
+                ) -> Tuple[array, array]:
+    """
+    Reads the rows of a CSV file once, returning their start offsets,
+    followed by the end of the last row, and the code in codes of the year
+    of every row, adding the years not coded yet. Empty rows are skipped:
+    they fall inside the run of the row before them, and are skipped by
+    the shard parsing it too.
+    """
+    offsets = array('Q')
+    years = array('I')
+    end = 0
+    for start, end, row in _row_spans(path):
+        offsets.append(start)
+        years.append(codes.setdefault(row[col], len(codes)))
+    offsets.append(end)
+    return offsets, years
+
+
+def _year_key(year: str):
+    """ Sorts years numerically, anything else after them """
+    return (0, int(year), "") if year.isdigit() else (1, 0, year)
+
+
+def partition_years(paths: Sequence[str], header: Sequence[str],
+                    shards: int) -> List[List[Tuple[str, int, int]]]:
+    """
+    Splits the rows of CSV files into consecutive ranges of years,
+    balanced by row count, reading every file once.
+
+    Args:
+        paths (list of str): The CSV files.
+        header (list of str): Their column names.
+        shards (int): The number of shards.
+
+    Returns:
+        list: For every shard, the (path, start, end) byte runs of its
+        rows, in the order of the files.
+
+    Raises:
+        ValueError: If the files have no Year of Birth column.
+    """
+    col = list(header).index(YEAR_COLUMN)
+    codes = {}
+    files = [(path, *_year_codes(path, col, codes)) for path in paths]
+    counts = Counter()
+    for _, _, years in files:
+        counts.update(years)
+    total = sum(counts.values()) or 1
+    # Shard owning every year code
+    owners = [0] * len(codes)
+    done = 0
+    for year in sorted(codes, key=_year_key):
+        code = codes[year]
+        middle = done + counts[code] // 2
+        owners[code] = min(middle * shards // total, shards - 1)
+        done += counts[code]
+
+    groups = [[] for _ in range(shards)]
+    for path, offsets, years in files:
+        # Consecutive rows of the same shard make a single run
+        start = 0
+        for i in range(1, len(years) + 1):
+            shard = owners[years[start]]
+            if i < len(years) and owners[years[i]] == shard:
+                continue
+            groups[shard].append((path, offsets[start], offsets[i]))
+            start = i
+    return groups
+
+
+def _parse_runs(path: str, runs: List[Tuple[int, int]],
+                header: Optional[List[str]] = None):
+    """
+    Parses the rows in byte runs of a CSV file, all of them at once, into
+    a ColumnarStore when given the header, a list of lists otherwise.
+    Empty rows are skipped.
+    """
+    with open(path, "rb") as f:
+        parts = []
+        for start, end in runs:
+            f.seek(start)
+            parts.append(f.read(end - start))
+    reader = filter(None, csv.reader(
+        io.StringIO(b"".join(parts).decode(), newline="")))
+    if header is not None:
+        return ColumnarStore.from_rows(header, reader)
+    return list(reader)
+
+
+class _Shard:
+    """The rows owned by a worker process, and their deletions.
+    """
+
+    def __init__(self, dataset):
+        """ Wraps the loaded rows, none of them deleted """
+        self.dataset = dataset
+        self.live = LiveRowIndex(len(dataset))
+
+    def rows(self, start: int, end: int) -> List[List]:
+        """ Rows between two local positions """
+        return self.dataset[start:end]
+
+    def next_live(self, index: int, count: int
+                  ) -> Tuple[List[int], List[List]]:
+        """ Local positions and rows of up to count live rows from index """
+        positions = self.live.next_live(index, count)
+        return positions, [self.dataset[i] for i in positions]
+
+    def delete(self, index: int) -> bool:
+        """ Deletes the row at a local position """
+        return self.live.delete(index)
+
+
+def _load_shard(header: List[str], pieces: List[Tuple[str, int, int]],
+                backend: str):
+    """
+    Loads the rows of a shard from its byte ranges, parsing the ranges of
+    a file together.
+    """
+    columnar = backend == "columnar"
+    dataset = ColumnarStore(header) if columnar else []
+    for path, ranges in groupby(pieces, key=itemgetter(0)):
+        chunk = _parse_runs(path, [(start, end) for _, start, end in ranges],
+                            header if columnar else None)
+        if columnar:
+            dataset.merge(chunk)
+        else:
+            dataset.extend(chunk)
+    return dataset
+
+
+def _serve_shard(conn, header: List[str],
+                 pieces: List[Tuple[str, int, int]], backend: str) -> None:
+    """
+    Main loop of a worker process: loads its shard, reports its size, then
+    answers (method, args) requests until it receives None.
+    """
+    try:
+        shard = _Shard(_load_shard(header, pieces, backend))
+    except Exception as e:
+        conn.send((False, e))
+        return
+    conn.send((True, len(shard.dataset)))
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        method, args = request
+        try:
+            conn.send((True, getattr(shard, method)(*args)))
+        except Exception as e:
+            conn.send((False, e))
+    conn.close()
+
+
+class ShardedServer:
+    """Paginates a dataset split across worker processes.
+    """
+    DATA_FILE = "Popular_Baby_Names.csv"
+
+    def __init__(self, paths: Optional[Sequence[str]] = None,
+                 shards: Optional[int] = None, partition: str = "rows",
+                 backend: str = "list"):
+        """
+        Initializes the server, whose workers start on first use.
+
+        Args:
+            paths (list of str): The CSV files, [DATA_FILE] by default.
+            shards (int): Number of shards (and worker processes), one per
+                CPU by default.
+            partition (str): "rows" to split by byte range, "year" to split
+                by Year of Birth.
+            backend (str): How workers hold their rows, "list" or
+                "columnar" (see dataset_loader).
+
+        Raises:
+            ValueError: If partition, backend or shards are invalid.
+        """
+        if partition not in PARTITIONS:
+            raise ValueError("Unknown partition: {}".format(partition))
+        if backend not in ("list", "columnar"):
+            raise ValueError("Unknown shard backend: {}".format(backend))
+        self.paths = list(paths or (self.DATA_FILE,))
+        self.shards = shards or os.cpu_count() or 1
+        if self.shards < 1:
+            raise ValueError("Shards must be a positive integer")
+        self.partition = partition
+        self.backend = backend
+        # (process, connection, lock) of every shard
+        self.__workers = None
+        # Global position of the first row of every shard, then the total
+        self.__bounds = None
+        self.__lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Partitions the files and starts the workers, which load their
+        shards in parallel. Called by the first request otherwise.
+
+        Raises:
+            ValueError: If the files do not share the same header.
+        """
+        if self.__workers is not None:
+            return
+        with self.__lock:
+            if self.__workers is not None:
+                return
+            header = read_header(self.paths[0])
+            for path in self.paths[1:]:
+                if read_header(path) != header:
+                    raise ValueError(
+                        "Header of {} does not match".format(path))
+            if self.partition == "year":
+                pieces = partition_years(self.paths, header, self.shards)
+            else:
+                pieces = partition_rows(self.paths, self.shards)
+
+            workers = []
+            for shard_pieces in pieces:
+                conn, child = multiprocessing.Pipe()
+                process = multiprocessing.Process(
+                    target=_serve_shard, daemon=True,
+                    args=(child, header, shard_pieces, self.backend))
+                process.start()
+                child.close()
+                workers.append((process, conn, threading.Lock()))
+
+            bounds = array('Q', [0])
+            error = None
+            for _, conn, _ in workers:
+                ok, result = conn.recv()
+                if not ok:
+                    error = error or result
+                    continue
+                bounds.append(bounds[-1] + result)
+            self.__workers = workers
+            if error is not None:
+                self.close()
+                raise error
+            self.__bounds = bounds
+
+    def close(self) -> None:
+        """
+        Stops the worker processes, dropping their shards.
+        """
+        workers, self.__workers = self.__workers, None
+        self.__bounds = None
+        for process, conn, lock in workers or ():
+            with lock:
+                try:
+                    conn.send(None)
+                except (OSError, ValueError):
+                    pass
+                conn.close()
+            process.join()
+
+    def __enter__(self) -> "ShardedServer":
+        """ Starts the workers """
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        """ Stops the workers """
+        self.close()
+
+    def _call(self, calls: List[Tuple[int, str, tuple]]) -> List:
+        """
+        Sends requests to shards, all of them before waiting for any reply.
+
+        Args:
+            calls (list of tuple): (shard, method, args) requests, by
+                increasing shard.
+
+        Returns:
+            list: The results, in the same order.
+        """
+        self.start()
+        workers = self.__workers
+        locks = [workers[shard][2] for shard, _, _ in calls]
+        # Always taken by increasing shard, so requests cannot deadlock
+        for lock in locks:
+            lock.acquire()
+        try:
+            for shard, method, args in calls:
+                workers[shard][1].send((method, args))
+            replies = [workers[shard][1].recv() for shard, _, _ in calls]
+        finally:
+            for lock in locks:
+                lock.release()
+        for ok, result in replies:
+            if not ok:
+                raise result
+        return [result for _, result in replies]
+
+    def bounds(self) -> array:
+        """
+        Global position of the first row of every shard, followed by the
+        number of rows in the dataset.
+        """
+        self.start()
+        return self.__bounds
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        """ The shard holding a global position and its local position """
+        bounds = self.bounds()
+        # Last shard starting at or before index, so never an empty one
+        shard = bisect_right(bounds, index) - 1
+        return shard, index - bounds[shard]
+
+    def get_page(self, page: int = 1, page_size: int = 10) -> List[List]:
+        """
+        Retrieve a specific page of the dataset based on page no and size.
+
+        Args:
+            page (int): The current page number (1-indexed).
+            page_size (int): The number of items per page.
+
+        Returns:
+            list of list: The dataset page, or an empty list if the page
+            is out of range.
+
+        Raises:
+            AssertionError: If page or page_size are not positive integers.
+        """
+        assert isinstance(
+            page, int) and page > 0, "Page must be a positive integer"
+        assert isinstance(
+            page_size, int
+        ) and page_size > 0, "Page size must be a positive integer"
+
+        start, end = index_range(page, page_size)
+        bounds = self.bounds()
+        end = min(end, bounds[-1])
+        if start >= end:
+            return []
+        calls = []
+        shard = self._locate(start)[0]
+        while shard < len(bounds) - 1 and bounds[shard] < end:
+            low, high = bounds[shard], bounds[shard + 1]
+            if high > low:
+                calls.append((shard, "rows", (max(start, low) - low,
+                                              min(end, high) - low)))
+            shard += 1
+        data = []
+        for rows in self._call(calls):
+            data.extend(rows)
+        return data
+
+    def get_hyper(self, page: int = 1, page_size: int = 10) -> Dict:
+        """
+        Retrieve a dictionary with pagination details and data for a
+        specific page.
+
+        Args:
+            page (int): The current page number (1-indexed).
+            page_size (int): The number of items per page.
+
+        Returns:
+            dict: The same keys as the hypermedia Server's get_hyper.
+        """
+        data = self.get_page(page, page_size)
+        total_pages = math.ceil(self.bounds()[-1] / page_size)
+        return {
+            "page_size": len(data),
+            "page": page,
+            "data": data,
+            "next_page": page + 1 if page < total_pages else None,
+            "prev_page": page - 1 if page > 1 else None,
+            "total_pages": total_pages
+        }
+
+    def get_hyper_index(self, index: int = None, page_size: int = 10) -> Dict:
+        """
+        Return a dictionary with pagination information that is resilient
+        to deletions, as the deletion-resilient Server does.
+
+        Args:
+            index (int): The starting index for the page.
+            page_size (int): The number of items per page.
+
+        Returns:
+            dict: index, next_index, page_size and data of the page.
+
+        Raises:
+            AssertionError: If index is out of range.
+        """
+        bounds = self.bounds()
+        total = bounds[-1]
+        assert isinstance(index, int) and 0 <= index < total, \
+            "Index out of range."
+
+        # Collect live rows shard after shard until the page is full
+        positions, data = [], []
+        shard, local = self._locate(index)
+        while len(positions) < page_size and shard < len(bounds) - 1:
+            if bounds[shard + 1] > bounds[shard]:
+                found, rows = self._call([(shard, "next_live", (
+                    local, page_size - len(positions)))])[0]
+                positions.extend(bounds[shard] + i for i in found)
+                data.extend(rows)
+            shard += 1
+            local = 0
+
+        if len(positions) < page_size:
+            next_index = None
+        else:
+            next_index = positions[-1] + 1 if positions[-1] + 1 < total \
+                else None
+        return {
+            "index": index,
+            "next_index": next_index,
+            "page_size": len(data),
+            "data": data,
+        }
+
+    def delete(self, index: int) -> bool:
+        """
+        Delete the row at a given global position.
+
+        Args:
+            index (int): The position of the row in the dataset.
+
+        Returns:
+            bool: True if the row was deleted, False if it already was.
+
+        Raises:
+            AssertionError: If index is out of range.
+        """
+        assert isinstance(index, int) and 0 <= index < self.bounds()[-1], \
+            "Index out of range."
+        shard, local = self._locate(index)
+        return self._call([(shard, "delete", (local,))])[0]
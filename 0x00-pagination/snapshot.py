@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Binary snapshots of a parsed CSV dataset.
+
+A snapshot (`<file>.snap`, next to the CSV file) holds everything a server
+builds out of the CSV file: the columns of the ColumnarStore, the byte
+offset of every row and the positions of the deleted rows as a bitmap.
+Loading it is a handful of `array.frombytes` calls instead of a full
+`csv.reader` pass, so restarted workers are ready almost immediately.
+
+A snapshot is only used while the size, modification time and CRC32 of
+the CSV file are those recorded when it was written; otherwise the CSV file
+is parsed again and the snapshot rewritten.
+
+File layout: magic (8 bytes), manifest length (8 bytes, little endian),
+JSON manifest, then the raw buffers in the order listed by the manifest.
+
+Classes:
+    Snapshot: The content of a snapshot.
+
+Functions:
+    csv_signature: Size, modification time and CRC32 of a CSV file.
+    write_snapshot: Writes the snapshot of a CSV file.
+    read_snapshot: Reads the snapshot of a CSV file if it is up to date.
+    load_or_build: Reads the snapshot of a CSV file, building it if needed.
+"""
+
+import csv
+import io
+import json
+import os
+import struct
+import sys
+import zlib
+from array import array
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from columnar_store import ColumnarStore
+from mmap_store import build_offsets
+from parallel_loader import load_parallel
+
+SNAPSHOT_MAGIC = b"PGSNAP1\0"
+LENGTH = struct.Struct("<Q")
+READ_SIZE = 1 << 20
+
+
+class Snapshot(NamedTuple):
+    """ The content of a snapshot """
+    store: ColumnarStore
+    offsets: array
+    deleted: List[int]
+
+
+def snapshot_path(path: str) -> str:
+    """ Returns where the snapshot of a CSV file is written """
+    return path + ".snap"
+
+
+def csv_signature(path: str) -> Tuple[int, int, int]:
+    """
+    Returns the size, modification time (ns) and CRC32 of a file.
+    """
+    stat = os.stat(path)
+    crc = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(READ_SIZE), b""):
+            crc = zlib.crc32(chunk, crc)
+    return stat.st_size, stat.st_mtime_ns, crc
+
+
+def _deleted_bitmap(deleted: Iterable[int], size: int) -> bytes:
+    """ Packs deleted positions into a bitmap of size bits """
+    bits = bytearray((size + 7) // 8)
+    for i in deleted:
+        bits[i >> 3] |= 1 << (i & 7)
+    return bytes(bits)
+
+
+def _deleted_positions(bits: bytes) -> List[int]:
+    """ Unpacks a bitmap into the positions of its set bits """
+    positions = []
+    for byte_index, byte in enumerate(bits):
+        while byte:
+            low = byte & -byte
+            positions.append(byte_index * 8 + low.bit_length() - 1)
+            byte ^= low
+    return positions
+
+
+def write_snapshot(path: str, store: ColumnarStore, offsets: array,
+                   deleted: Iterable[int] = (),
+                   signature: Optional[Tuple[int, int, int]] = None,
+                   target: Optional[str] = None) -> bool:
+    """
+    Writes the snapshot of a CSV file.
+
+    Args:
+        path (str): Path of the CSV file the store was parsed from.
+        store (ColumnarStore): The parsed rows.
+        offsets (array): The row start offsets (see mmap_store).
+        deleted (iterable of int): Positions of the deleted rows.
+        signature (tuple): csv_signature of the file, computed if omitted.
+        target (str): Path of the snapshot, `<path>.snap` by default.
+
+    Returns:
+        bool: True if the snapshot was written, False if it could not be.
+    """
+    target = target or snapshot_path(path)
+    tmp_path = "{}.{}.tmp".format(target, os.getpid())
+    columns, values = store.buffers()
+    buffers = [column.tobytes() for column in columns]
+    buffers.append(offsets.tobytes())
+    buffers.append(_deleted_bitmap(deleted, len(store)))
+    try:
+        size, mtime, crc = signature or csv_signature(path)
+        manifest = json.dumps({
+            "size": size,
+            "mtime_ns": mtime,
+            "crc32": crc,
+            "byteorder": sys.byteorder,
+            "rows": len(store),
+            "header": store.header,
+            "columns": [
+                {"typecode": column.typecode,
+                 "itemsize": column.itemsize,
+                 "values": column_values}
+                for column, column_values in zip(columns, values)
+            ],
+            "offsets_itemsize": offsets.itemsize,
+            "lengths": [len(buf) for buf in buffers],
+        }).encode()
+        with open(tmp_path, "wb") as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(LENGTH.pack(len(manifest)))
+            f.write(manifest)
+            for buf in buffers:
+                f.write(buf)
+        os.replace(tmp_path, target)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def read_snapshot(path: str, target: Optional[str] = None
+                  ) -> Optional[Snapshot]:
+    """
+    Reads the snapshot of a CSV file.
+
+    Args:
+        path (str): Path of the CSV file.
+        target (str): Path of the snapshot, `<path>.snap` by default.
+
+    Returns:
+        Snapshot: The snapshot, or None if there is none, if it is corrupt
+        or if it does not match the current content of the CSV file.
+    """
+    target = target or snapshot_path(path)
+    try:
+        with open(target, "rb") as f:
+            if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                return None
+            length, = LENGTH.unpack(f.read(LENGTH.size))
+            manifest = json.loads(f.read(length))
+            stat = os.stat(path)
+            if (manifest["size"] != stat.st_size or
+                    manifest["mtime_ns"] != stat.st_mtime_ns or
+                    manifest["byteorder"] != sys.byteorder or
+                    manifest["crc32"] != csv_signature(path)[2]):
+                return None
+            buffers = [f.read(n) for n in manifest["lengths"]]
+            if list(map(len, buffers)) != manifest["lengths"] or f.read(1):
+                return None
+        columns = []
+        for spec, buf in zip(manifest["columns"], buffers):
+            column = array(spec["typecode"])
+            if column.itemsize != spec["itemsize"]:
+                return None
+            column.frombytes(buf)
+            columns.append(column)
+        offsets = array('Q')
+        if offsets.itemsize != manifest["offsets_itemsize"]:
+            return None
+        offsets.frombytes(buffers[-2])
+    except (OSError, ValueError, KeyError, TypeError, struct.error):
+        return None
+    store = ColumnarStore.from_buffers(
+        manifest["header"], columns,
+        [spec["values"] for spec in manifest["columns"]])
+    if len(store) != manifest["rows"]:
+        return None
+    return Snapshot(store, offsets, _deleted_positions(buffers[-1]))
+
+
+def load_or_build(path: str, target: Optional[str] = None,
+                  persist: bool = True, workers: int = 1) -> Snapshot:
+    """
+    Reads the snapshot of a CSV file, or parses the CSV file and writes
+    its snapshot when there is no valid one.
+
+    Args:
+        path (str): Path of the CSV file.
+        target (str): Path of the snapshot, `<path>.snap` by default.
+        persist (bool): Whether to write the snapshot after parsing.
+        workers (int): Number of processes parsing the CSV file.
+
+    Returns:
+        Snapshot: The parsed dataset, with no deleted rows if it was just
+        built.
+    """
+    snapshot = read_snapshot(path, target)
+    if snapshot is not None:
+        return snapshot
+    stat = os.stat(path)
+    with open(path, "rb") as f:
+        raw = f.read()
+    if workers > 1:
+        store = load_parallel(path, workers, columnar=True)
+    else:
+        reader = csv.reader(io.StringIO(raw.decode(), newline=""))
+        store = ColumnarStore.from_rows(next(reader, []), reader)
+    offsets = build_offsets(raw)
+    if persist:
+        signature = (stat.st_size, stat.st_mtime_ns, zlib.crc32(raw))
+        write_snapshot(path, store, offsets, (), signature, target)
+    return Snapshot(store, offsets, [])
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Precomputed sort orders and keyset (cursor) pagination.
+
+A SortIndex holds the permutation of row positions that sorts a dataset
+by a tuple of columns (ties broken by position, so the order is total and
+stable). Pages are fetched by seeking the permutation for the key stored in
+an opaque cursor token with a binary search, so every page costs
+O(log n + page_size) however deep it is, and deleting rows never shifts
+the pages that follow.
+
+Classes:
+    SortIndex: Sort permutation of a dataset with seek-by-key.
+
+Functions:
+    resolve_order: Maps an order_by tuple to column names.
+    encode_cursor: Builds an opaque cursor token.
+    decode_cursor: Reads back an opaque cursor token.
+"""
+
+import base64
+import binascii
+import json
+from array import array
+from itertools import compress
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from columnar_store import NUMERIC_COLUMNS
+
+# Short names accepted in order_by
+COLUMN_ALIASES = {
+    "Year": "Year of Birth",
+    "Name": "Child's First Name",
+}
+
+
+def resolve_order(order_by: Sequence[str]) -> Tuple[str, ...]:
+    """
+    Maps the names of an order_by tuple to column names.
+
+    Args:
+        order_by (tuple of str): Column names or aliases ("Year", "Name").
+
+    Returns:
+        tuple of str: The column names.
+    """
+    return tuple(COLUMN_ALIASES.get(name, name) for name in order_by)
+
+
+def encode_cursor(order_by: Sequence[str], key: Sequence) -> str:
+    """
+    Builds an opaque cursor token for a sort key.
+
+    Args:
+        order_by (tuple of str): The column names of the ordering.
+        key (tuple): The sort key of the last row returned, position last.
+
+    Returns:
+        str: URL safe token.
+    """
+    raw = json.dumps([list(order_by), list(key)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Tuple[str, ...], tuple]:
+    """
+    Reads back a token built by encode_cursor.
+
+    Args:
+        cursor (str): The token.
+
+    Returns:
+        tuple: The column names of the ordering and the sort key.
+
+    Raises:
+        AssertionError: If the token is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        decoded = json.loads(base64.urlsafe_b64decode(padded))
+    except (TypeError, ValueError, binascii.Error):
+        raise AssertionError("Invalid cursor.")
+    assert (isinstance(decoded, list) and len(decoded) == 2 and
+            all(isinstance(part, list) for part in decoded) and
+            all(isinstance(name, str) for name in decoded[0])), \
+        "Invalid cursor."
+    order_by, key = decoded
+    return tuple(order_by), tuple(key)
+
+
+class SortIndex:
+    """Sort permutation of a dataset with seek-by-key.
+    """
+
+    def __init__(self, dataset: Sequence[List], header: Sequence[str],
+                 order_by: Sequence[str]):
+        """
+        Sorts the positions of the dataset by the given columns.
+
+        Args:
+            dataset (list of list): The rows to sort.
+            header (list of str): The column names of the rows.
+            order_by (tuple of str): The columns to sort on.
+
+        Raises:
+            AssertionError: If a column does not exist.
+        """
+        self.order_by = resolve_order(order_by)
+        for name in self.order_by:
+            assert name in header, "Unknown column: {}".format(name)
+        self.__dataset = dataset
+        self.__columns = [list(header).index(name) for name in self.order_by]
+        self.__numeric = [name in NUMERIC_COLUMNS for name in self.order_by]
+        keys = [self._row_key(row) for row in dataset]
+        self.permutation = array(
+            'I', sorted(range(len(keys)), key=keys.__getitem__))
+
+    def extend(self, count: int) -> None:
+        """
+        Inserts the last count rows of the dataset, appended to it since
+        the index was built, at their ranks in the permutation; each costs
+        a seek and a move of the ranks after it.
+
+        Args:
+            count (int): The number of rows appended.
+        """
+        size = len(self.__dataset)
+        for position in range(size - count, size):
+            self.permutation.insert(self.seek(self.key(position)), position)
+
+    def _row_key(self, row: List) -> tuple:
+        """
+        Returns the sort key of a row, position excluded.
+        """
+        return tuple(
+            int(row[col]) if numeric else row[col]
+            for col, numeric in zip(self.__columns, self.__numeric)
+        )
+
+    def key(self, position: int) -> tuple:
+        """
+        Returns the sort key of the row at a position, position included.
+        """
+        return self._row_key(self.__dataset[position]) + (position,)
+
+    def check_key(self, key: Sequence) -> None:
+        """
+        Checks that a key, e.g. read from a cursor, can be compared with
+        the sort keys of the rows.
+
+        Raises:
+            AssertionError: If the key has the wrong length or types.
+        """
+        types = [int if numeric else str for numeric in self.__numeric]
+        types.append(int)
+        assert len(key) == len(types) and all(
+            isinstance(value, kind) and not isinstance(value, bool)
+            for value, kind in zip(key, types)), "Invalid cursor."
+
+    def seek(self, key: Sequence) -> int:
+        """
+        Returns the rank, in the permutation, of the first row sorting
+        strictly after key.
+        """
+        key = tuple(key)
+        low, high = 0, len(self.permutation)
+        while low < high:
+            mid = (low + high) // 2
+            if self.key(self.permutation[mid]) <= key:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def _take(self, rank: int, count: int,
+              live: Optional[Sequence[int]] = None) -> Tuple[List[int], int]:
+        """
+        Returns the positions of up to count live rows from a rank of the
+        permutation on. Deleted rows are filtered a slice at a time, the
+        slice doubling while they make up most of it.
+
+        Args:
+            rank (int): The rank to start from.
+            count (int): The maximum number of positions to return.
+            live (sequence of int): Live flag of every position (see
+                LiveRowIndex.flags), None if all rows are live.
+
+        Returns:
+            tuple: The positions, and the rank following the last of them.
+        """
+        permutation = self.permutation
+        end = len(permutation)
+        if live is None:
+            stop = min(rank + count, end)
+            return permutation[rank:stop].tolist(), stop
+        ranks = []
+        step = count
+        while len(ranks) < count and rank < end:
+            stop = min(rank + step, end)
+            ranks.extend(compress(
+                range(rank, stop),
+                map(live.__getitem__, permutation[rank:stop])))
+            rank = stop
+            step *= 2
+        if len(ranks) >= count > 0:
+            del ranks[count:]
+            rank = ranks[-1] + 1
+        return [permutation[i] for i in ranks], rank
+
+    def after(self, cursor: Optional[str], page_size: int,
+              live: Optional[Sequence[int]] = None) -> Dict:
+        """
+        Returns the page of rows following a cursor.
+
+        Args:
+            cursor (str): Token returned as next_cursor by a previous call,
+                or None for the first page.
+            page_size (int): The number of items per page.
+            live (sequence of int): Live flag of every position (see
+                LiveRowIndex.flags), rows flagged 0 (deleted rows) are
+                skipped. None if all rows are live.
+
+        Returns:
+            dict: A dictionary containing:
+                - cursor: The cursor the page was requested with
+                - next_cursor: Cursor of the next page, None if no live row
+                  follows the page
+                - order_by: The column names of the ordering
+                - page_size: Length of the returned dataset page
+                - data: The dataset page
+
+        Raises:
+            AssertionError: If the cursor is malformed or was issued for
+            another ordering.
+        """
+        rank = 0
+        if cursor is not None:
+            order_by, key = decode_cursor(cursor)
+            assert order_by == self.order_by, "Cursor order mismatch."
+            self.check_key(key)
+            rank = self.seek(key)
+
+        positions, rank = self._take(rank, page_size, live)
+        next_cursor = None
+        if positions and self._take(rank, 1, live)[0]:
+            next_cursor = encode_cursor(
+                self.order_by, self.key(positions[-1]))
+        data = [self.__dataset[i] for i in positions]
+        return {
+            "cursor": cursor,
+            "next_cursor": next_cursor,
+            "order_by": list(self.order_by),
+            "page_size": len(data),
+            "data": data,
+        }
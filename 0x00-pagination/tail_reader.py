@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Incremental reading of rows appended to a CSV file.
+
+A server that parsed the first n rows of a file only needs to know where
+those rows end to pick up the rows appended afterwards: row_end_offset
+finds that byte offset once (by counting newlines, in C), and read_appended
+then parses nothing but the bytes past it.
+
+Only complete, newline terminated rows are read, so a row still being
+written by the appending process is picked up by the next call.
+
+Functions:
+    row_end_offset: Byte offset following the header and the first n rows.
+    read_appended: Parses the complete rows appended past an offset.
+    extend_dataset: Appends to a loaded dataset the rows appended to its file.
+"""
+
+import csv
+import io
+import mmap
+import os
+from typing import List, Optional, Tuple
+
+from mmap_store import MmapStore, next_line
+
+READ_SIZE = 1 << 20
+
+
+def row_end_offset(path: str, rows: int) -> Optional[int]:
+    """
+    Returns the byte offset following the header and the first rows rows.
+
+    Args:
+        path (str): Path of the CSV file.
+        rows (int): The number of rows, header excluded.
+
+    Returns:
+        int: The offset, or None if the file has fewer rows.
+    """
+    with open(path, "rb") as f:
+        if not os.fstat(f.fileno()).st_size:
+            return None if rows else 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            quoted = buf.find(b'"') != -1
+            pos = 0
+            remaining = rows + 1
+            if not quoted:
+                # Skip whole chunks by their newline count
+                size = len(buf)
+                while pos < size:
+                    chunk_end = min(pos + READ_SIZE, size)
+                    count = buf[pos:chunk_end].count(b"\n")
+                    if count >= remaining:
+                        break
+                    remaining -= count
+                    pos = chunk_end
+            for _ in range(remaining):
+                if pos == len(buf):
+                    return None
+                pos = next_line(buf, pos, quoted)
+            return pos
+
+
+def read_appended(path: str, start: int
+                  ) -> Optional[Tuple[List[List[str]], int]]:
+    """
+    Parses the complete rows found past an offset of a CSV file.
+
+    Args:
+        path (str): Path of the CSV file.
+        start (int): Offset where the rows already read end.
+
+    Returns:
+        tuple: The new rows and the offset where they end, or None if the
+        file shrank or no longer ends a row at start (it was rewritten
+        rather than appended to, and has to be loaded again).
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < start:
+            return None
+        if start:
+            f.seek(start - 1)
+            if f.read(1) != b"\n":
+                return None
+        raw = f.read(size - start)
+    end = raw.rfind(b"\n") + 1
+    if not end:
+        return [], start
+    rows = list(csv.reader(io.StringIO(raw[:end].decode(), newline="")))
+    return rows, start + end
+
+
+def extend_dataset(dataset, path: str, tail: Optional[int] = None
+                   ) -> Optional[Tuple[List[List[str]], Optional[int]]]:
+    """
+    Appends to a loaded dataset the rows appended to its CSV file.
+
+    Args:
+        dataset (list of list, ColumnarStore or MmapStore): The rows loaded
+            so far, header excluded.
+        path (str): Path of the CSV file.
+        tail (int): Offset where the loaded rows end, as returned by a
+            previous call; found with row_end_offset when None.
+
+    Returns:
+        tuple: The new rows and the offset to pass to the next call, or
+        None if the file was rewritten and has to be loaded again.
+    """
+    if isinstance(dataset, MmapStore):
+        size = len(dataset)
+        try:
+            dataset.refresh()
+        except ValueError:
+            return None
+        return dataset[size:], None
+    if tail is None:
+        tail = row_end_offset(path, len(dataset))
+    appended = read_appended(path, tail) if tail else None
+    if appended is None:
+        return None
+    rows, tail = appended
+    dataset.extend(rows)
+    return rows, tail
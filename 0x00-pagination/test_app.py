@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests of the HTTP API, skipped when Flask is not installed.
+"""
+
+import csv
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from benchmark import write_dataset
+
+try:
+    import app
+except ImportError:
+    app = None
+
+HyperServer = __import__('2-hypermedia_pagination').Server
+IndexServer = __import__('3-hypermedia_del_pagination').Server
+
+
+@unittest.skipUnless(app, "Flask is not installed")
+class TestApp(unittest.TestCase):
+    """Checks the routes, their ETags and their errors.
+    """
+
+    def setUp(self):
+        """ Servers over a synthetic CSV file, removed after the test """
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.path = os.path.join(self.tmp, "names.csv")
+        write_dataset(self.path, 2500, seed=10)
+        attrs = {"DATA_FILE": self.path}
+        self.hyper = type("Server", (HyperServer,), attrs)(pre_encode=True)
+        self.index = type("Server", (IndexServer,), attrs)()
+        for name, server in (("hyper_server", self.hyper),
+                             ("index_server", self.index)):
+            patcher = mock.patch.object(app, name, server)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.dict(app.signatures, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = app.app.test_client()
+
+    def append(self) -> None:
+        """ Appends a row to the CSV file """
+        with open(self.path, "a", newline="") as f:
+            csv.writer(f, lineterminator="\n").writerow(
+                ["2021", "MALE", "HISPANIC", "NEW", "10", "1"])
+
+    def test_pages(self):
+        """ The routes serve json.dumps of the pages """
+        response = self.client.get("/api/v1/names?page=3&page_size=7")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data,
+                         json.dumps(self.hyper.get_hyper(3, 7)).encode())
+        self.index.delete(6)
+        response = self.client.get(
+            "/api/v1/names/indexed?index=5&page_size=3")
+        self.assertEqual(
+            response.data,
+            json.dumps(self.index.get_hyper_index(5, 3)).encode())
+        self.assertEqual(json.loads(response.data)["next_index"], 9)
+
+    def test_not_modified(self):
+        """ A request listing the ETag of the page gets a 304 """
+        url = "/api/v1/names?page=2"
+        etag = self.client.get(url).headers["ETag"]
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"")
+        other = self.client.get("/api/v1/names?page=3").headers["ETag"]
+        self.assertNotEqual(other, etag)
+        self.assertEqual(self.client.get(
+            url, headers={"If-None-Match": '"stale"'}).status_code, 200)
+
+    def test_etag_follows_dataset(self):
+        """ A refresh finding nothing keeps the ETags, appended rows or
+        deletions change them
+        """
+        url = "/api/v1/names?page=1"
+        etag = self.client.get(url).headers["ETag"]
+        self.assertEqual(self.hyper.refresh(), 0)
+        self.assertEqual(self.client.get(url).headers["ETag"], etag)
+        self.append()
+        self.assertEqual(self.hyper.refresh(), 1)
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+        url = "/api/v1/names/indexed?index=0"
+        etag = self.client.get(url).headers["ETag"]
+        self.index.delete(0)
+        self.assertNotEqual(self.client.get(url).headers["ETag"], etag)
+
+    def test_bad_requests(self):
+        """ Invalid arguments get a 400 """
+        for url in ("/api/v1/names?page=0", "/api/v1/names?page=x",
+                    "/api/v1/names?page_size=-1",
+                    "/api/v1/names/indexed?index=2500",
+                    "/api/v1/names/indexed?index=1.5",
+                    "/api/v1/names/export?format=xml"):
+            self.assertEqual(self.client.get(url).status_code, 400, url)
+
+    def test_export(self):
+        """ Exports hold the whole dataset, in chunks """
+        response = self.client.get("/api/v1/names/export")
+        self.assertEqual(response.mimetype, "text/csv")
+        with open(self.path, "rb") as f:
+            self.assertEqual(response.data, f.read())
+        response = self.client.get("/api/v1/names/export?format=json")
+        self.assertEqual(response.mimetype, "application/json")
+        self.assertEqual(json.loads(response.data), self.hyper.dataset())
+
+
+if __name__ == "__main__":
+    unittest.main()
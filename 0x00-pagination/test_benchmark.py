@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests of the statistics and of the regression check of the benchmark.
+"""
+
+import unittest
+
+from benchmark import compare, median, percentile, summarize
+
+
+class TestStatistics(unittest.TestCase):
+    """Checks the percentiles, medians and summaries.
+    """
+
+    def test_percentile(self):
+        """ Nearest-rank percentiles of sorted samples """
+        samples = list(range(1, 101))
+        self.assertEqual(percentile(samples, 0.5), 50)
+        self.assertEqual(percentile(samples, 0.99), 99)
+        self.assertEqual(percentile(samples, 1.0), 100)
+        self.assertEqual(percentile(samples, 0.0), 1)
+        self.assertEqual(percentile([7], 0.99), 7)
+
+    def test_median(self):
+        """ Medians of odd and even counts, unsorted """
+        self.assertEqual(median([3, 1, 2]), 2)
+        self.assertEqual(median([4, 1, 3, 2]), 2.5)
+
+    def test_summarize(self):
+        """ Measurements are medians over the repeats """
+        runs = [[1000] * 10, [2000] * 10, [4000] * 10]
+        result = summarize("page", runs, count=2, backend="list")
+        self.assertEqual(result["op"], "page")
+        self.assertEqual(result["backend"], "list")
+        self.assertEqual((result["calls"], result["repeats"]), (10, 3))
+        self.assertEqual(result["p50_us"], 2.0)
+        self.assertEqual(result["throughput"], 1e6)
+
+
+class TestCompare(unittest.TestCase):
+    """Checks the detection of regressions.
+    """
+
+    BASE = {"rows": 100, "backend": "list", "op": "page", "phase": "warm",
+            "deletion_density": 0, "throughput": 1000.0, "p50_us": 10.0,
+            "p99_us": 20.0}
+
+    def result(self, **fields) -> dict:
+        """ A result of the same case as BASE """
+        return dict(self.BASE, **fields)
+
+    def test_within_threshold(self):
+        """ Changes within the threshold, or improvements, pass """
+        results = [self.result(throughput=900.0, p50_us=11.0),
+                   self.result(throughput=5000.0, p99_us=1.0)]
+        for result in results:
+            self.assertEqual(compare([result], [self.BASE], 0.2), [])
+
+    def test_regressions(self):
+        """ Every measurement worse than its threshold is listed """
+        slow = self.result(throughput=500.0, p50_us=13.0, p99_us=30.0)
+        self.assertEqual(len(compare([slow], [self.BASE], 0.2)), 3)
+        self.assertEqual(len(compare([slow], [self.BASE], 0.2, 0.6)), 2)
+
+    def test_unmatched(self):
+        """ Results without a baseline are not compared """
+        other = self.result(backend="mmap", throughput=1.0)
+        self.assertEqual(compare([other], [self.BASE], 0.2), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
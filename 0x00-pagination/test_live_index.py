@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests of the Fenwick tree over the live rows.
+"""
+
+import random
+import unittest
+
+from live_index import LiveRowIndex
+
+
+class TestLiveRowIndex(unittest.TestCase):
+    """Checks LiveRowIndex against a plain list of flags.
+    """
+
+    def check(self, index: LiveRowIndex, live: list) -> None:
+        """
+        Compares every query of index with the flags of live.
+        """
+        positions = [i for i, flag in enumerate(live) if flag]
+        self.assertEqual(len(index), len(live))
+        self.assertEqual(index.live_count(), len(positions))
+        self.assertEqual(index.deleted(),
+                         [i for i, flag in enumerate(live) if not flag])
+        self.assertEqual(bytes(index.flags()), bytes(live))
+        for i in range(len(live) + 2):
+            self.assertEqual(index.rank(i), sum(live[:i]))
+            self.assertEqual(index.is_live(i), i < len(live) and live[i])
+        for k in range(len(positions) + 1):
+            expected = positions[k] if k < len(positions) else -1
+            self.assertEqual(index.select(k), expected)
+        self.assertEqual(index.select(-1), -1)
+
+    def test_random_deletions(self):
+        """ Queries stay exact as rows are deleted, sizes of all parities
+        and powers of two included
+        """
+        rnd = random.Random(0)
+        for size in (0, 1, 2, 7, 8, 9, 64, 100):
+            index = LiveRowIndex(size)
+            live = [1] * size
+            self.check(index, live)
+            for i in rnd.sample(range(size), size // 2):
+                self.assertTrue(index.delete(i))
+                live[i] = 0
+                self.check(index, live)
+
+    def test_delete_twice(self):
+        """ Deleting a deleted or missing row changes nothing """
+        index = LiveRowIndex(5)
+        self.assertTrue(index.delete(2))
+        self.assertFalse(index.delete(2))
+        self.assertFalse(index.delete(5))
+        self.assertFalse(index.delete(-1))
+        self.assertEqual(index.delete_many([1, 2, 3, 3, 9]), 2)
+        self.check(index, [1, 0, 0, 0, 1])
+
+    def test_extend(self):
+        """ Appended rows are live, the deletions before them are kept """
+        rnd = random.Random(1)
+        index = LiveRowIndex(3)
+        live = [1] * 3
+        index.delete(1)
+        live[1] = 0
+        for count in (1, 4, 0, 9, 50):
+            index.extend(count)
+            live.extend([1] * count)
+            for i in rnd.sample(range(len(live)), 3):
+                index.delete(i)
+                live[i] = 0
+            self.check(index, live)
+
+    def test_next_live(self):
+        """ next_live returns the first live rows from any position """
+        rnd = random.Random(2)
+        size = 300
+        index = LiveRowIndex(size)
+        live = [1] * size
+        # Runs of deleted rows of every length
+        for start in rnd.sample(range(size), 40):
+            for i in range(start, min(start + rnd.randint(1, 12), size)):
+                index.delete(i)
+                live[i] = 0
+        for start in range(-1, size + 1):
+            for count in (0, 1, 3, 10, 400):
+                expected = [i for i in range(max(start, 0), size)
+                            if live[i]][:count]
+                self.assertEqual(index.next_live(start, count), expected)
+
+    def test_all_deleted(self):
+        """ Nothing is live once every row is deleted """
+        index = LiveRowIndex(10)
+        self.assertEqual(index.delete_many(range(10)), 10)
+        self.assertEqual(index.next_live(0, 5), [])
+        self.assertEqual(index.select(0), -1)
+        self.check(index, [0] * 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,524 @@
+#!/usr/bin/env python3
+"""
+Tests of the hypermedia and deletion-resilient pagination servers.
+"""
+
+import csv
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+from benchmark import write_dataset
+from dataset_loader import BACKENDS
+
+HyperServer = __import__('2-hypermedia_pagination').Server
+IndexServer = __import__('3-hypermedia_del_pagination').Server
+
+NEW_ROW = ["2021", "FEMALE", "HISPANIC", "NEWNAME", "12", "3"]
+
+
+class ServerTestCase(unittest.TestCase):
+    """Base class serving a synthetic dataset from a temporary directory.
+    """
+
+    ROWS = 257
+
+    def setUp(self):
+        """ A synthetic CSV file, removed after the test """
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.path = os.path.join(self.tmp, "names.csv")
+        write_dataset(self.path, self.ROWS, seed=4)
+
+    def server(self, base, **kwargs):
+        """ Returns a base server reading self.path """
+        server_class = type(base.__name__, (base,),
+                            {"DATA_FILE": self.path})
+        server = server_class(**kwargs)
+
+        def close():
+            """ Unmaps the file of the mmap backend """
+            dataset = server._Server__dataset
+            if hasattr(dataset, "close"):
+                dataset.close()
+        self.addCleanup(close)
+        return server
+
+    def rows(self) -> list:
+        """ The rows of self.path, header excluded """
+        with open(self.path, newline="") as f:
+            return list(csv.reader(f))[1:]
+
+    def append(self, *rows) -> None:
+        """ Appends rows to self.path """
+        with open(self.path, "a", newline="") as f:
+            csv.writer(f, lineterminator="\n").writerows(rows)
+
+    def fast_switches(self) -> None:
+        """ Switches threads as often as possible during the test """
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+
+
+def hyper(rows: list, page: int, page_size: int) -> dict:
+    """ get_hyper of a list of rows, computed naively """
+    total_pages = math.ceil(len(rows) / page_size)
+    data = rows[(page - 1) * page_size:page * page_size]
+    return {
+        "page_size": len(data),
+        "page": page,
+        "data": data,
+        "next_page": page + 1 if page < total_pages else None,
+        "prev_page": page - 1 if page > 1 else None,
+        "total_pages": total_pages,
+    }
+
+
+class TestHyperServer(ServerTestCase):
+    """Checks Server (2-hypermedia_pagination) against naive slicing.
+    """
+
+    FILTERS = ({"Gender": "FEMALE"},
+               {"Year": [2012, 2015], "Ethnicity": "HISPANIC"},
+               {"Gender": "MALE", "Year of Birth": "2020"},
+               {"Year": 1999})
+
+    def matching(self, filters: dict) -> list:
+        """ The rows matching filters, computed naively """
+        columns = {"Gender": 1, "Ethnicity": 2, "Year": 0,
+                   "Year of Birth": 0}
+        rows = self.rows()
+        for column, value in filters.items():
+            values = value if isinstance(value, list) else [value]
+            values = {str(v) for v in values}
+            rows = [row for row in rows if row[columns[column]] in values]
+        return rows
+
+    def test_pages(self):
+        """ Every page of every backend matches slicing the file """
+        rows = self.rows()
+        for backend in BACKENDS:
+            server = self.server(HyperServer, backend=backend)
+            for page_size in (1, 10, 256, 300):
+                for page in (1, 2, 26, 27, math.ceil(len(rows) / page_size),
+                             1000):
+                    expected = hyper(rows, page, page_size)
+                    self.assertEqual(
+                        [list(r) for r in server.get_page(page, page_size)],
+                        expected["data"], backend)
+                    found = server.get_hyper(page, page_size)
+                    found["data"] = [list(r) for r in found["data"]]
+                    self.assertEqual(found, expected, backend)
+
+    def test_invalid_arguments(self):
+        """ Pages and page sizes must be positive integers """
+        server = self.server(HyperServer)
+        for page, page_size in ((0, 10), (1, 0), (-1, 10), ("1", 10),
+                                (1, 2.0)):
+            with self.assertRaises(AssertionError):
+                server.get_page(page, page_size)
+            with self.assertRaises(AssertionError):
+                server.get_hyper(page, page_size)
+
+    def test_filters(self):
+        """ Filtered pages only hold and count the matching rows """
+        server = self.server(HyperServer)
+        for filters in self.FILTERS:
+            rows = self.matching(filters)
+            for page in (1, 2, 5, 40):
+                self.assertEqual(server.get_hyper(page, 7, filters),
+                                 hyper(rows, page, 7), filters)
+                self.assertEqual(server.get_page(page, 7, filters),
+                                 hyper(rows, page, 7)["data"])
+
+    def test_encoded(self):
+        """ Encoded pages are byte for byte json.dumps of the pages """
+        for pre_encode in (False, True):
+            server = self.server(HyperServer, pre_encode=pre_encode)
+            for filters in (None,) + self.FILTERS[:2]:
+                for page in (1, 3, 26, 27, 100):
+                    self.assertEqual(
+                        server.get_hyper_encoded(page, 10, filters),
+                        json.dumps(server.get_hyper(page, 10, filters))
+                        .encode())
+                    self.assertEqual(
+                        json.loads(server.get_page_encoded(
+                            page, 10, filters=filters)),
+                        server.get_page(page, 10, filters))
+            csv_page = server.get_page_encoded(2, 5, "csv")
+            self.assertEqual(
+                list(csv.reader(bytes(csv_page).decode().splitlines())),
+                self.rows()[5:10])
+
+    def test_get_pages(self):
+        """ get_pages and iter_pages return what get_hyper returns """
+        server = self.server(HyperServer)
+        pages = [3, 1, 26, 27, 2]
+        self.assertEqual(list(server.get_pages(pages, 10)),
+                         [server.get_hyper(p, 10) for p in pages])
+        filters = self.FILTERS[0]
+        streamed = list(server.iter_pages(9, 2, filters))
+        total_pages = server.get_hyper(1, 9, filters)["total_pages"]
+        self.assertEqual(streamed, [server.get_hyper(p, 9, filters)
+                                    for p in range(2, total_pages + 1)])
+        self.assertEqual(list(server.iter_pages(10, 100)), [])
+
+    def test_search(self):
+        """ Searches match the names case insensitively, ordered by name
+        then by position
+        """
+        server = self.server(HyperServer)
+        rows = self.rows()
+        for term, match in (("name1", "prefix"), ("NAME19", "prefix"),
+                            ("", "prefix"), ("e19", "substring"),
+                            ("me1", "substring"), ("zz", "substring"),
+                            ("a", "substring")):
+            positions = [
+                i for i, row in enumerate(rows)
+                if (row[3].casefold().startswith(term.casefold())
+                    if match == "prefix"
+                    else term.casefold() in row[3].casefold())]
+            positions.sort(key=lambda i: (rows[i][3].casefold(), i))
+            expected = [rows[i] for i in positions]
+            for page in (1, 2, 4):
+                self.assertEqual(server.search(term, page, 8, match),
+                                 hyper(expected, page, 8), (term, match))
+        with self.assertRaises(AssertionError):
+            server.search("a", match="regex")
+
+    def test_aggregate(self):
+        """ Aggregates match grouping the rows naively """
+        server = self.server(HyperServer, backend="columnar")
+        rows = self.rows()
+        groups = {}
+        for row in rows:
+            groups.setdefault((row[0], row[1]), []).append(int(row[4]))
+        expected = [[year, gender, sum(counts)]
+                    for (year, gender), counts in sorted(groups.items())]
+        self.assertEqual(server.aggregate(("Year", "Gender"), 1, 100),
+                         hyper(expected, 1, 100))
+        maxima = server.aggregate(("Year", "Gender"), 1, 100, "Count",
+                                  "max")["data"]
+        self.assertEqual([row[2] for row in maxima],
+                         [max(groups[tuple(row[:2])]) for row in maxima])
+        top = server.aggregate(("Year", "Gender"), 1, 100, top=1,
+                               within=("Year",))["data"]
+        self.assertEqual(
+            top, [max((row for row in expected if row[0] == year),
+                      key=lambda row: (row[2], row[1] == "FEMALE"))
+                  for year in sorted({row[0] for row in expected})])
+
+    def test_refresh(self):
+        """ Appended rows show up in pages, searches and filters """
+        for backend in BACKENDS:
+            write_dataset(self.path, self.ROWS, seed=4)
+            server = self.server(HyperServer, backend=backend,
+                                 page_cache="lru")
+            version = server.version()
+            last = server.get_hyper(26, 10)
+            server.search("new")
+            server.get_hyper(1, 10, {"Year": 2021})
+            self.assertEqual(server.refresh(), 0)
+            self.assertEqual(server.version(), version)
+            self.assertIs(server.get_hyper(26, 10), last)
+
+            self.append(NEW_ROW, NEW_ROW)
+            self.assertEqual(server.refresh(), 2)
+            self.assertEqual(server.version(), version + 2)
+            rows = self.rows()
+            found = server.get_hyper(26, 10)
+            found["data"] = [list(r) for r in found["data"]]
+            self.assertEqual(found, hyper(rows, 26, 10), backend)
+            self.assertEqual(server.search("new")["total_pages"], 1)
+            self.assertEqual(
+                server.get_hyper(1, 10, {"Year": 2021})["page_size"], 2)
+            self.assertEqual(
+                [list(row) for row in server.get_after(
+                    None, 300, ("Name",))["data"]],
+                sorted(rows, key=lambda row: row[3]), backend)
+
+    def test_rewritten(self):
+        """ A rewritten file is loaded again """
+        server = self.server(HyperServer, page_cache="fifo")
+        server.get_hyper(1, 10)
+        write_dataset(self.path, 20, seed=5)
+        self.assertEqual(server.refresh(), -1)
+        self.assertEqual(server.get_hyper(1, 10), hyper(self.rows(), 1, 10))
+
+    def test_sort_indexes_built_at_load(self):
+        """ The orderings of SORT_ORDERS are sorted when the dataset is
+        loaded, others when first used
+        """
+        server = self.server(HyperServer)
+        server.dataset()
+        indexes = server._Server__sort_indexes
+        self.assertEqual(len(indexes), len(HyperServer.SORT_ORDERS))
+        server.get_after(order_by=("Rank",))
+        self.assertEqual(len(server._Server__sort_indexes), len(indexes) + 1)
+        self.assertIs(server.sort_index(), server.sort_index(("Year", "Rank")))
+
+    def test_concurrent_refresh(self):
+        """ Readers racing a refresh appending rows see consistent pages """
+        self.fast_switches()
+        server = self.server(HyperServer)
+        server.dataset()
+        done = threading.Event()
+
+        def read():
+            """ Collects the last pages while rows are appended """
+            while not done.is_set():
+                pages.append(server.get_hyper(26, 10))
+
+        pages = []
+        readers = [threading.Thread(target=read) for _ in range(3)]
+        for reader in readers:
+            reader.start()
+        for _ in range(20):
+            self.append(NEW_ROW)
+            server.refresh()
+        done.set()
+        for reader in readers:
+            reader.join()
+        rows = self.rows()
+        for page in pages:
+            # A short page is the last one, of a dataset ending with it
+            size = page["page_size"]
+            self.assertEqual(page["data"], rows[250:250 + size])
+            if size < 10:
+                self.assertEqual(page["total_pages"], 26)
+                self.assertIsNone(page["next_page"])
+        self.assertEqual(server.get_hyper(1, 1)["total_pages"],
+                         self.ROWS + 20)
+
+
+class TestIndexServer(ServerTestCase):
+    """Checks Server (3-hypermedia_del_pagination) against naive
+    filtering of the deleted rows.
+    """
+
+    def expected(self, rows: list, deleted: set, index: int,
+                 page_size: int) -> dict:
+        """ get_hyper_index computed naively """
+        positions = [i for i in range(index, len(rows))
+                     if i not in deleted][:page_size]
+        if len(positions) < page_size:
+            next_index = None
+        else:
+            next_index = positions[-1] + 1
+            if next_index >= len(rows):
+                next_index = None
+        return {"index": index, "next_index": next_index,
+                "page_size": len(positions),
+                "data": [rows[i] for i in positions]}
+
+    def test_pages_with_deletions(self):
+        """ Pages skip deleted rows and never shift """
+        rows = self.rows()
+        rnd = random.Random(5)
+        for backend in BACKENDS:
+            server = self.server(IndexServer, backend=backend)
+            deleted = set(rnd.sample(range(len(rows)), 60))
+            deleted.update(range(100, 130))
+            self.assertEqual(server.delete_many(sorted(deleted)),
+                             len(deleted))
+            for index in (0, 1, 99, 100, 129, 200, 250, 256):
+                for page_size in (1, 10, 300):
+                    found = server.get_hyper_index(index, page_size)
+                    found["data"] = [list(r) for r in found["data"]]
+                    self.assertEqual(
+                        found, self.expected(rows, deleted, index,
+                                             page_size), backend)
+                    self.assertEqual(
+                        server.get_hyper_index_encoded(index, page_size),
+                        json.dumps(server.get_hyper_index(
+                            index, page_size)).encode())
+            streamed = [list(row) for page in server.iter_pages(7)
+                        for row in page["data"]]
+            self.assertEqual(streamed, [row for i, row in enumerate(rows)
+                                        if i not in deleted])
+
+    def test_out_of_range(self):
+        """ Indexes outside the dataset raise AssertionError """
+        server = self.server(IndexServer)
+        for index in (-1, self.ROWS):
+            with self.assertRaises(AssertionError):
+                server.get_hyper_index(index, 10)
+            with self.assertRaises(AssertionError):
+                server.delete(index)
+
+    def test_version(self):
+        """ The version only changes when rows are deleted or added """
+        server = self.server(IndexServer)
+        server.dataset()
+        version = server.version()
+        self.assertTrue(server.delete(3))
+        self.assertEqual(server.version(), version + 2)
+        self.assertFalse(server.delete(3))
+        self.assertEqual(server.delete_many([]), 0)
+        self.assertEqual(server.refresh(), 0)
+        self.assertEqual(server.version(), version + 2)
+        self.append(NEW_ROW)
+        self.assertEqual(server.refresh(), 1)
+        self.assertEqual(server.version(), version + 4)
+        self.assertEqual(server.indexed_dataset()[self.ROWS], NEW_ROW)
+        self.assertNotIn(3, server.indexed_dataset())
+
+    def test_snapshot_keeps_deletions(self):
+        """ Deletions saved with the snapshot survive a restart """
+        server = self.server(IndexServer, snapshot=True)
+        server.delete_many([0, 5, 6, 256])
+        self.assertTrue(server.save_snapshot())
+        restarted = self.server(IndexServer, snapshot=True)
+        self.assertEqual(restarted.live_rows().deleted(), [0, 5, 6, 256])
+        self.assertEqual(restarted.get_hyper_index(0, 5),
+                         server.get_hyper_index(0, 5))
+        self.append(NEW_ROW)
+        self.assertEqual(
+            self.server(IndexServer, snapshot=True).live_rows().deleted(),
+            [])
+
+    def test_get_after(self):
+        """ Sorted pages skip deleted rows """
+        server = self.server(IndexServer)
+        rows = self.rows()
+        server.dataset()
+        self.assertEqual(len(server._Server__sort_indexes),
+                         len(IndexServer.SORT_ORDERS))
+        server.delete_many(range(0, len(rows), 2))
+        data = []
+        cursor = None
+        while True:
+            page = server.get_after(cursor, 10, ("Count",))
+            data.extend(page["data"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        positions = sorted(range(1, len(rows), 2),
+                           key=lambda i: (int(rows[i][4]), i))
+        self.assertEqual(data, [rows[i] for i in positions])
+
+
+class TestSeqlock(ServerTestCase):
+    """Checks that reads racing a writer are retried.
+    """
+
+    def test_retried_after_write(self):
+        """ A read during which a row is deleted runs again """
+        server = self.server(IndexServer)
+        calls = []
+
+        def build():
+            """ Deletes a row on the first call """
+            calls.append(server.version())
+            if len(calls) == 1:
+                server.delete(0)
+            return len(calls)
+
+        self.assertEqual(server._read(build), 2)
+        self.assertEqual(calls[1], calls[0] + 2)
+
+    def test_retried_after_refresh(self):
+        """ A read during which rows are appended runs again """
+        server = self.server(HyperServer)
+        server.dataset()
+        calls = []
+
+        def build():
+            """ Refreshes appended rows on the first call """
+            calls.append(len(server.dataset()))
+            if len(calls) == 1:
+                self.append(NEW_ROW)
+                server.refresh()
+            return calls[-1]
+
+        self.assertEqual(server._read(build), self.ROWS + 1)
+        self.assertEqual(len(calls), 2)
+
+    def test_torn_read_retried(self):
+        """ An IndexError or ValueError raised while the version changed
+        is a torn read, retried
+        """
+        for base in (HyperServer, IndexServer):
+            for error in (IndexError, ValueError):
+                server = self.server(base)
+                calls = []
+
+                def build():
+                    """ Writes then fails on the first call """
+                    calls.append(None)
+                    if len(calls) == 1:
+                        with server._writing():
+                            pass
+                        raise error("torn")
+                    return "ok"
+
+                self.assertEqual(server._read(build), "ok")
+                self.assertEqual(len(calls), 2)
+
+    def test_error_propagates(self):
+        """ An error raised while nothing changed propagates """
+        for base in (HyperServer, IndexServer):
+            server = self.server(base)
+            calls = []
+
+            def build():
+                """ Always fails """
+                calls.append(None)
+                raise IndexError("bug")
+
+            with self.assertRaises(IndexError):
+                server._read(build)
+            self.assertEqual(len(calls), 1)
+            with self.assertRaises(KeyError):
+                server._read(lambda: {}["missing"])
+
+    def test_unchanged_write_keeps_version(self):
+        """ A writer that changed nothing restores the version """
+        server = self.server(IndexServer)
+        version = server.version()
+        with server._writing() as changed:
+            self.assertEqual(server.version() % 2, 1)
+            changed[0] = False
+        self.assertEqual(server.version(), version)
+
+    def test_concurrent_deletes(self):
+        """ Readers racing a deleter only ever see live rows, in order """
+        self.fast_switches()
+        rows = self.rows()
+        server = self.server(IndexServer)
+        server.dataset()
+        errors = []
+        done = threading.Event()
+
+        def read():
+            """ Checks each page against the rows it holds """
+            while not done.is_set():
+                for page in server.iter_pages(16):
+                    positions = [rows.index(row) for row in page["data"]]
+                    if positions != sorted(positions):
+                        errors.append(page)
+                server.get_after(None, 10)
+
+        readers = [threading.Thread(target=read) for _ in range(3)]
+        for reader in readers:
+            reader.start()
+        order = list(range(len(rows)))
+        random.Random(6).shuffle(order)
+        for index in order[:200]:
+            server.delete(index)
+        done.set()
+        for reader in readers:
+            reader.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(server.live_rows().live_count(), len(rows) - 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Tests of the partitioned pagination server.
+"""
+
+import csv
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from benchmark import HEADER, write_dataset
+from sharded_server import ShardedServer, partition_rows, partition_years
+
+IndexServer = __import__('3-hypermedia_del_pagination').Server
+
+
+class TestShardedServer(unittest.TestCase):
+    """Checks ShardedServer against the single process Server.
+    """
+
+    def setUp(self):
+        """ Two synthetic CSV files, removed after the test """
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.paths = [os.path.join(self.tmp, name)
+                      for name in ("a.csv", "b.csv")]
+        write_dataset(self.paths[0], 300, seed=7)
+        write_dataset(self.paths[1], 123, seed=8)
+
+    def rows(self) -> list:
+        """ The rows of every file, in order, headers excluded """
+        rows = []
+        for path in self.paths:
+            with open(path, newline="") as f:
+                rows.extend(list(csv.reader(f))[1:])
+        return rows
+
+    def sharded(self, **kwargs) -> ShardedServer:
+        """ Returns a started server over self.paths, closed after """
+        server = ShardedServer(self.paths, **kwargs)
+        self.addCleanup(server.close)
+        server.start()
+        return server
+
+    def test_rows_partition(self):
+        """ Pages follow the order of the files, across shard bounds """
+        rows = self.rows()
+        for backend in ("list", "columnar"):
+            server = self.sharded(shards=3, backend=backend)
+            bounds = list(server.bounds())
+            self.assertEqual(bounds[0], 0)
+            self.assertEqual(bounds[-1], len(rows))
+            self.assertEqual(server.get_page(1, 1000), rows)
+            for page_size in (1, 7, 50):
+                for page in (1, 2, 43, 60, 61, 1000):
+                    start = (page - 1) * page_size
+                    found = server.get_hyper(page, page_size)
+                    self.assertEqual(found["data"],
+                                     rows[start:start + page_size])
+                    self.assertEqual(found["page_size"],
+                                     len(found["data"]))
+
+    def test_year_partition(self):
+        """ Shards hold consecutive years, rows in file order within
+        each shard
+        """
+        rows = self.rows()
+        server = self.sharded(shards=3, partition="year")
+        bounds = list(server.bounds())
+        found = server.get_page(1, 1000)
+        shards = [found[start:end] for start, end in zip(bounds, bounds[1:])]
+        years = [sorted({int(row[0]) for row in shard}) for shard in shards]
+        for low, high in zip(years, years[1:]):
+            if low and high:
+                self.assertLess(low[-1], high[0])
+        owner = {str(year): i for i, shard in enumerate(years)
+                 for year in shard}
+        self.assertEqual(found,
+                         sorted(rows, key=lambda row: owner[row[0]]))
+
+    def test_partitions_cover_rows(self):
+        """ Every row belongs to exactly one byte run """
+        for shards in (1, 2, 5):
+            for groups in (partition_rows(self.paths, shards),
+                           partition_years(self.paths, HEADER, shards)):
+                self.assertEqual(len(groups), shards)
+                for path in self.paths:
+                    runs = sorted((start, end) for group in groups
+                                  for p, start, end in group if p == path)
+                    with open(path, "rb") as f:
+                        header = len(f.readline())
+                        size = header + len(f.read())
+                    covered = header
+                    for start, end in runs:
+                        self.assertEqual(start, covered)
+                        covered = end
+                    self.assertEqual(covered, size)
+
+    def test_blank_and_quoted_lines(self):
+        """ Blank lines are skipped and quoted newlines kept, under both
+        partitions
+        """
+        rows = [["2015", "FEMALE", "HISPANIC", "A\nB", "10", "1"],
+                ["2016", "MALE", "ASIAN", 'Q"uote, d', "11", "2"],
+                ["2017", "FEMALE", "BLACK", "C", "12", "3"]]
+        with open(self.paths[1], "w", newline="") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(HEADER)
+            writer.writerow(rows[0])
+            f.write("\n")
+            writer.writerows(rows[1:])
+            f.write("\n\n")
+        expected = self.rows()[:300] + rows
+        for partition in ("rows", "year"):
+            server = self.sharded(shards=2, partition=partition)
+            found = server.get_page(1, 1000)
+            self.assertEqual(server.bounds()[-1], len(expected))
+            self.assertEqual(sorted(found), sorted(expected), partition)
+            if partition == "rows":
+                self.assertEqual(found, expected)
+
+    def test_deletions(self):
+        """ Deletions are resilient exactly like the single process
+        Server
+        """
+        merged = os.path.join(self.tmp, "merged.csv")
+        with open(merged, "w", newline="") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(HEADER)
+            writer.writerows(self.rows())
+        single = type("Server", (IndexServer,), {"DATA_FILE": merged})()
+        server = self.sharded(shards=4)
+        for index in random.Random(9).sample(range(423), 150) + [0, 0]:
+            self.assertEqual(server.delete(index), single.delete(index))
+        index = 0
+        while index is not None:
+            page = server.get_hyper_index(index, 13)
+            self.assertEqual(page, single.get_hyper_index(index, 13))
+            index = page["next_index"]
+        with self.assertRaises(AssertionError):
+            server.delete(423)
+
+    def test_invalid(self):
+        """ Invalid settings raise ValueError """
+        for kwargs in ({"partition": "name"}, {"backend": "mmap"},
+                       {"shards": -1}):
+            with self.assertRaises(ValueError):
+                ShardedServer(self.paths, **kwargs)
+        with open(self.paths[1], "w") as f:
+            f.write("other,header\n1,2\n")
+        with self.assertRaises(ValueError):
+            ShardedServer(self.paths, shards=2).start()
+
+
+if __name__ == "__main__":
+    unittest.main()
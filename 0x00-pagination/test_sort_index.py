@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Tests of the sort permutations and of the cursor tokens.
+"""
+
+import base64
+import json
+import random
+import unittest
+
+from live_index import LiveRowIndex
+from sort_index import (SortIndex, decode_cursor, encode_cursor,
+                        resolve_order)
+
+HEADER = ["Year of Birth", "Gender", "Ethnicity", "Child's First Name",
+          "Count", "Rank"]
+
+
+def make_rows(count: int, seed: int = 0) -> list:
+    """
+    Returns count rows with many ties, numbers stored as text.
+    """
+    rnd = random.Random(seed)
+    return [[str(rnd.randint(2011, 2013)), rnd.choice(["FEMALE", "MALE"]),
+             "HISPANIC", rnd.choice(["Ava", "Liam", "Zoe", "Emma"]),
+             str(rnd.randint(8, 12)), str(rnd.randint(1, 100))]
+            for _ in range(count)]
+
+
+def walk(index: SortIndex, page_size: int, live=None) -> list:
+    """
+    Returns the rows of every page from the first one on, checking
+    that only the last page is short.
+    """
+    pages = []
+    cursor = None
+    while True:
+        page = index.after(cursor, page_size, live)
+        pages.append(page)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    for page in pages[:-1]:
+        assert page["page_size"] == page_size
+    return [row for page in pages for row in page["data"]]
+
+
+class TestCursor(unittest.TestCase):
+    """Checks the cursor tokens.
+    """
+
+    def test_round_trip(self):
+        """ A token decodes to the ordering and key it was built from """
+        for order_by, key in ((("Year of Birth", "Rank"), (2011, 5, 42)),
+                              (("Child's First Name",), ("Zoë é/+", 0)),
+                              ((), (7,))):
+            token = encode_cursor(order_by, key)
+            self.assertNotIn("=", token)
+            self.assertEqual(decode_cursor(token), (order_by, key))
+
+    def test_invalid(self):
+        """ Malformed tokens raise AssertionError """
+        def token(value):
+            """ Encodes any JSON value like a cursor """
+            raw = json.dumps(value).encode()
+            return base64.urlsafe_b64encode(raw).decode()
+
+        for bad in ("", "!!!", "abc", token({"a": 1}), token([["a"]]),
+                    token([["a"], 1]), token([[1], [1]]),
+                    token([["a"], [1], [2]])):
+            with self.assertRaises(AssertionError):
+                decode_cursor(bad)
+
+    def test_resolve_order(self):
+        """ Aliases are replaced by column names """
+        self.assertEqual(resolve_order(("Year", "Name", "Count")),
+                         ("Year of Birth", "Child's First Name", "Count"))
+
+
+class TestSortIndex(unittest.TestCase):
+    """Checks SortIndex against sorted().
+    """
+
+    def setUp(self):
+        """ A dataset of 200 rows """
+        self.rows = make_rows(200)
+
+    def expected(self, order_by, live=None) -> list:
+        """ The rows sorted as a SortIndex should, ties by position """
+        columns = [HEADER.index(name) for name in resolve_order(order_by)]
+        numeric = [HEADER[col] in ("Year of Birth", "Count", "Rank")
+                   for col in columns]
+
+        def key(position):
+            """ Typed sort key of a position """
+            row = self.rows[position]
+            return tuple(int(row[col]) if number else row[col]
+                         for col, number in zip(columns, numeric))
+        positions = sorted(range(len(self.rows)),
+                           key=lambda i: (key(i), i))
+        if live is not None:
+            positions = [i for i in positions if live[i]]
+        return [self.rows[i] for i in positions]
+
+    def test_walk(self):
+        """ Following next_cursor visits every row once, in order """
+        for order_by in (("Year", "Rank"), ("Name",), ("Count",),
+                         ("Gender", "Name", "Count")):
+            index = SortIndex(self.rows, HEADER, order_by)
+            for page_size in (1, 7, 200, 500):
+                self.assertEqual(walk(index, page_size),
+                                 self.expected(order_by))
+
+    def test_first_page(self):
+        """ The first page echoes its arguments """
+        index = SortIndex(self.rows, HEADER, ("Name",))
+        page = index.after(None, 3)
+        self.assertIsNone(page["cursor"])
+        self.assertEqual(page["order_by"], ["Child's First Name"])
+        self.assertEqual(page["data"], self.expected(("Name",))[:3])
+
+    def test_unknown_column(self):
+        """ Sorting on a missing column raises AssertionError """
+        with self.assertRaises(AssertionError):
+            SortIndex(self.rows, HEADER, ("Nope",))
+
+    def test_foreign_cursor(self):
+        """ A cursor of another ordering or with a key of the wrong shape
+        is rejected
+        """
+        by_name = SortIndex(self.rows, HEADER, ("Name",))
+        by_count = SortIndex(self.rows, HEADER, ("Count",))
+        cursor = by_name.after(None, 5)["next_cursor"]
+        with self.assertRaises(AssertionError):
+            by_count.after(cursor, 5)
+        order_by = by_count.order_by
+        for key in (("10", 3), (10,), (10, 3, 4), (True, 3), (10, 1.5)):
+            with self.assertRaises(AssertionError):
+                by_count.after(encode_cursor(order_by, key), 5)
+
+    def test_deleted_rows_skipped(self):
+        """ Deleted rows are skipped, however many in a row """
+        live = LiveRowIndex(len(self.rows))
+        flags = [1] * len(self.rows)
+        index = SortIndex(self.rows, HEADER, ("Year", "Rank"))
+        order = list(index.permutation)
+        # A long run of deleted rows in the middle of the order
+        deleted = order[20:150] + random.Random(3).sample(order, 20)
+        for position in deleted:
+            live.delete(position)
+            flags[position] = 0
+        for page_size in (1, 4, 30):
+            self.assertEqual(walk(index, page_size, live.flags()),
+                             self.expected(("Year", "Rank"), flags))
+
+    def test_no_cursor_past_last_live_row(self):
+        """ next_cursor is None when every row after the page is deleted,
+        and set while one is live
+        """
+        live = LiveRowIndex(len(self.rows))
+        index = SortIndex(self.rows, HEADER, ("Name",))
+        order = list(index.permutation)
+        live.delete_many(order[10:])
+        page = index.after(None, 10, live.flags())
+        self.assertEqual(len(page["data"]), 10)
+        self.assertIsNone(page["next_cursor"])
+        live = LiveRowIndex(len(self.rows))
+        live.delete_many(order[10:-1])
+        page = index.after(None, 10, live.flags())
+        self.assertIsNotNone(page["next_cursor"])
+        last = index.after(page["next_cursor"], 10, live.flags())
+        self.assertEqual(last["data"], [self.rows[order[-1]]])
+        self.assertIsNone(last["next_cursor"])
+
+    def test_pages_do_not_shift(self):
+        """ Deleting rows of a page already served does not shift the
+        next one
+        """
+        live = LiveRowIndex(len(self.rows))
+        index = SortIndex(self.rows, HEADER, ("Count",))
+        first = index.after(None, 10, live.flags())
+        expected = index.after(first["next_cursor"], 10, live.flags())
+        live.delete_many(index.permutation[:10])
+        self.assertEqual(index.after(first["next_cursor"], 10,
+                                     live.flags()), expected)
+
+    def test_extend(self):
+        """ Rows appended to the dataset are inserted at their rank """
+        index = SortIndex(self.rows, HEADER, ("Name", "Count"))
+        for count in (1, 5, 40):
+            self.rows.extend(make_rows(count, seed=count))
+            index.extend(count)
+            fresh = SortIndex(self.rows, HEADER, ("Name", "Count"))
+            self.assertEqual(index.permutation, fresh.permutation)
+        self.assertEqual(walk(index, 9), self.expected(("Name", "Count")))
+
+
+if __name__ == "__main__":
+    unittest.main()
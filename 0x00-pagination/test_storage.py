@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Tests of the dataset backends, the offset index, the snapshots, the
+incremental reads and the encoded rows.
+"""
+
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmark import write_dataset
+from dataset_loader import BACKENDS, load_dataset, read_header
+from encoded_rows import EncodedRows, encode_rows, json_array, splice_json
+from mmap_store import MmapStore, load_offsets
+from parallel_loader import parse_range, split_ranges
+from snapshot import (csv_signature, load_or_build, read_snapshot,
+                      snapshot_path, write_snapshot)
+from tail_reader import extend_dataset, row_end_offset
+
+QUOTED_ROWS = [["2016", "FEMALE", "HISPANIC", "Ann, Marie", "10", "1"],
+               ["2017", "MALE", "BLACK", 'Say "hi"', "11", "2"],
+               ["2018", "FEMALE", "ASIAN", "Two\nlines", "12", "3"],
+               ["2019", "MALE", "WHITE", "", "13", "4"]]
+
+
+class FileTestCase(unittest.TestCase):
+    """Base class writing its CSV files in a temporary directory.
+    """
+
+    def setUp(self):
+        """ A temporary directory, removed after the test """
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.path = os.path.join(self.tmp, "data.csv")
+
+    def write(self, rows: list, header: list = None) -> list:
+        """
+        Writes the header and rows into self.path, returning the rows.
+        """
+        with open(self.path, "w", newline="") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(header or ["a", "b", "c", "d", "e", "f"])
+            writer.writerows(rows)
+        return rows
+
+    def append(self, raw: str) -> None:
+        """ Appends raw text to self.path """
+        with open(self.path, "a", newline="") as f:
+            f.write(raw)
+
+    def expected(self) -> list:
+        """ The rows of self.path as csv.reader parses them """
+        with open(self.path, newline="") as f:
+            return list(csv.reader(f))[1:]
+
+
+class TestBackends(FileTestCase):
+    """Checks that every backend loads the same rows.
+    """
+
+    def check_backends(self) -> None:
+        """ Loads self.path with every backend and compares the rows """
+        expected = self.expected()
+        for backend in BACKENDS:
+            dataset = load_dataset(self.path, backend)
+            self.assertEqual(len(dataset), len(expected), backend)
+            self.assertEqual([list(row) for row in dataset], expected,
+                             backend)
+            self.assertEqual(list(dataset[1:3]), expected[1:3], backend)
+            if isinstance(dataset, MmapStore):
+                dataset.close()
+
+    def test_plain(self):
+        """ A synthetic file loads the same with every backend """
+        write_dataset(self.path, 300, seed=1)
+        self.check_backends()
+        self.assertEqual(read_header(self.path)[0], "Year of Birth")
+
+    def test_quoted(self):
+        """ Quoted fields with commas, quotes and newlines are kept """
+        self.write(QUOTED_ROWS)
+        self.check_backends()
+        self.assertEqual(self.expected(), QUOTED_ROWS)
+
+    def test_empty(self):
+        """ A file with only a header has no rows """
+        self.write([])
+        for backend in BACKENDS:
+            self.assertEqual(len(load_dataset(self.path, backend)), 0)
+
+    def test_unknown_backend(self):
+        """ An unknown backend raises ValueError """
+        self.write([])
+        with self.assertRaises(ValueError):
+            load_dataset(self.path, "nope")
+        with self.assertRaises(ValueError):
+            load_dataset(self.path, "mmap", snapshot=True)
+
+    def test_parallel_ranges(self):
+        """ The byte ranges cover every row once, each parsed alone """
+        write_dataset(self.path, 500, seed=2)
+        header_line, ranges = split_ranges(self.path, 7)
+        self.assertEqual(header_line.decode().rstrip("\n").split(","),
+                         read_header(self.path))
+        self.assertEqual(ranges[-1][1], os.path.getsize(self.path))
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+        rows = [row for start, end in ranges
+                for row in parse_range(self.path, start, end)]
+        self.assertEqual(rows, self.expected())
+        store = parse_range(self.path, *ranges[0], read_header(self.path))
+        self.assertEqual(list(store), parse_range(self.path, *ranges[0]))
+
+    def test_parallel_ranges_quoted(self):
+        """ Quoted files are not split """
+        self.write(QUOTED_ROWS)
+        self.assertIsNone(split_ranges(self.path, 4)[1])
+
+
+class TestOffsetIndex(FileTestCase):
+    """Checks the persisted offset index of the mmap backend.
+    """
+
+    def test_persisted(self):
+        """ The index is written once and reused while the file is
+        unchanged
+        """
+        write_dataset(self.path, 100)
+        store = MmapStore(self.path)
+        offsets = load_offsets(self.path)
+        self.assertIsNotNone(offsets)
+        self.assertEqual(offsets, store.offsets)
+        self.assertEqual(offsets[-1], os.path.getsize(self.path))
+        store.close()
+
+    def test_stale(self):
+        """ The index is ignored once the file changes """
+        write_dataset(self.path, 100)
+        MmapStore(self.path).close()
+        self.append("2020,MALE,HISPANIC,NEW,1,1\n")
+        self.assertIsNone(load_offsets(self.path))
+        store = MmapStore(self.path)
+        self.assertEqual(list(store[-1]),
+                         ["2020", "MALE", "HISPANIC", "NEW", "1", "1"])
+        store.close()
+
+    def test_refresh(self):
+        """ Appended complete rows are mapped, a partial one is not, and a
+        rewritten file raises ValueError
+        """
+        rows = self.write(QUOTED_ROWS[:2])
+        store = MmapStore(self.path, persist=False)
+        self.addCleanup(store.close)
+        self.append('2020,MALE,X,"a\nb",1,1\n2021,FEMALE,Y,c')
+        self.assertEqual(store.refresh(), 1)
+        self.append(",2,2\n")
+        self.assertEqual(store.refresh(), 1)
+        self.assertEqual([list(row) for row in store], rows + [
+            ["2020", "MALE", "X", "a\nb", "1", "1"],
+            ["2021", "FEMALE", "Y", "c", "2", "2"]])
+        self.assertEqual(store.refresh(), 0)
+        self.write(QUOTED_ROWS[:1])
+        with self.assertRaises(ValueError):
+            store.refresh()
+
+
+class TestSnapshot(FileTestCase):
+    """Checks that snapshots are used only while the file is unchanged.
+    """
+
+    def setUp(self):
+        """ A synthetic file and its snapshot """
+        super().setUp()
+        write_dataset(self.path, 200, seed=3)
+        self.built = load_or_build(self.path)
+
+    def test_round_trip(self):
+        """ The snapshot holds the rows, offsets and deleted rows """
+        self.assertTrue(os.path.exists(snapshot_path(self.path)))
+        snapshot = read_snapshot(self.path)
+        self.assertIsNotNone(snapshot)
+        self.assertEqual(list(snapshot.store), self.expected())
+        self.assertEqual(snapshot.offsets, self.built.offsets)
+        self.assertEqual(snapshot.deleted, [])
+        deleted = [0, 7, 8, 9, 63, 64, 199]
+        self.assertTrue(write_snapshot(
+            self.path, snapshot.store, snapshot.offsets, deleted))
+        self.assertEqual(load_or_build(self.path).deleted, deleted)
+
+    def test_content_change(self):
+        """ A change keeping the size and the modification time is caught
+        by the CRC32
+        """
+        stat = os.stat(self.path)
+        with open(self.path, "r+b") as f:
+            f.seek(stat.st_size - 2)
+            digit = f.read(1)
+            f.seek(-1, os.SEEK_CUR)
+            f.write(b"1" if digit != b"1" else b"2")
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        signature = csv_signature(self.path)
+        self.assertEqual(signature[:2], (stat.st_size, stat.st_mtime_ns))
+        self.assertIsNone(read_snapshot(self.path))
+        rebuilt = load_or_build(self.path)
+        self.assertEqual(list(rebuilt.store), self.expected())
+        self.assertIsNotNone(read_snapshot(self.path))
+
+    def test_append(self):
+        """ An appended row invalidates the snapshot """
+        self.append("2020,MALE,HISPANIC,NEW,1,1\n")
+        self.assertIsNone(read_snapshot(self.path))
+        self.assertEqual(list(load_or_build(self.path).store)[-1],
+                         ["2020", "MALE", "HISPANIC", "NEW", "1", "1"])
+
+    def test_corrupt(self):
+        """ A truncated or garbled snapshot is ignored """
+        target = snapshot_path(self.path)
+        with open(target, "rb") as f:
+            raw = f.read()
+        for broken in (b"", raw[:5], raw[:20], raw[:len(raw) // 2],
+                       b"X" + raw[1:], raw[:16] + b"}" + raw[17:]):
+            with open(target, "wb") as f:
+                f.write(broken)
+            self.assertIsNone(read_snapshot(self.path))
+        self.assertEqual(list(load_or_build(self.path).store),
+                         self.expected())
+
+    def test_other_target(self):
+        """ A snapshot can be written elsewhere, or not at all """
+        os.remove(snapshot_path(self.path))
+        target = os.path.join(self.tmp, "other.snap")
+        load_or_build(self.path, target)
+        self.assertIsNotNone(read_snapshot(self.path, target))
+        load_or_build(self.path, persist=False)
+        self.assertFalse(os.path.exists(snapshot_path(self.path)))
+
+
+class TestTailReader(FileTestCase):
+    """Checks the incremental reads of appended rows.
+    """
+
+    def test_row_end_offset(self):
+        """ The offset follows the header and the given rows """
+        self.write(QUOTED_ROWS)
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        self.assertEqual(row_end_offset(self.path, 0), raw.index(b"\n") + 1)
+        self.assertEqual(row_end_offset(self.path, 4), len(raw))
+        self.assertIsNone(row_end_offset(self.path, 5))
+        end = row_end_offset(self.path, 3)
+        self.assertTrue(raw[end:].startswith(b"2019,"))
+
+    def test_extend(self):
+        """ Complete appended rows are added to every backend, a partial
+        row only once it is complete
+        """
+        write_dataset(self.path, 50)
+        for backend in BACKENDS:
+            write_dataset(self.path, 50)
+            dataset = load_dataset(self.path, backend)
+            self.assertEqual(extend_dataset(dataset, self.path)[0], [])
+            self.append('2020,MALE,X,"q,\n",1,1\n2021,FEMALE,Y,')
+            rows, tail = extend_dataset(dataset, self.path)
+            self.assertEqual([list(row) for row in rows],
+                             [["2020", "MALE", "X", "q,\n", "1", "1"]])
+            self.append("Z,2,2\n")
+            rows, tail = extend_dataset(dataset, self.path, tail)
+            self.assertEqual([list(row) for row in rows],
+                             [["2021", "FEMALE", "Y", "Z", "2", "2"]])
+            self.assertEqual([list(row) for row in dataset],
+                             self.expected(), backend)
+            if isinstance(dataset, MmapStore):
+                dataset.close()
+
+    def test_rewritten(self):
+        """ A rewritten file has to be loaded again """
+        for backend in BACKENDS:
+            write_dataset(self.path, 50)
+            dataset = load_dataset(self.path, backend)
+            write_dataset(self.path, 10, seed=9)
+            self.assertIsNone(extend_dataset(dataset, self.path), backend)
+            if isinstance(dataset, MmapStore):
+                dataset.close()
+
+
+class TestEncodedRows(unittest.TestCase):
+    """Checks the encoded rows against json.dumps and csv.writer.
+    """
+
+    def setUp(self):
+        """ Rows with characters needing escapes """
+        self.rows = QUOTED_ROWS + [["é", "\u2028", "\\", "\t", "/", "x"]]
+
+    def test_view(self):
+        """ Any slice encodes as json.dumps of the rows """
+        encoded = EncodedRows(self.rows)
+        self.assertEqual(len(encoded), len(self.rows))
+        for start in range(len(self.rows) + 1):
+            for end in range(start, len(self.rows) + 3):
+                raw = json_array(encoded.view(start, end))
+                self.assertEqual(json.loads(raw), self.rows[start:end])
+                self.assertEqual(
+                    raw, json.dumps(self.rows[start:end]).encode())
+
+    def test_csv(self):
+        """ The CSV encoding parses back into the rows """
+        encoded = EncodedRows(self.rows)
+        raw = bytes(encoded.view(0, len(self.rows), "csv"))
+        self.assertEqual(raw, encode_rows(self.rows, "csv"))
+        self.assertEqual(
+            list(csv.reader(io.StringIO(raw.decode(), newline=""))), self.rows)
+
+    def test_join_and_extend(self):
+        """ Rows are joined in any order, appended rows included """
+        encoded = EncodedRows(self.rows[:2])
+        encoded.extend(self.rows[2:])
+        encoded.extend([])
+        positions = [4, 0, 2, 2]
+        self.assertEqual(
+            json_array(encoded.join(positions)),
+            json.dumps([self.rows[i] for i in positions]).encode())
+        self.assertEqual(encoded.join([]), b"")
+        self.assertEqual(json_array(encode_rows(self.rows)),
+                         json.dumps(self.rows).encode())
+        with self.assertRaises(ValueError):
+            encoded.view(0, 1, "xml")
+        with self.assertRaises(ValueError):
+            encode_rows(self.rows, "xml")
+
+    def test_splice_json(self):
+        """ A spliced dictionary encodes as json.dumps of it """
+        fields = {"page": 1, "data": self.rows, "next": None, "é": "\""}
+        raw = json_array(EncodedRows(self.rows).view(0, len(self.rows)))
+        self.assertEqual(splice_json(fields, "data", raw),
+                         json.dumps(fields).encode())
+        self.assertEqual(splice_json({}, "data", raw), b"{}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,11 +8,15 @@ from base_caching import BaseCaching
 class BasicCache(BaseCaching):
     """ BasicCache class with unlimited caching """
 
-    def put(self, key, item):
+    def put(self, key, item, ttl=None):
         """ Adds an item to the cache if key and item are not None """
         if key is not None and item is not None:
+            # Weighed first, the weigher may raise
+            weight = self._weight(item)
+            self._sweep()
             self.cache_data[key] = item
+            self._track(key, weight, ttl)
 
     def get(self, key):
         """ Gets the value associated with a key in the cache """
-        return self.cache_data.get(key, None)
+        return self.cache_data[key] if self._live(key) else None
@@ -6,66 +6,143 @@ from collections import defaultdict, OrderedDict
 
 
 class LFUCache(BaseCaching):
-    """ LFUCache class with LFU + LRU eviction policy """
+    """ LFUCache class with LFU + LRU eviction policy
 
-    def __init__(self):
-        """ Initialize the cache """
-        super().__init__()
+    Keys are grouped in buckets by frequency, each bucket ordered from
+    least to most recently used, and the lowest frequency is tracked, so
+    the item to evict is always the first of the bucket at min_freq.
+    """
+
+    def __init__(self, max_items=None, max_weight=None, weigher=None,
+                 decay_every=None, **kwargs):
+        """ Initialize the cache
+
+        Args:
+            max_items, max_weight, weigher, kwargs: See BaseCaching.
+            decay_every (int): Halve every frequency after this many
+                accesses, so keys that were only hot long ago can be
+                evicted again. None (the default) never decays.
+        """
+        super().__init__(max_items, max_weight, weigher, **kwargs)
         # Frequency of each key
         self.usage_freq = defaultdict(int)
 
         # Keeps track of access order by key
         self.access_order = OrderedDict()
 
-    def put(self, key, item):
+        # Keys of each frequency, least recently used first
+        self.freq_buckets = defaultdict(OrderedDict)
+        # Not above any frequency, the lowest one unless its bucket was
+        # emptied since (a new key resets it to 1 anyway)
+        self.min_freq = 0
+
+        self.decay_every = decay_every
+        self.accesses = 0
+
+    def put(self, key, item, ttl=None):
         """ Add an item to the cache with LFU + LRU eviction policy """
         if key is None or item is None:
             return
 
+        # Weighed first, the weigher may raise
+        weight = self._weight(item)
+        # Reclaim the expired items first, they may make room
+        self._sweep()
+
         # Update existing item
         if key in self.cache_data:
             self.cache_data[key] = item
+            self._track(key, weight, ttl)
             self._increment_frequency(key)
         else:
-            # Add new item if cache is full, evict one if necessary
-            if len(self.cache_data) >= BaseCaching.MAX_ITEMS:
+            # Add new item if cache is full, evict until it fits
+            while self.cache_data and not self._fits(1, weight):
                 self._evict_lfu_item()
 
             # Add item to cache, initialize frequency and order
             self.cache_data[key] = item
+            self._track(key, weight, ttl)
             self.usage_freq[key] = 1
             self.access_order[key] = None
+            self.freq_buckets[1][key] = None
+            self.min_freq = 1
+        # An item heavier than the budget only fits on its own, or not at
+        # all and gets evicted too
+        while not self._fits():
+            self._evict_lfu_item()
+        self._count_access()
 
     def get(self, key):
         """ Retrieve an item from the cache and update its frequency """
-        if key is None or key not in self.cache_data:
+        if not self._live(key):
             return None
         self._increment_frequency(key)
+        self._count_access()
         return self.cache_data[key]
 
     def _increment_frequency(self, key):
         """
         Increment the frequency and update access order for LRU fallback
         """
-        self.usage_freq[key] += 1
+        freq = self.usage_freq[key]
+        bucket = self.freq_buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self.freq_buckets[freq]
+            if self.min_freq == freq:
+                self.min_freq = freq + 1
+
+        self.usage_freq[key] = freq + 1
+        self.freq_buckets[freq + 1][key] = None
         self.access_order.move_to_end(key)  # Update order for LRU
 
     def _evict_lfu_item(self):
         """ Evict the least frequently used item, with LRU fallback """
-        # Find the minimum frequency
-        min_freq = min(self.usage_freq.values())
-        # Collect all keys with that minimum frequency
-        lfu_candidates = [
-                k for k, freq in self.usage_freq.items() if freq == min_freq
-                ]
-
-        # Apply LRU by using the access order of keys with minimum frequency
-        lfu_key = next(k for k in self.access_order if k in lfu_candidates)
+        if self.min_freq not in self.freq_buckets:
+            # Its bucket was emptied and no key was added since: only when
+            # evicting several items for a heavy one, or after expirations
+            self.min_freq = min(self.freq_buckets)
+        # The least recently used key of the lowest frequency
+        bucket = self.freq_buckets[self.min_freq]
+        lfu_key, _ = bucket.popitem(last=False)
+        if not bucket:
+            del self.freq_buckets[self.min_freq]
 
         # Remove LFU item from all tracking structures
         del self.cache_data[lfu_key]
+        self._untrack(lfu_key)
         del self.usage_freq[lfu_key]
         self.access_order.pop(lfu_key)
 
         # Print the key that was discarded
-        print(f"DISCARD: {lfu_key}")
+        self._report_discard(lfu_key)
+
+    def _forget(self, key):
+        """ Removes an expired key from the buckets and the access order """
+        freq = self.usage_freq.pop(key)
+        bucket = self.freq_buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self.freq_buckets[freq]
+        del self.access_order[key]
+
+    def _count_access(self):
+        """ Counts an access, decaying frequencies when due """
+        if self.decay_every is None:
+            return
+        self.accesses += 1
+        if self.accesses >= self.decay_every:
+            self.accesses = 0
+            self._decay()
+
+    def _decay(self):
+        """
+        Halve every frequency (keeping at least 1), rebuilding the buckets
+        in access order so ties are still broken by recency
+        """
+        self.freq_buckets = defaultdict(OrderedDict)
+        for key in self.access_order:
+            freq = max(self.usage_freq[key] // 2, 1)
+            self.usage_freq[key] = freq
+            self.freq_buckets[freq][key] = None
+        self.min_freq = min(self.freq_buckets, default=0)
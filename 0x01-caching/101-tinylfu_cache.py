@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+""" TinyLFUCache module """
+
+from base_caching import BaseCaching
+from collections import OrderedDict
+from count_min_sketch import CountMinSketch
+
+
+class TinyLFUCache(BaseCaching):
+    """ TinyLFUCache class with a W-TinyLFU eviction policy
+
+    New keys enter a small LRU window. The key the window pushes out may
+    only enter the main region, a segmented LRU, if a count-min sketch of
+    the recent accesses estimates it more frequent than the victim of the
+    main region; otherwise it is discarded itself. A scan of keys seen
+    once thus only ever churns the window.
+    """
+    # Share of the capacity of the window, and of the main region that
+    # is protected
+    WINDOW_RATIO = 0.01
+    PROTECTED_RATIO = 0.8
+
+    def __init__(self, *args, **kwargs):
+        """ Initialize the cache, see BaseCaching for the arguments """
+        super().__init__(*args, **kwargs)
+        self.window_size = max(int(self.max_items * self.WINDOW_RATIO), 1)
+        main_size = max(self.max_items - self.window_size, 0)
+        self.main_size = main_size
+        self.protected_size = int(main_size * self.PROTECTED_RATIO)
+
+        # Keys of each region from least to most recently used
+        self.window = OrderedDict()
+        self.probation = OrderedDict()
+        self.protected = OrderedDict()
+
+        self.sketch = CountMinSketch(max(self.max_items, 16))
+
+    def put(self, key, item, ttl=None):
+        """ Add an item to the cache with W-TinyLFU eviction policy """
+        if key is None or item is None:
+            return
+
+        # Weighed first, the weigher may raise
+        weight = self._weight(item)
+        # Reclaim the expired items first, they may make room
+        self._sweep()
+        self.sketch.increment(key)
+        known = key in self.cache_data
+        self.cache_data[key] = item
+        self._track(key, weight, ttl)
+        if known:
+            self._touch(key)
+        else:
+            self.window[key] = None
+            while len(self.window) > self.window_size:
+                candidate, _ = self.window.popitem(last=False)
+                self._admit(candidate)
+
+        # An item heavier than the weight budget makes room from the
+        # victims of the main region first
+        while not self._fits():
+            victim = self._victim()
+            if victim is None:
+                victim = next(iter(self.window))
+            self._discard(victim)
+
+    def get(self, key):
+        """ Retrieve an item from the cache and record the access """
+        if key is None:
+            return None
+        # Misses count too, a key requested often deserves admission
+        self.sketch.increment(key)
+        if not self._live(key):
+            return None
+        self._touch(key)
+        return self.cache_data[key]
+
+    def _touch(self, key):
+        """ Moves an accessed key to the most recent position of its
+        region, promoting it to protected from probation
+        """
+        if key in self.window:
+            self.window.move_to_end(key)
+        elif key in self.protected:
+            self.protected.move_to_end(key)
+        else:
+            del self.probation[key]
+            self.protected[key] = None
+            # Demote the least recently used protected key
+            if len(self.protected) > self.protected_size:
+                demoted, _ = self.protected.popitem(last=False)
+                self.probation[demoted] = None
+
+    def _victim(self):
+        """ The key the main region would evict, None if it is empty """
+        for region in (self.probation, self.protected):
+            if region:
+                return next(iter(region))
+        return None
+
+    def _admit(self, candidate):
+        """ Moves the key leaving the window into the main region, if it
+        has room or the candidate is more frequent than its victim
+        """
+        if len(self.probation) + len(self.protected) < self.main_size:
+            self.probation[candidate] = None
+            return
+        victim = self._victim()
+        if (victim is not None and
+                self.sketch.estimate(candidate) >
+                self.sketch.estimate(victim)):
+            self._discard(victim)
+            self.probation[candidate] = None
+        else:
+            self._discard(candidate)
+
+    def _discard(self, key):
+        """ Evict a key, in a region or just out of the window """
+        self._forget(key)
+        del self.cache_data[key]
+        self._untrack(key)
+        self._report_discard(key)
+
+    def _forget(self, key):
+        """ Removes a key from its region """
+        for region in (self.window, self.probation, self.protected):
+            if key in region:
+                del region[key]
+                return
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+""" ARCCache module """
+
+from base_caching import BaseCaching
+from collections import OrderedDict
+
+
+class ARCCache(BaseCaching):
+    """ ARCCache class with an Adaptive Replacement Cache policy
+
+    Keys seen once live in the LRU list t1, keys seen again in t2. The
+    keys evicted from each list are remembered (without their items) in
+    the ghost lists b1 and b2: a miss on a ghost of b1 means t1 was too
+    small and grows its target size p, a miss on a ghost of b2 shrinks
+    it, so the split between recency and frequency follows the workload.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """ Initialize the cache, see BaseCaching for the arguments """
+        super().__init__(*args, **kwargs)
+        # Resident keys from least to most recently used
+        self.t1 = OrderedDict()
+        self.t2 = OrderedDict()
+        # Ghost keys from least to most recently evicted
+        self.b1 = OrderedDict()
+        self.b2 = OrderedDict()
+        # Target size of t1
+        self.p = 0
+
+    def put(self, key, item, ttl=None):
+        """ Add an item to the cache with ARC eviction policy """
+        if key is None or item is None:
+            return
+
+        # Weighed first, the weigher may raise
+        weight = self._weight(item)
+        # Reclaim the expired items first, they may make room
+        self._sweep()
+        if key in self.cache_data:
+            self.cache_data[key] = item
+            self._track(key, weight, ttl)
+            self._touch(key)
+        else:
+            # A ghost hit adapts the target size of t1
+            if key in self.b1:
+                step = max(len(self.b2) // len(self.b1), 1)
+                self.p = min(self.p + step, self.max_items)
+            elif key in self.b2:
+                step = max(len(self.b1) // len(self.b2), 1)
+                self.p = max(self.p - step, 0)
+            ghost = key in self.b1 or key in self.b2
+            while self.cache_data and not self._fits(1, weight):
+                self._replace(key in self.b2)
+
+            # Keys seen before go to t2, new ones to t1
+            self.b1.pop(key, None)
+            self.b2.pop(key, None)
+            (self.t2 if ghost else self.t1)[key] = None
+            self.cache_data[key] = item
+            self._track(key, weight, ttl)
+            self._trim_ghosts()
+        # An item heavier than the budget only fits on its own, or not at
+        # all and gets evicted too
+        while not self._fits():
+            self._replace(False)
+
+    def get(self, key):
+        """ Gets the value associated with a key in the cache """
+        if not self._live(key):
+            return None
+        self._touch(key)
+        return self.cache_data[key]
+
+    def _touch(self, key):
+        """ Moves a hit key to the most recent position of t2 """
+        if key in self.t1:
+            del self.t1[key]
+            self.t2[key] = None
+        else:
+            self.t2.move_to_end(key)
+
+    def _replace(self, in_b2):
+        """ Evicts the least recently used key of t1 if it is over its
+        target size, else of t2, remembering it in the matching ghost list
+        """
+        if self.t1 and (len(self.t1) > self.p or
+                        (in_b2 and len(self.t1) == self.p) or
+                        not self.t2):
+            key, _ = self.t1.popitem(last=False)
+            self.b1[key] = None
+        else:
+            key, _ = self.t2.popitem(last=False)
+            self.b2[key] = None
+        del self.cache_data[key]
+        self._untrack(key)
+        self._report_discard(key)
+
+    def _trim_ghosts(self):
+        """ Bounds t1 + b1 to the capacity, and the whole directory to
+        twice the capacity
+        """
+        while self.b1 and len(self.t1) + len(self.b1) > self.max_items:
+            self.b1.popitem(last=False)
+        while (len(self.b1) + len(self.b2) + len(self.cache_data) >
+               2 * self.max_items):
+            (self.b2 or self.b1).popitem(last=False)
+
+    def _forget(self, key):
+        """ Removes an expired key, without keeping a ghost of it """
+        if key in self.t1:
+            del self.t1[key]
+        else:
+            del self.t2[key]
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+""" TwoQCache module """
+
+from base_caching import BaseCaching
+from collections import OrderedDict
+
+
+class TwoQCache(BaseCaching):
+    """ TwoQCache class with a 2Q eviction policy
+
+    New keys enter the FIFO queue a1in, where hits cost nothing. The keys
+    it evicts are remembered (without their items) in the ghost queue
+    a1out, and only a key requested again while remembered there enters
+    the LRU list am. A scan thus flows through a1in without disturbing
+    the keys of am.
+    """
+    # Share of the capacity of a1in, and of the ghosts of a1out
+    IN_RATIO = 0.25
+    OUT_RATIO = 0.5
+
+    def __init__(self, *args, **kwargs):
+        """ Initialize the cache, see BaseCaching for the arguments """
+        super().__init__(*args, **kwargs)
+        self.in_size = max(int(self.max_items * self.IN_RATIO), 1)
+        self.out_size = max(int(self.max_items * self.OUT_RATIO), 1)
+        # Keys in insertion order
+        self.a1in = OrderedDict()
+        # Ghost keys from least to most recently evicted
+        self.a1out = OrderedDict()
+        # Keys from least to most recently used
+        self.am = OrderedDict()
+
+    def put(self, key, item, ttl=None):
+        """ Add an item to the cache with 2Q eviction policy """
+        if key is None or item is None:
+            return
+
+        # Weighed first, the weigher may raise
+        weight = self._weight(item)
+        # Reclaim the expired items first, they may make room
+        self._sweep()
+        if key in self.cache_data:
+            self.cache_data[key] = item
+            self._track(key, weight, ttl)
+            if key in self.am:
+                self.am.move_to_end(key)
+        else:
+            while self.cache_data and not self._fits(1, weight):
+                self._reclaim()
+
+            # Only a key remembered in a1out is hot enough for am
+            if key in self.a1out:
+                del self.a1out[key]
+                self.am[key] = None
+            else:
+                self.a1in[key] = None
+            self.cache_data[key] = item
+            self._track(key, weight, ttl)
+        # An item heavier than the budget only fits on its own, or not at
+        # all and gets evicted too
+        while not self._fits():
+            self._reclaim()
+
+    def get(self, key):
+        """ Gets the value associated with a key in the cache """
+        if not self._live(key):
+            return None
+        if key in self.am:
+            self.am.move_to_end(key)
+        return self.cache_data[key]
+
+    def _reclaim(self):
+        """ Evicts the first key of a1in if it is over its share, keeping a
+        ghost of it, else the least recently used key of am
+        """
+        if self.a1in and (len(self.a1in) > self.in_size or not self.am):
+            key, _ = self.a1in.popitem(last=False)
+            self.a1out[key] = None
+            if len(self.a1out) > self.out_size:
+                self.a1out.popitem(last=False)
+        else:
+            key, _ = self.am.popitem(last=False)
+        del self.cache_data[key]
+        self._untrack(key)
+        self._report_discard(key)
+
+    def _forget(self, key):
+        """ Removes an expired key, without keeping a ghost of it """
+        if key in self.am:
+            del self.am[key]
+        else:
+            del self.a1in[key]
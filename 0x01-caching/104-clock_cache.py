@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+""" ClockCache module """
+
+from base_caching import BaseCaching
+
+
+class ClockCache(BaseCaching):
+    """ ClockCache class with a CLOCK (second chance) eviction policy
+
+    Keys sit in the slots of a circular buffer, each with a reference bit
+    that a hit merely sets, without moving anything. To evict, the hand
+    sweeps the buffer clearing the bits it finds set, and evicts the
+    first key whose bit was already clear.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """ Initialize the cache, see BaseCaching for the arguments """
+        super().__init__(*args, **kwargs)
+        # Key of every slot, None for a free one, and its reference bit
+        self.ring = []
+        self.referenced = bytearray()
+        # Slot of every key, free slots, and the next slot to inspect
+        self.slots = {}
+        self.free = []
+        self.hand = 0
+
+    def put(self, key, item, ttl=None):
+        """ Add an item to the cache with CLOCK eviction policy """
+        if key is None or item is None:
+            return
+
+        # Weighed first, the weigher may raise
+        weight = self._weight(item)
+        # Reclaim the expired items first, they may make room
+        self._sweep()
+        if key in self.cache_data:
+            self.cache_data[key] = item
+            self._track(key, weight, ttl)
+            self.referenced[self.slots[key]] = 1
+        else:
+            while self.cache_data and not self._fits(1, weight):
+                self._evict()
+
+            if self.free:
+                slot = self.free.pop()
+                self.ring[slot] = key
+            else:
+                slot = len(self.ring)
+                self.ring.append(key)
+                self.referenced.append(0)
+            self.slots[key] = slot
+            self.cache_data[key] = item
+            self._track(key, weight, ttl)
+        # An item heavier than the budget only fits on its own, or not at
+        # all and gets evicted too
+        while not self._fits():
+            self._evict()
+
+    def get(self, key):
+        """ Gets the value associated with a key in the cache """
+        if not self._live(key):
+            return None
+        self.referenced[self.slots[key]] = 1
+        return self.cache_data[key]
+
+    def _evict(self):
+        """ Evicts the first unreferenced key from the hand on, giving
+        the referenced ones a second chance
+        """
+        ring, referenced = self.ring, self.referenced
+        while True:
+            slot = self.hand
+            self.hand = (slot + 1) % len(ring)
+            key = ring[slot]
+            if key is None:
+                continue
+            if referenced[slot]:
+                referenced[slot] = 0
+                continue
+            break
+        self._forget(key)
+        del self.cache_data[key]
+        self._untrack(key)
+        self._report_discard(key)
+
+    def _forget(self, key):
+        """ Frees the slot of a key """
+        slot = self.slots.pop(key)
+        self.ring[slot] = None
+        self.referenced[slot] = 0
+        self.free.append(slot)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+""" ClockProCache module """
+
+from base_caching import BaseCaching
+
+# Status of the keys on the clock
+HOT, COLD, TEST = 0, 1, 2
+
+
+class ClockProCache(BaseCaching):
+    """ ClockProCache class with a CLOCK-Pro eviction policy
+
+    Hot and cold resident keys, and non-resident keys (evicted cold keys
+    still in their test period), share one circular list that three
+    hands sweep. A hit only sets the reference bit of the key. The cold
+    hand evicts the cold keys whose bit is clear and promotes the others
+    to hot, the hot hand demotes the hot keys whose bit is clear, and the
+    non-resident keys are forgotten once the hot hand passes them, or by
+    the test hand when there are too many. A key requested again during
+    its test period comes back hot, and grows the share of cold keys,
+    which shrinks when test periods run out: the split between recency
+    and frequency adapts to the workload.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """ Initialize the cache, see BaseCaching for the arguments """
+        super().__init__(*args, **kwargs)
+        # Circular list of the keys, the head being before the hot hand
+        self.next = {}
+        self.prev = {}
+        self.status = {}
+        self.referenced = set()
+        self.hand_hot = self.hand_cold = self.hand_test = None
+        self.count_hot = self.count_cold = self.count_test = 0
+        # Target number of cold keys, starting small: test hits grow it
+        self.cold_target = 1
+
+    def put(self, key, item, ttl=None):
+        """ Add an item to the cache with CLOCK-Pro eviction policy """
+        if key is None or item is None:
+            return
+
+        # Weighed first, the weigher may raise
+        weight = self._weight(item)
+        # Reclaim the expired items first, they may make room
+        self._sweep()
+        if key in self.cache_data:
+            self.cache_data[key] = item
+            self._track(key, weight, ttl)
+            self.referenced.add(key)
+        else:
+            tested = self.status.get(key) == TEST
+            if tested:
+                # Requested again in its test period, the cold keys
+                # deserve more room
+                self.cold_target = min(self.cold_target + 1,
+                                       self.max_items)
+                self._unlink(key)
+                self.count_test -= 1
+            while self.cache_data and not self._fits(1, weight):
+                self._evict()
+
+            self._link(key, HOT if tested else COLD)
+            self.cache_data[key] = item
+            self._track(key, weight, ttl)
+        # An item heavier than the budget only fits on its own, or not at
+        # all and gets evicted too
+        while not self._fits():
+            self._evict()
+
+    def get(self, key):
+        """ Gets the value associated with a key in the cache """
+        if not self._live(key):
+            return None
+        self.referenced.add(key)
+        return self.cache_data[key]
+
+    def _link(self, key, status):
+        """ Inserts a key at the head of the list """
+        if self.hand_hot is None:
+            self.next[key] = self.prev[key] = key
+            self.hand_hot = self.hand_cold = self.hand_test = key
+        else:
+            head = self.prev[self.hand_hot]
+            self.next[head] = key
+            self.prev[key] = head
+            self.next[key] = self.hand_hot
+            self.prev[self.hand_hot] = key
+            if self.hand_cold == self.hand_hot:
+                self.hand_cold = key
+        self.status[key] = status
+        if status == HOT:
+            self.count_hot += 1
+        else:
+            self.count_cold += 1
+
+    def _unlink(self, key):
+        """ Removes a key from the list, the hands on it moving back """
+        after = self.next.pop(key)
+        before = self.prev.pop(key)
+        del self.status[key]
+        if after == key:
+            self.hand_hot = self.hand_cold = self.hand_test = None
+            return
+        self.next[before] = after
+        self.prev[after] = before
+        if self.hand_hot == key:
+            self.hand_hot = before
+        if self.hand_cold == key:
+            self.hand_cold = before
+        if self.hand_test == key:
+            self.hand_test = before
+
+    def _evict(self):
+        """ Runs the cold hand until it evicts a key """
+        resident = len(self.cache_data)
+        while len(self.cache_data) == resident:
+            if not self.count_cold:
+                self._run_hand_hot()
+            self._run_hand_cold()
+
+    def _run_hand_cold(self):
+        """ Evicts the cold key under the hand, or promotes it to hot if
+        it was referenced
+        """
+        key = self.hand_cold
+        if self.status[key] == COLD:
+            self.count_cold -= 1
+            if key in self.referenced:
+                self.referenced.discard(key)
+                self.status[key] = HOT
+                self.count_hot += 1
+            else:
+                # Still remembered for the rest of its test period
+                self.status[key] = TEST
+                self.count_test += 1
+                del self.cache_data[key]
+                self._untrack(key)
+                self._report_discard(key)
+                while self.count_test > self.max_items:
+                    self._run_hand_test()
+        self.hand_cold = self.next[self.hand_cold]
+        while self.count_hot > self.max_items - self.cold_target:
+            self._run_hand_hot()
+
+    def _run_hand_hot(self):
+        """ Demotes the hot key under the hand to cold unless it was
+        referenced, and ends the test period of a non-resident key
+        """
+        key = self.hand_hot
+        status = self.status[key]
+        if status == HOT:
+            if key in self.referenced:
+                self.referenced.discard(key)
+            else:
+                self.status[key] = COLD
+                self.count_hot -= 1
+                self.count_cold += 1
+        elif status == TEST:
+            self._end_test(key)
+        self.hand_hot = self.next[self.hand_hot]
+
+    def _run_hand_test(self):
+        """ Ends the test period of the next non-resident key """
+        while self.status[self.hand_test] != TEST:
+            self.hand_test = self.next[self.hand_test]
+        self._end_test(self.hand_test)
+        self.hand_test = self.next[self.hand_test]
+
+    def _end_test(self, key):
+        """ Forgets a non-resident key whose test period ran out """
+        self._unlink(key)
+        self.count_test -= 1
+        # Not requested again in time, the cold keys need less room
+        self.cold_target = max(self.cold_target - 1, 1)
+
+    def _forget(self, key):
+        """ Removes an expired key, without a test period """
+        if self.status[key] == HOT:
+            self.count_hot -= 1
+        else:
+            self.count_cold -= 1
+        self.referenced.discard(key)
+        self._unlink(key)
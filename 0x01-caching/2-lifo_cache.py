@@ -3,33 +3,49 @@
 """
 
 from base_caching import BaseCaching
+from collections import OrderedDict
 
 
 class LIFOCache(BaseCaching):
     """ LIFOCache class with a LIFO eviction policy """
 
-    def __init__(self):
-        """ Initialize the cache """
-        super().__init__()
-        self.order = []
+    def __init__(self, *args, **kwargs):
+        """ Initialize the cache, see BaseCaching for the arguments """
+        super().__init__(*args, **kwargs)
+        # Keys in insertion order, O(1) to move or pop at either end
+        self.order = OrderedDict()
 
-    def put(self, key, item):
+    def put(self, key, item, ttl=None):
         """ Adds an item to the cache using LIFO policy """
         if key is not None and item is not None:
-            # If key already exists, remove it to update position
-            if key in self.cache_data:
-                self.order.remove(key)
-            # Add item to cache and update order
+            # Weighed first, the weigher may raise
+            weight = self._weight(item)
+            # Reclaim the expired items first, they may make room
+            self._sweep()
+            # Add item to cache, an existing key goes to the end
             self.cache_data[key] = item
-            self.order.append(key)
+            self._track(key, weight, ttl)
+            self.order[key] = None
+            self.order.move_to_end(key)
 
-            # Check if we need to evict an item
-            if len(self.cache_data) > BaseCaching.MAX_ITEMS:
-                # Evict the most recently added item (LIFO)
-                last_key = self.order.pop(-2)  # Second-last added key for LIFO
+            # Evict items until the cache fits its capacity
+            while not self._fits():
+                # Evict the most recently added item before this one (LIFO)
+                # or, if it is the only one left, this one
+                self.order.popitem()
+                if self.order:
+                    last_key, _ = self.order.popitem()
+                    self.order[key] = None
+                else:
+                    last_key = key
                 del self.cache_data[last_key]
-                print(f"DISCARD: {last_key}")
+                self._untrack(last_key)
+                self._report_discard(last_key)
+
+    def _forget(self, key):
+        """ Removes an expired key from the order """
+        del self.order[key]
 
     def get(self, key):
         """ Gets the value associated with a key in the cache """
-        return self.cache_data.get(key, None)
+        return self.cache_data[key] if self._live(key) else None
@@ -3,41 +3,49 @@
 """
 
 from base_caching import BaseCaching
+from collections import OrderedDict
 
 
 class LRUCache(BaseCaching):
     """ LRUCache class with an LRU eviction policy """
 
-    def __init__(self):
-        """ Initialize the cache """
-        super().__init__()
-        self.usage_order = []
+    def __init__(self, *args, **kwargs):
+        """ Initialize the cache, see BaseCaching for the arguments """
+        super().__init__(*args, **kwargs)
+        # Keys from least to most recently used, O(1) to move or pop
+        self.usage_order = OrderedDict()
 
-    def put(self, key, item):
+    def put(self, key, item, ttl=None):
         """ Adds an item to the cache using LRU policy """
         if key is not None and item is not None:
-            # If the key is already in cache, remove it from usage_order
-            # to update its position
-            if key in self.cache_data:
-                self.usage_order.remove(key)
-
-            # Add the item to the cache and update usage order
+            # Weighed first, the weigher may raise
+            weight = self._weight(item)
+            # Reclaim the expired items first, they may make room
+            self._sweep()
+            # Add the item to the cache and mark it as the most recently
+            # used, moving it if the key is already in cache
             self.cache_data[key] = item
-            self.usage_order.append(key)
+            self._track(key, weight, ttl)
+            self.usage_order[key] = None
+            self.usage_order.move_to_end(key)
 
-            # If cache exceeds the maximum size,
+            # While cache exceeds its capacity,
             # remove the least recently used item
-            if len(self.cache_data) > BaseCaching.MAX_ITEMS:
-                # The least recently used item is the first item in usage_order
-                lru_key = self.usage_order.pop(0)
+            while not self._fits():
+                # The least recently used item is the first in usage_order
+                lru_key, _ = self.usage_order.popitem(last=False)
                 del self.cache_data[lru_key]
-                print(f"DISCARD: {lru_key}")
+                self._untrack(lru_key)
+                self._report_discard(lru_key)
+
+    def _forget(self, key):
+        """ Removes an expired key from the usage order """
+        del self.usage_order[key]
 
     def get(self, key):
         """ Gets the value associated with a key in the cache """
-        if key is not None and key in self.cache_data:
+        if self._live(key):
             # Update usage order because this key was recently accessed
-            self.usage_order.remove(key)
-            self.usage_order.append(key)
+            self.usage_order.move_to_end(key)
             return self.cache_data[key]
         return None
@@ -3,42 +3,58 @@
 """
 
 from base_caching import BaseCaching
+from collections import OrderedDict
 
 
 class MRUCache(BaseCaching):
     """ MRUCache class with an MRU eviction policy """
 
-    def __init__(self):
-        """ Initialize the cache """
-        super().__init__()
-        self.usage_order = []
+    def __init__(self, *args, **kwargs):
+        """ Initialize the cache, see BaseCaching for the arguments """
+        super().__init__(*args, **kwargs)
+        # Keys from least to most recently used, O(1) to move or pop
+        self.usage_order = OrderedDict()
 
-    def put(self, key, item):
+    def put(self, key, item, ttl=None):
         """ Adds an item to the cache using MRU policy """
         if key is None or item is None:
             return
 
-        # Update existing key to the most recent position
-        if key in self.cache_data:
-            self.usage_order.remove(key)
-        # Add new item to cache
-        self.cache_data[key] = item
-        self.usage_order.append(key)
+        # Weighed first, the weigher may raise
+        weight = self._weight(item)
+        # Reclaim the expired items first, they may make room
+        self._sweep()
 
-        # Check if cache size exceeds max limit
-        if len(self.cache_data) > BaseCaching.MAX_ITEMS:
-            # Discard the most recently used (last in `usage_order`)
-            "Second-last as new item is last"
-            mru_key = self.usage_order.pop(-2)
+        # Add item to cache, an existing key moves to the most recent
+        # position
+        self.cache_data[key] = item
+        self._track(key, weight, ttl)
+        self.usage_order[key] = None
+        self.usage_order.move_to_end(key)
+
+        # While cache exceeds its capacity
+        while not self._fits():
+            # Discard the most recently used before the new item, which
+            # is set aside meanwhile, or the new item if alone
+            self.usage_order.popitem()
+            if self.usage_order:
+                mru_key, _ = self.usage_order.popitem()
+                self.usage_order[key] = None
+            else:
+                mru_key = key
             del self.cache_data[mru_key]
-            print(f"DISCARD: {mru_key}")
+            self._untrack(mru_key)
+            self._report_discard(mru_key)
+
+    def _forget(self, key):
+        """ Removes an expired key from the usage order """
+        del self.usage_order[key]
 
     def get(self, key):
         """ Gets the value associated with a key in the cache """
-        if key is None or key not in self.cache_data:
+        if not self._live(key):
             return None
 
-        # Update usage order: remove the key and add it to the end
-        self.usage_order.remove(key)
-        self.usage_order.append(key)
+        # Update usage order: move the key to the most recent position
+        self.usage_order.move_to_end(key)
         return self.cache_data[key]
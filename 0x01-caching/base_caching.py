@@ -1,6 +1,12 @@
 #!/usr/bin/python3
 """ BaseCaching module
 """
+import sys
+import time
+
+from single_flight import SingleFlight
+from timer_wheel import TimerWheel
+
 
 class BaseCaching():
     """ BaseCaching defines:
@@ -8,11 +14,46 @@ class BaseCaching():
       - where your data are stored (in a dictionary)
     """
     MAX_ITEMS = 4
+    # Resolution, in seconds, at which expired items are swept
+    TTL_TICK = 1.0
 
-    def __init__(self):
+    def __init__(self, max_items=None, max_weight=None, weigher=None,
+                 ttl=None, clock=None, verbose=True):
         """ Initiliaze
+
+        Args:
+            max_items (int): Capacity in items of this cache, MAX_ITEMS
+                by default.
+            max_weight (int): Optional budget for the total weight of the
+                cached items, e.g. in bytes.
+            weigher (callable): Returns the weight of an item,
+                sys.getsizeof by default when max_weight is set.
+            ttl (float): Default time to live of the items, in seconds,
+                None (the default) for items that never expire.
+            clock (callable): Returns the current time in seconds,
+                time.monotonic by default.
+            verbose (bool): Whether evictions and expirations are printed
+                (DISCARD: key, EXPIRED: key), True by default.
         """
         self.cache_data = {}
+        self.max_items = self.MAX_ITEMS if max_items is None else max_items
+        self.max_weight = max_weight
+        if weigher is None and max_weight is not None:
+            weigher = sys.getsizeof
+        self.weigher = weigher
+        # Weight of every cached key, when items are weighed
+        self.weights = {}
+        self.total_weight = 0
+        self.ttl = ttl
+        self.clock = time.monotonic if clock is None else clock
+        # Deadline of every expiring key, and the wheel sweeping them
+        # (created with the first one)
+        self.deadlines = {}
+        self.timers = None
+        self.expirations = 0
+        self.verbose = verbose
+        # Computations in flight of get_or_compute
+        self.flights = SingleFlight()
 
     def print_cache(self):
         """ Print the cache
@@ -21,8 +62,9 @@ class BaseCaching():
         for key in sorted(self.cache_data.keys()):
             print("{}: {}".format(key, self.cache_data.get(key)))
 
-    def put(self, key, item):
-        """ Add an item in the cache
+    def put(self, key, item, ttl=None):
+        """ Add an item in the cache, expiring after ttl seconds (the
+        default ttl if None)
         """
         raise NotImplementedError("put must be implemented in your cache class")
 
@@ -30,3 +72,104 @@ class BaseCaching():
         """ Get an item by key
         """
         raise NotImplementedError("get must be implemented in your cache class")
+
+    def get_or_compute(self, key, fn, ttl=None):
+        """ Get an item by key, computing it with fn and caching it on a
+        miss. Concurrent threads missing the same key wait for a single
+        computation; they must only use this cache through this method
+        (or get_or_compute_async), which locks it.
+        """
+        return self.flights.do(key, self.get, self._storer(key, ttl), fn)
+
+    async def get_or_compute_async(self, key, fn, ttl=None):
+        """ Same as get_or_compute, fn returning an awaitable: concurrent
+        coroutines missing the same key await a single computation
+        """
+        return await self.flights.do_async(
+            key, self.get, self._storer(key, ttl), fn)
+
+    def _storer(self, key, ttl):
+        """ Returns a function caching an item under key """
+        return lambda item: self.put(key, item, ttl)
+
+    def _weight(self, item):
+        """ Weight of an item, 0 when items are not weighed
+        """
+        return 0 if self.weigher is None else self.weigher(item)
+
+    def _fits(self, items=0, weight=0):
+        """ Whether the cache is within its capacity and weight budget,
+        with room for a number of items of a total weight more
+        """
+        if len(self.cache_data) + items > self.max_items:
+            return False
+        return (self.max_weight is None or
+                self.total_weight + weight <= self.max_weight)
+
+    def _track(self, key, weight, ttl=None):
+        """ Accounts for the item now cached under key: its weight (from
+        _weight, computed before changing anything) and, if it expires,
+        its deadline
+        """
+        if self.weigher is not None:
+            self.total_weight += weight - self.weights.get(key, 0)
+            self.weights[key] = weight
+        if ttl is None:
+            ttl = self.ttl
+        if ttl is not None:
+            deadline = self.clock() + ttl
+            if self.timers is None:
+                self.timers = TimerWheel(self.clock(), self.TTL_TICK)
+            self.deadlines[key] = deadline
+            self.timers.schedule(key, deadline)
+        elif self.deadlines.pop(key, None) is not None:
+            self.timers.cancel(key)
+
+    def _untrack(self, key):
+        """ Stops accounting for a key no longer cached
+        """
+        self.total_weight -= self.weights.pop(key, 0)
+        if self.deadlines.pop(key, None) is not None:
+            self.timers.cancel(key)
+
+    def _forget(self, key):
+        """ Removes an expired key from the structures of the policy
+        """
+
+    def _expire(self, key):
+        """ Removes an expired key, reported apart from the evictions
+        """
+        del self.cache_data[key]
+        self._untrack(key)
+        self._forget(key)
+        self.expirations += 1
+        if self.verbose:
+            print(f"EXPIRED: {key}")
+
+    def _report_discard(self, key):
+        """ Reports a key evicted by the policy, printed when verbose;
+        override it to report evictions elsewhere
+        """
+        if self.verbose:
+            print(f"DISCARD: {key}")
+
+    def _sweep(self):
+        """ Expires the items whose deadline the timer wheel went past,
+        in O(1) per tick elapsed since the last sweep
+        """
+        if self.deadlines:
+            for key in self.timers.advance(self.clock()):
+                self._expire(key)
+
+    def _live(self, key):
+        """ Whether key is cached and not expired, expiring it if its
+        deadline passed since the last sweep
+        """
+        self._sweep()
+        if key is None or key not in self.cache_data:
+            return False
+        deadline = self.deadlines.get(key)
+        if deadline is not None and self.clock() >= deadline:
+            self._expire(key)
+            return False
+        return True
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+""" ConcurrentCache module
+
+Thread-safe versions of the caching policies. Keys are sharded by hash
+across independently locked segments, each one a cache of the policy with
+its share of the capacity, so threads working on different segments never
+wait for each other and the eviction policy applies within a segment.
+"""
+import threading
+
+from base_caching import BaseCaching
+from single_flight import SingleFlight
+
+BasicCache = __import__('0-basic_cache').BasicCache
+FIFOCache = __import__('1-fifo_cache').FIFOCache
+LIFOCache = __import__('2-lifo_cache').LIFOCache
+LRUCache = __import__('3-lru_cache').LRUCache
+MRUCache = __import__('4-mru_cache').MRUCache
+LFUCache = __import__('100-lfu_cache').LFUCache
+
+
+class ConcurrentCache():
+    """ ConcurrentCache class sharding a policy across locked segments """
+    SEGMENTS = 16
+    POLICY = BasicCache
+    # Whether get leaves the policy untouched, so hits need no lock
+    LOCK_FREE_READS = True
+
+    def __init__(self, max_items=None, max_weight=None, segments=None,
+                 **kwargs):
+        """ Initialize the cache
+
+        Args:
+            max_items (int): Capacity in items of the whole cache, split
+                across the segments, MAX_ITEMS by default.
+            max_weight (int): Optional weight budget, split likewise.
+            segments (int): Number of segments, SEGMENTS by default but
+                no more than max_items, so each holds an item at least.
+            kwargs: Other arguments of every segment, see BaseCaching.
+        """
+        if max_items is None:
+            max_items = BaseCaching.MAX_ITEMS
+        if segments is None:
+            segments = self.SEGMENTS
+        self.max_items = max_items
+        self.max_weight = max_weight
+        count = max(min(segments, max_items), 1)
+        self.segments = []
+        for i in range(count):
+            # The remainders go to the first segments
+            items = max_items // count + (i < max_items % count)
+            weight = None
+            if max_weight is not None:
+                weight = max_weight // count + (i < max_weight % count)
+            self.segments.append(self.POLICY(items, weight, **kwargs))
+        self.locks = [threading.Lock() for _ in range(count)]
+        self.flights = [SingleFlight(lock) for lock in self.locks]
+
+    def _index(self, key):
+        """ Index of the segment of a key """
+        return hash(key) % len(self.segments)
+
+    def put(self, key, item, ttl=None):
+        """ Add an item in the segment of its key """
+        if key is None or item is None:
+            return
+        i = self._index(key)
+        with self.locks[i]:
+            self.segments[i].put(key, item, ttl)
+
+    def get(self, key):
+        """ Get an item by key, without locking on hits if the policy
+        allows it
+        """
+        if key is None:
+            return None
+        i = self._index(key)
+        segment = self.segments[i]
+        if self.LOCK_FREE_READS:
+            # Single dictionary reads, atomic on their own
+            item = segment.cache_data.get(key)
+            if item is None:
+                return None
+            deadline = segment.deadlines.get(key)
+            if deadline is None or segment.clock() < deadline:
+                return item
+            # Expired, reclaimed under the lock
+        with self.locks[i]:
+            return segment.get(key)
+
+    def get_or_compute(self, key, fn, ttl=None):
+        """ Get an item by key, computing it with fn and caching it on a
+        miss, once for all the threads missing it concurrently
+        """
+        if self.LOCK_FREE_READS:
+            item = self.get(key)
+            if item is not None:
+                return item
+        i = self._index(key)
+        segment = self.segments[i]
+        return self.flights[i].do(
+            key, segment.get, lambda item: segment.put(key, item, ttl), fn)
+
+    async def get_or_compute_async(self, key, fn, ttl=None):
+        """ Same as get_or_compute, fn returning an awaitable, once for
+        all the coroutines missing it concurrently
+        """
+        if self.LOCK_FREE_READS:
+            item = self.get(key)
+            if item is not None:
+                return item
+        i = self._index(key)
+        segment = self.segments[i]
+        return await self.flights[i].do_async(
+            key, segment.get, lambda item: segment.put(key, item, ttl), fn)
+
+    @property
+    def cache_data(self):
+        """ Snapshot of the items of every segment """
+        data = {}
+        for segment, lock in zip(self.segments, self.locks):
+            with lock:
+                data.update(segment.cache_data)
+        return data
+
+    @property
+    def expirations(self):
+        """ Number of items expired across the segments """
+        return sum(segment.expirations for segment in self.segments)
+
+    def __len__(self):
+        """ Number of cached items """
+        return sum(len(segment.cache_data) for segment in self.segments)
+
+    def print_cache(self):
+        """ Print the cache
+        """
+        cache_data = self.cache_data
+        print("Current cache:")
+        for key in sorted(cache_data.keys()):
+            print("{}: {}".format(key, cache_data.get(key)))
+
+
+class ConcurrentFIFOCache(ConcurrentCache):
+    """ ConcurrentFIFOCache class with a FIFO policy per segment """
+    POLICY = FIFOCache
+
+
+class ConcurrentLIFOCache(ConcurrentCache):
+    """ ConcurrentLIFOCache class with a LIFO policy per segment """
+    POLICY = LIFOCache
+
+
+class ConcurrentLRUCache(ConcurrentCache):
+    """ ConcurrentLRUCache class with an LRU policy per segment """
+    POLICY = LRUCache
+    LOCK_FREE_READS = False
+
+
+class ConcurrentMRUCache(ConcurrentCache):
+    """ ConcurrentMRUCache class with an MRU policy per segment """
+    POLICY = MRUCache
+    LOCK_FREE_READS = False
+
+
+class ConcurrentLFUCache(ConcurrentCache):
+    """ ConcurrentLFUCache class with an LFU policy per segment """
+    POLICY = LFUCache
+    LOCK_FREE_READS = False
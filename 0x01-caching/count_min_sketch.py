@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+""" CountMinSketch module """
+
+# Odd multiplier spreading the hash of a key over enough bits to index
+# every row from a different window of the product
+SEED = 0x9E3779B97F4A7C15C2B2AE3D27D4EB4F165667B19E3779F9D6E8FEB86659FD93
+MASK64 = (1 << 64) - 1
+DEPTH = 4
+MAX_COUNT = 15
+# Translation table halving every counter at once
+HALVE = bytes(i >> 1 for i in range(256))
+
+
+class CountMinSketch():
+    """ CountMinSketch class estimating the frequency of keys
+
+    Counters are 4-bit in spirit (saturating at 15) and kept one per byte
+    of a single bytearray. Each of the DEPTH rows indexes its counters
+    with a different slice of one multiplicative hash of the key, and the
+    estimate of a key is its smallest counter. Every sample_size
+    increments, all the counters are halved so the estimates follow
+    recent popularity.
+    """
+
+    def __init__(self, width, sample_size=None):
+        """ Initialize the sketch
+
+        Args:
+            width (int): Counters per row, rounded up to a power of two,
+                about the number of keys tracked.
+            sample_size (int): Increments between two halvings, ten
+                times the width by default.
+        """
+        self.bits = max(int(width) - 1, 1).bit_length()
+        self.width = 1 << self.bits
+        self.table = bytearray(self.width * DEPTH)
+        self.sample_size = (10 * self.width if sample_size is None
+                            else sample_size)
+        self.additions = 0
+
+    def _indexes(self, key):
+        """ Position of the counter of key in every row """
+        mixed = ((hash(key) & MASK64) * SEED) >> 64
+        bits, mask, width = self.bits, self.width - 1, self.width
+        return (mixed & mask,
+                width + ((mixed >> bits) & mask),
+                2 * width + ((mixed >> 2 * bits) & mask),
+                3 * width + ((mixed >> 3 * bits) & mask))
+
+    def estimate(self, key):
+        """ Estimated frequency of key, its smallest counter """
+        table = self.table
+        return min(table[i] for i in self._indexes(key))
+
+    def increment(self, key):
+        """ Counts an occurrence of key """
+        table = self.table
+        for i in self._indexes(key):
+            if table[i] < MAX_COUNT:
+                table[i] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.reset()
+
+    def reset(self):
+        """ Halves every counter """
+        self.table = self.table.translate(HALVE)
+        self.additions //= 2
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+""" Memoize module """
+import functools
+import inspect
+
+LRUCache = __import__('3-lru_cache').LRUCache
+
+# Separates the positional from the keyword arguments in a key
+KWARGS_MARK = object()
+
+
+def make_key(*args, **kwargs):
+    """ Default key of a call: its positional arguments, followed by its
+    keyword arguments sorted by name if any
+    """
+    if not kwargs:
+        return args
+    return args + (KWARGS_MARK,) + tuple(sorted(kwargs.items()))
+
+
+def cached(policy=LRUCache, key=make_key, ttl=None, cache=None, **kwargs):
+    """ Decorator memoizing a function, or a coroutine function, in a cache
+
+    Concurrent calls missing the same key (threads for a function,
+    coroutines for a coroutine function) share a single call of the
+    function. Results that are None are not cached.
+
+    Args:
+        policy (type): The class of the cache, any BaseCaching subclass or
+            ConcurrentCache class, LRUCache by default.
+        key (callable): Returns the key of the arguments of a call,
+            make_key by default.
+        ttl (float): Time to live of the results, see BaseCaching.
+        cache: An existing cache to use instead of a new one.
+        kwargs: Arguments of the new cache, e.g. max_items.
+    """
+    def decorator(fn):
+        """ Wraps fn in its cache, available as its cache attribute """
+        store = policy(**kwargs) if cache is None else cache
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kw):
+                return await store.get_or_compute_async(
+                    key(*args, **kw), lambda: fn(*args, **kw), ttl)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kw):
+                return store.get_or_compute(
+                    key(*args, **kw), lambda: fn(*args, **kw), ttl)
+        wrapper.cache = store
+        return wrapper
+    return decorator
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+""" SingleFlight module """
+import asyncio
+import threading
+
+
+class Call():
+    """ Call class holding the outcome of a computation in flight """
+
+    def __init__(self):
+        """ Initialize a call not done yet """
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight():
+    """ SingleFlight class coalescing the concurrent computations of a key
+
+    The first caller missing a key computes it, the callers missing it
+    meanwhile wait for that computation instead of running their own, so
+    a key costs one computation per miss however many callers miss it.
+    Threads wait for the thread computing the key; coroutines await the
+    task computing it on their event loop.
+    """
+
+    def __init__(self, lock=None):
+        """ Initialize the flights
+
+        Args:
+            lock: Lock held around the lookups and stores of the cache,
+                a new one by default.
+        """
+        self.lock = threading.Lock() if lock is None else lock
+        # Call of every key computed by a thread
+        self.calls = {}
+        # Task of every (event loop, key) computed by a coroutine
+        self.tasks = {}
+
+    def do(self, key, lookup, store, fn):
+        """ Returns the item of key, computing it once on a miss
+
+        Args:
+            key: The key.
+            lookup (callable): Returns the cached item of a key, or None.
+            store (callable): Caches the computed item.
+            fn (callable): Computes the item, without arguments.
+        """
+        with self.lock:
+            item = lookup(key)
+            if item is not None:
+                return item
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            with self.lock:
+                try:
+                    store(call.result)
+                finally:
+                    del self.calls[key]
+        except BaseException as error:
+            # From fn or store, the waiters get it too
+            call.error = error
+            with self.lock:
+                self.calls.pop(key, None)
+            raise
+        finally:
+            call.done.set()
+        return call.result
+
+    async def do_async(self, key, lookup, store, fn):
+        """ Returns the item of key, computing it once on a miss
+
+        Same as do, fn returning an awaitable. The computation runs in its
+        own task, so a caller being cancelled does not cancel it for the
+        others.
+        """
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            item = lookup(key)
+            if item is not None:
+                return item
+            task = self.tasks.get((loop, key))
+            if task is None:
+                task = loop.create_task(self._compute(loop, key, store, fn))
+                self.tasks[loop, key] = task
+        return await asyncio.shield(task)
+
+    async def _compute(self, loop, key, store, fn):
+        """ Computes the item of key, caching it """
+        try:
+            item = await fn()
+            with self.lock:
+                try:
+                    store(item)
+                finally:
+                    del self.tasks[loop, key]
+        except BaseException:
+            with self.lock:
+                self.tasks.pop((loop, key), None)
+            raise
+        return item
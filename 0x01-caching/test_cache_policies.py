@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+""" Tests of the eviction policies """
+import random
+import unittest
+
+from base_caching import BaseCaching
+
+BasicCache = __import__('0-basic_cache').BasicCache
+FIFOCache = __import__('1-fifo_cache').FIFOCache
+LIFOCache = __import__('2-lifo_cache').LIFOCache
+LRUCache = __import__('3-lru_cache').LRUCache
+MRUCache = __import__('4-mru_cache').MRUCache
+LFUCache = __import__('100-lfu_cache').LFUCache
+TinyLFUCache = __import__('101-tinylfu_cache').TinyLFUCache
+ARCCache = __import__('102-arc_cache').ARCCache
+TwoQCache = __import__('103-2q_cache').TwoQCache
+ClockCache = __import__('104-clock_cache').ClockCache
+ClockProCache = __import__('105-clockpro_cache').ClockProCache
+COLD = __import__('105-clockpro_cache').COLD
+HOT = __import__('105-clockpro_cache').HOT
+TEST = __import__('105-clockpro_cache').TEST
+
+EVICTING = (FIFOCache, LIFOCache, LRUCache, MRUCache, LFUCache,
+            TinyLFUCache, ARCCache, TwoQCache, ClockCache, ClockProCache)
+
+
+def make(policy, **kwargs):
+    """ A quiet cache of a policy, recording its evictions in discarded """
+    cache = policy(verbose=False, **kwargs)
+    cache.discarded = []
+    cache._report_discard = cache.discarded.append
+    return cache
+
+
+def fill(cache, keys):
+    """ Puts every key of keys, its item being its lower case """
+    for key in keys:
+        cache.put(key, key.lower())
+
+
+class TestClassicPolicies(unittest.TestCase):
+    """ Tests of the policies of the original tasks """
+
+    def test_basic_never_evicts(self):
+        """ BasicCache has no limit """
+        cache = make(BasicCache)
+        fill(cache, "ABCDEFGH")
+        self.assertEqual(len(cache.cache_data), 8)
+
+    def test_fifo(self):
+        """ The first key put is evicted, a new put of a key moves it """
+        cache = make(FIFOCache)
+        fill(cache, "ABCDA")
+        fill(cache, "E")
+        self.assertEqual(cache.discarded, ["B"])
+
+    def test_lifo(self):
+        """ The last key put is evicted """
+        cache = make(LIFOCache)
+        fill(cache, "ABCDE")
+        self.assertEqual(cache.discarded, ["D"])
+        self.assertEqual(sorted(cache.cache_data), ["A", "B", "C", "E"])
+
+    def test_lru(self):
+        """ The least recently used key is evicted """
+        cache = make(LRUCache)
+        fill(cache, "ABCD")
+        self.assertEqual(cache.get("A"), "a")
+        fill(cache, "EF")
+        self.assertEqual(cache.discarded, ["B", "C"])
+
+    def test_mru(self):
+        """ The most recently used key is evicted """
+        cache = make(MRUCache)
+        fill(cache, "ABCD")
+        self.assertEqual(cache.get("B"), "b")
+        fill(cache, "E")
+        self.assertEqual(cache.discarded, ["B"])
+
+    def test_lfu_ties_broken_by_recency(self):
+        """ The least frequently used key is evicted, the least recently
+        used one among equals
+        """
+        cache = make(LFUCache)
+        fill(cache, "ABCD")
+        for key in "ABAC":
+            cache.get(key)
+        fill(cache, "E")
+        self.assertEqual(cache.discarded, ["D"])
+        fill(cache, "F")
+        self.assertEqual(cache.discarded, ["D", "E"])
+        cache.get("F")
+        fill(cache, "G")
+        self.assertEqual(cache.discarded, ["D", "E", "B"])
+
+    def test_lfu_min_freq_not_above_lowest(self):
+        """ min_freq never overestimates the lowest frequency """
+        cache = make(LFUCache, max_items=6)
+        rnd = random.Random(0)
+        for _ in range(3000):
+            key = rnd.randrange(12)
+            if rnd.random() < 0.5:
+                cache.put(key, key)
+            else:
+                cache.get(key)
+            if cache.freq_buckets:
+                self.assertLessEqual(cache.min_freq, min(cache.freq_buckets))
+            self.assertEqual(set(cache.usage_freq), set(cache.cache_data))
+
+    def test_lfu_decay(self):
+        """ A key only hot long ago is evicted once frequencies decay """
+        for decay_every, evicted in ((None, False), (8, True)):
+            cache = make(LFUCache, decay_every=decay_every)
+            cache.put("H", "h")
+            for _ in range(50):
+                cache.get("H")
+            for i in range(60):
+                cache.put(i, i)
+                cache.get(i)
+            self.assertEqual("H" in cache.discarded, evicted)
+
+
+class TestCapacityAndWeight(unittest.TestCase):
+    """ Tests of the per-instance capacity and of the weight budget """
+
+    def test_max_items_per_instance(self):
+        """ max_items overrides MAX_ITEMS for one instance only """
+        small = make(LRUCache, max_items=2)
+        default = make(LRUCache)
+        fill(small, "ABCD")
+        fill(default, "ABCD")
+        self.assertEqual(sorted(small.cache_data), ["C", "D"])
+        self.assertEqual(len(default.cache_data), BaseCaching.MAX_ITEMS)
+
+    def test_weight_budget(self):
+        """ Items are evicted until their total weight fits the budget """
+        cache = make(LRUCache, max_items=100, max_weight=10, weigher=len)
+        cache.put("a", "xxxx")
+        cache.put("b", "xxxx")
+        cache.put("c", "xxxx")
+        self.assertEqual(cache.discarded, ["a"])
+        self.assertEqual(cache.total_weight, 8)
+        cache.put("b", "x")
+        self.assertEqual(cache.total_weight, 5)
+
+    def test_too_heavy_item(self):
+        """ An item heavier than the budget is not kept """
+        for policy in EVICTING:
+            cache = make(policy, max_items=4, max_weight=5, weigher=len)
+            cache.put("a", "xx")
+            cache.put("b", "x" * 6)
+            self.assertNotIn("b", cache.cache_data, policy.__name__)
+            self.assertLessEqual(cache.total_weight, 5)
+
+    def test_random_workload_within_bounds(self):
+        """ Capacity, budget and bookkeeping hold for every policy """
+        for policy in EVICTING:
+            rnd = random.Random(policy.__name__)
+            cache = make(policy, max_items=8, max_weight=40, weigher=len)
+            expected = {}
+            for _ in range(3000):
+                key = rnd.randrange(30)
+                if rnd.random() < 0.5:
+                    item = "x" * rnd.randint(1, 9)
+                    cache.put(key, item)
+                    expected[key] = item
+                else:
+                    item = cache.get(key)
+                    if item is not None:
+                        self.assertEqual(item, expected[key])
+                self.assertLessEqual(len(cache.cache_data), 8)
+                self.assertLessEqual(cache.total_weight, 40)
+                self.assertEqual(cache.total_weight, sum(
+                    len(item) for item in cache.cache_data.values()))
+                self.assertEqual(set(cache.weights), set(cache.cache_data))
+
+
+class TestAdaptivePolicies(unittest.TestCase):
+    """ Tests of TinyLFU, ARC, 2Q, CLOCK and CLOCK-Pro """
+
+    def test_tinylfu_resists_scan(self):
+        """ Frequent keys are kept through a scan of keys seen once,
+        where LRU loses all of them
+        """
+        hot = ["hot{}".format(i) for i in range(50)]
+        kept = {}
+        for policy in (TinyLFUCache, LRUCache):
+            cache = make(policy, max_items=100)
+            for _ in range(5):
+                for key in hot:
+                    cache.put(key, key)
+                    cache.get(key)
+            for i in range(1000):
+                cache.put("scan{}".format(i), i)
+            kept[policy] = sum(key in cache.cache_data for key in hot)
+        # The sketch may overestimate a few scanned keys
+        self.assertGreaterEqual(kept[TinyLFUCache], 45)
+        self.assertEqual(kept[LRUCache], 0)
+
+    def test_arc_ghost_hit_adapts(self):
+        """ A hit on a ghost of t1 grows p and brings the key back in t2 """
+        cache = make(ARCCache)
+        fill(cache, "AB")
+        cache.get("A")
+        cache.get("B")
+        fill(cache, "CDE")
+        self.assertEqual(cache.discarded, ["C"])
+        self.assertIn("C", cache.b1)
+        self.assertEqual(cache.p, 0)
+        fill(cache, "C")
+        self.assertEqual(cache.p, 1)
+        self.assertIn("C", cache.t2)
+        self.assertNotIn("C", cache.b1)
+
+    def test_arc_repeated_keys_move_to_t2(self):
+        """ A key hit again leaves t1 for t2 """
+        cache = make(ARCCache)
+        fill(cache, "AB")
+        cache.get("A")
+        self.assertEqual(list(cache.t1), ["B"])
+        self.assertEqual(list(cache.t2), ["A"])
+
+    def test_2q_resists_scan(self):
+        """ Keys promoted to am are kept through a scan of new keys """
+        cache = make(TwoQCache, max_items=8)
+        fill(cache, "ABCDEFGH")
+        # Their ghosts are in a1out, putting them again promotes them
+        fill(cache, "IJ")
+        promoted = [key for key in "AB" if key in cache.a1out]
+        self.assertEqual(promoted, ["A", "B"])
+        fill(cache, "AB")
+        self.assertEqual(list(cache.am), ["A", "B"])
+        for i in range(100):
+            cache.put("scan{}".format(i), i)
+        self.assertIn("A", cache.cache_data)
+        self.assertIn("B", cache.cache_data)
+
+    def test_clock_second_chance(self):
+        """ A referenced key is skipped once by the hand """
+        cache = make(ClockCache)
+        fill(cache, "ABCD")
+        cache.get("A")
+        fill(cache, "E")
+        self.assertEqual(cache.discarded, ["B"])
+        self.assertEqual(cache.referenced[cache.slots["A"]], 0)
+
+    def test_clockpro_cold_target(self):
+        """ The cold target starts at one key and grows on a test hit """
+        cache = make(ClockProCache)
+        self.assertEqual(cache.cold_target, 1)
+        fill(cache, "ABCDE")
+        self.assertEqual(len(cache.discarded), 1)
+        evicted = cache.discarded[0]
+        self.assertEqual(cache.status[evicted], TEST)
+        self.assertEqual(cache.count_test, 1)
+        fill(cache, evicted)
+        self.assertEqual(cache.cold_target, 2)
+        self.assertEqual(cache.status[evicted], HOT)
+
+    def test_clockpro_referenced_cold_key_promoted(self):
+        """ The cold hand promotes a referenced cold key to hot and
+        evicts the next one
+        """
+        cache = make(ClockProCache)
+        fill(cache, "ABCD")
+        first = cache.hand_cold
+        cache.get(first)
+        fill(cache, "E")
+        self.assertNotIn(first, cache.discarded)
+        self.assertEqual(cache.status[first], HOT)
+        self.assertEqual(cache.discarded, [cache.next[first]])
+        self.assertEqual(cache.status[cache.next[first]], TEST)
+        self.assertEqual(cache.status["E"], COLD)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+""" Tests of the concurrent caches and of the count-min sketch """
+import random
+import sys
+import threading
+import unittest
+
+from count_min_sketch import MAX_COUNT, CountMinSketch
+
+concurrent_cache = __import__('concurrent_cache')
+
+CONCURRENT = (concurrent_cache.ConcurrentCache,
+              concurrent_cache.ConcurrentFIFOCache,
+              concurrent_cache.ConcurrentLIFOCache,
+              concurrent_cache.ConcurrentLRUCache,
+              concurrent_cache.ConcurrentMRUCache,
+              concurrent_cache.ConcurrentLFUCache)
+
+
+class TestConcurrentCache(unittest.TestCase):
+    """ Tests of the lock-striped caches """
+
+    def test_capacity_split(self):
+        """ The capacity is spread over the segments, remainders first """
+        cache = concurrent_cache.ConcurrentLRUCache(
+            max_items=10, max_weight=7, segments=4, verbose=False)
+        self.assertEqual([s.max_items for s in cache.segments], [3, 3, 2, 2])
+        self.assertEqual([s.max_weight for s in cache.segments], [2, 2, 2, 1])
+        small = concurrent_cache.ConcurrentLRUCache(max_items=3)
+        self.assertEqual(len(small.segments), 3)
+
+    def test_threads(self):
+        """ Concurrent puts and gets keep every segment within its
+        capacity and never return another key's item
+        """
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+        for policy in CONCURRENT[1:]:
+            cache = policy(max_items=64, segments=8, verbose=False)
+            errors = []
+
+            def work(seed):
+                """ Puts and gets random keys, each item naming its key """
+                rnd = random.Random(seed)
+                for _ in range(2000):
+                    key = rnd.randrange(200)
+                    if rnd.random() < 0.5:
+                        cache.put(key, (key, seed))
+                    else:
+                        item = cache.get(key)
+                        if item is not None and item[0] != key:
+                            errors.append((key, item))
+
+            threads = [threading.Thread(target=work, args=(seed,))
+                       for seed in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(errors, [], policy.__name__)
+            for segment in cache.segments:
+                self.assertLessEqual(
+                    len(segment.cache_data), segment.max_items)
+            self.assertEqual(len(cache), len(cache.cache_data))
+
+    def test_keys_stay_in_their_segment(self):
+        """ A key is always stored in the segment of its hash """
+        cache = concurrent_cache.ConcurrentFIFOCache(
+            max_items=100, segments=4)
+        for key in range(50):
+            cache.put(key, str(key))
+        for i, segment in enumerate(cache.segments):
+            self.assertTrue(all(cache._index(key) == i
+                                for key in segment.cache_data))
+        self.assertEqual(cache.get(7), "7")
+
+
+class TestCountMinSketch(unittest.TestCase):
+    """ Tests of CountMinSketch """
+
+    def test_never_underestimates(self):
+        """ The estimate of a key is at least its count, up to the
+        saturation of the counters
+        """
+        sketch = CountMinSketch(64, sample_size=10 ** 9)
+        rnd = random.Random(0)
+        counts = {}
+        for _ in range(2000):
+            key = rnd.randrange(300)
+            counts[key] = counts.get(key, 0) + 1
+            sketch.increment(key)
+        for key, count in counts.items():
+            self.assertGreaterEqual(
+                sketch.estimate(key), min(count, MAX_COUNT))
+
+    def test_exact_when_sparse(self):
+        """ A few keys in a wide sketch are counted exactly """
+        sketch = CountMinSketch(1024)
+        for key, count in (("a", 3), ("b", 1), ("c", 7)):
+            for _ in range(count):
+                sketch.increment(key)
+        self.assertEqual([sketch.estimate(key) for key in "abcd"],
+                         [3, 1, 7, 0])
+
+    def test_reset_halves(self):
+        """ The counters are halved every sample_size increments """
+        sketch = CountMinSketch(1024, sample_size=10)
+        for _ in range(9):
+            sketch.increment("a")
+        self.assertEqual(sketch.estimate("a"), 9)
+        sketch.increment("a")
+        self.assertEqual(sketch.estimate("a"), 5)
+        self.assertEqual(sketch.additions, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+""" Tests of the single-flight computations and of the cached decorator """
+import asyncio
+import threading
+import unittest
+
+from memoize import cached, make_key
+
+LRUCache = __import__('3-lru_cache').LRUCache
+ConcurrentLRUCache = __import__('concurrent_cache').ConcurrentLRUCache
+
+THREADS = 8
+
+
+def in_threads(fn, count=THREADS):
+    """ Runs fn in count threads started together, returning what each
+    one returned or raised
+    """
+    barrier = threading.Barrier(count)
+    outcomes = [None] * count
+
+    def run(i):
+        """ Runs fn once the others are ready """
+        barrier.wait()
+        try:
+            outcomes[i] = fn()
+        except Exception as error:
+            outcomes[i] = error
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+class Slow():
+    """ Slow class computing a value once released, counting its calls """
+
+    def __init__(self, value=None, error=None):
+        """ Initialize the computation, raising error if given """
+        self.value = value
+        self.error = error
+        self.calls = 0
+        self.release = threading.Event()
+
+    def __call__(self):
+        """ Waits to be released, then returns the value or raises """
+        self.calls += 1
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+def release_later(compute, delay=0.1):
+    """ Releases a computation once the threads had time to pile up """
+    timer = threading.Timer(delay, compute.release.set)
+    timer.start()
+    return timer
+
+
+class TestGetOrCompute(unittest.TestCase):
+    """ Tests of get_or_compute """
+
+    def test_one_computation_for_concurrent_misses(self):
+        """ Threads missing the same key share one computation """
+        for cache in (LRUCache(verbose=False), ConcurrentLRUCache()):
+            compute = Slow("value")
+            release_later(compute)
+            outcomes = in_threads(
+                lambda: cache.get_or_compute("key", compute))
+            self.assertEqual(outcomes, ["value"] * THREADS)
+            self.assertEqual(compute.calls, 1)
+            self.assertEqual(cache.get("key"), "value")
+
+    def test_error_reaches_every_waiter(self):
+        """ An error of the computation is raised in every thread missing
+        the key, nothing is cached and the next miss computes again
+        """
+        for cache in (LRUCache(verbose=False), ConcurrentLRUCache()):
+            error = ValueError("failed")
+            compute = Slow(error=error)
+            release_later(compute)
+            outcomes = in_threads(
+                lambda: cache.get_or_compute("key", compute))
+            self.assertEqual(outcomes, [error] * THREADS)
+            self.assertEqual(compute.calls, 1)
+            self.assertIsNone(cache.get("key"))
+            self.assertEqual(cache.get_or_compute("key", lambda: 1), 1)
+
+    def test_hit_does_not_compute(self):
+        """ A cached key is returned without calling fn """
+        cache = LRUCache(verbose=False)
+        cache.put("key", "cached")
+        self.assertEqual(cache.get_or_compute("key", self.fail), "cached")
+
+    def test_async(self):
+        """ Coroutines missing the same key share one computation, and an
+        error reaches all of them
+        """
+        cache = LRUCache(verbose=False)
+        calls = []
+
+        async def compute(value):
+            """ Returns value, or raises it if it is an error """
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            if isinstance(value, Exception):
+                raise value
+            return value
+
+        async def main():
+            """ Runs the concurrent misses """
+            found = await asyncio.gather(*(
+                cache.get_or_compute_async("ok", lambda: compute("value"))
+                for _ in range(THREADS)))
+            error = KeyError("failed")
+            failed = await asyncio.gather(*(
+                cache.get_or_compute_async("bad", lambda: compute(error))
+                for _ in range(THREADS)), return_exceptions=True)
+            return found, failed, error
+
+        found, failed, error = asyncio.run(main())
+        self.assertEqual(found, ["value"] * THREADS)
+        self.assertEqual(failed, [error] * THREADS)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(cache.get("ok"), "value")
+        self.assertIsNone(cache.get("bad"))
+
+
+class TestCached(unittest.TestCase):
+    """ Tests of the cached decorator """
+
+    def test_memoizes(self):
+        """ Calls with the same arguments are computed once """
+        calls = []
+
+        @cached(max_items=2, verbose=False)
+        def square(number, offset=0):
+            """ Squares number """
+            calls.append(number)
+            return number * number + offset
+
+        self.assertEqual([square(2), square(2), square(3)], [4, 4, 9])
+        self.assertEqual(square(2, offset=1), 5)
+        self.assertEqual(calls, [2, 3, 2])
+        self.assertIsInstance(square.cache, LRUCache)
+        self.assertEqual(square.cache.max_items, 2)
+        self.assertEqual(square.__doc__, " Squares number ")
+
+    def test_none_is_not_cached(self):
+        """ A call returning None is computed again """
+        calls = []
+
+        @cached()
+        def nothing():
+            """ Returns None """
+            calls.append(None)
+
+        nothing()
+        nothing()
+        self.assertEqual(len(calls), 2)
+
+    def test_make_key(self):
+        """ Keyword arguments are keyed whatever their order, apart from
+        positional ones
+        """
+        self.assertEqual(make_key(1, 2), (1, 2))
+        self.assertEqual(make_key(1, a=1, b=2), make_key(1, b=2, a=1))
+        self.assertNotEqual(make_key("a", 1), make_key(a=1))
+
+    def test_coroutine_function(self):
+        """ A coroutine function is memoized too """
+        calls = []
+
+        @cached(policy=ConcurrentLRUCache)
+        async def double(number):
+            """ Doubles number """
+            calls.append(number)
+            return 2 * number
+
+        async def main():
+            """ Calls double concurrently """
+            return await asyncio.gather(*(double(21) for _ in range(4)))
+
+        self.assertEqual(asyncio.run(main()), [42] * 4)
+        self.assertEqual(calls, [21])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+""" Tests of the timer wheel and of the expiration of cached items """
+import random
+import unittest
+
+from timer_wheel import TimerWheel
+
+BasicCache = __import__('0-basic_cache').BasicCache
+FIFOCache = __import__('1-fifo_cache').FIFOCache
+LIFOCache = __import__('2-lifo_cache').LIFOCache
+LRUCache = __import__('3-lru_cache').LRUCache
+MRUCache = __import__('4-mru_cache').MRUCache
+LFUCache = __import__('100-lfu_cache').LFUCache
+TinyLFUCache = __import__('101-tinylfu_cache').TinyLFUCache
+ARCCache = __import__('102-arc_cache').ARCCache
+TwoQCache = __import__('103-2q_cache').TwoQCache
+ClockCache = __import__('104-clock_cache').ClockCache
+ClockProCache = __import__('105-clockpro_cache').ClockProCache
+
+POLICIES = (BasicCache, FIFOCache, LIFOCache, LRUCache, MRUCache, LFUCache,
+            TinyLFUCache, ARCCache, TwoQCache, ClockCache, ClockProCache)
+
+
+class Clock():
+    """ Clock class whose time only moves when told to """
+
+    def __init__(self):
+        """ Initialize the clock at time 0 """
+        self.now = 0.0
+
+    def __call__(self):
+        """ The current time """
+        return self.now
+
+
+class TestTimerWheel(unittest.TestCase):
+    """ Tests of TimerWheel """
+
+    def test_fires_at_deadline(self):
+        """ A timer fires on the first tick reaching its deadline """
+        wheel = TimerWheel(0)
+        wheel.schedule("a", 2.5)
+        self.assertEqual(wheel.advance(2), [])
+        self.assertEqual(wheel.advance(3), ["a"])
+        self.assertEqual(len(wheel), 0)
+
+    def test_cascades_from_higher_levels(self):
+        """ Timers beyond the first level fire on time """
+        wheel = TimerWheel(0, levels=3, bits=2)
+        deadlines = {key: key for key in (1, 3, 4, 5, 15, 16, 17, 40, 63)}
+        for key, deadline in deadlines.items():
+            wheel.schedule(key, deadline)
+        for now in range(1, 70):
+            for key in wheel.advance(now):
+                self.assertEqual(deadlines.pop(key), now)
+        self.assertEqual(deadlines, {})
+
+    def test_beyond_the_top_level(self):
+        """ A deadline past the span of the wheel still fires on time """
+        wheel = TimerWheel(0, levels=2, bits=2)
+        wheel.schedule("far", 100)
+        fired = {now: wheel.advance(now) for now in range(1, 120)}
+        self.assertEqual([now for now, keys in fired.items() if keys], [100])
+
+    def test_cancel_and_reschedule(self):
+        """ A cancelled timer never fires, a rescheduled one fires once at
+        its new deadline
+        """
+        wheel = TimerWheel(0)
+        wheel.schedule("a", 5)
+        wheel.schedule("b", 5)
+        wheel.cancel("a")
+        wheel.schedule("b", 9)
+        self.assertEqual(wheel.advance(8), [])
+        self.assertEqual(wheel.advance(9), ["b"])
+
+    def test_random_deadlines(self):
+        """ Every timer fires exactly on the tick of its deadline """
+        rnd = random.Random(0)
+        wheel = TimerWheel(0, tick=0.5, levels=3, bits=3)
+        expected = {}
+        for key in range(500):
+            deadline = rnd.uniform(0, 400)
+            wheel.schedule(key, deadline)
+            expected[key] = deadline
+        now = 0.0
+        while now < 410:
+            now += rnd.uniform(0, 3)
+            for key in wheel.advance(now):
+                deadline = expected.pop(key)
+                self.assertLessEqual(deadline, now)
+            for deadline in expected.values():
+                self.assertGreater(deadline, now - 0.5)
+        self.assertEqual(expected, {})
+
+
+class TestExpiration(unittest.TestCase):
+    """ Tests of the time to live of cached items """
+
+    def test_every_policy(self):
+        """ Items expire after their time to live, and only then """
+        for policy in POLICIES:
+            clock = Clock()
+            cache = policy(max_items=8, ttl=10, clock=clock, verbose=False)
+            cache.put("short", 1, ttl=2)
+            cache.put("default", 2)
+            clock.now = 1.9
+            self.assertEqual(cache.get("short"), 1, policy.__name__)
+            clock.now = 2
+            self.assertIsNone(cache.get("short"), policy.__name__)
+            clock.now = 9.9
+            self.assertEqual(cache.get("default"), 2, policy.__name__)
+            clock.now = 30
+            cache.put("new", 4)
+            self.assertNotIn("default", cache.cache_data, policy.__name__)
+            self.assertEqual(cache.expirations, 2, policy.__name__)
+            self.assertEqual(set(cache.deadlines), {"new"})
+
+    def test_expired_items_make_room(self):
+        """ Expired items are reclaimed before anything is evicted """
+        for policy in POLICIES[1:]:
+            clock = Clock()
+            cache = policy(ttl=1, clock=clock, verbose=False)
+            discarded = []
+            cache._report_discard = discarded.append
+            for key in "ABCD":
+                cache.put(key, key)
+            clock.now = 5
+            cache.put("E", "E")
+            self.assertEqual(discarded, [], policy.__name__)
+            self.assertEqual(list(cache.cache_data), ["E"], policy.__name__)
+
+    def test_put_without_ttl_cancels_it(self):
+        """ Putting a key again without ttl keeps it, with the default """
+        clock = Clock()
+        cache = LRUCache(clock=clock, verbose=False)
+        cache.put("A", 1, ttl=1)
+        cache.put("A", 2)
+        clock.now = 5
+        self.assertEqual(cache.get("A"), 2)
+        self.assertEqual(len(cache.timers), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+""" TimerWheel module
+
+A hierarchical timer wheel: level 0 has one slot per tick, every level
+above has slots as wide as the whole level below it. A timer is stored in
+the slot of its deadline on the lowest level whose span covers it, and
+moves down a level each time the wheel reaches its slot, so scheduling,
+cancelling and advancing by one tick are all O(1) amortized, whatever the
+number of timers.
+"""
+
+
+class TimerWheel():
+    """ TimerWheel class firing keys once their deadline is reached """
+
+    def __init__(self, now, tick=1.0, levels=4, bits=6):
+        """ Initialize the wheel
+
+        Args:
+            now (float): The current time, in the unit of deadlines.
+            tick (float): Resolution of the wheel.
+            levels (int): Number of levels.
+            bits (int): Each level has 2 ** bits slots.
+        """
+        self.tick = tick
+        self.bits = bits
+        self.mask = (1 << bits) - 1
+        self.wheels = [[{} for _ in range(1 << bits)]
+                       for _ in range(levels)]
+        # Tick processed last
+        self.current = int(now // tick)
+        # Level and slot of every key
+        self.slots = {}
+
+    def __len__(self):
+        """ Number of pending timers """
+        return len(self.slots)
+
+    def schedule(self, key, deadline):
+        """ Fire key once deadline is reached, replacing its timer if any """
+        self.cancel(key)
+        # First tick at which the deadline is reached
+        when = -int(-deadline // self.tick)
+        self._place(key, max(when, self.current + 1))
+
+    def cancel(self, key):
+        """ Drop the timer of key, if any """
+        where = self.slots.pop(key, None)
+        if where is not None:
+            level, slot = where
+            del self.wheels[level][slot][key]
+
+    def _place(self, key, when):
+        """ Store a timer in the lowest level covering its deadline """
+        delta = when - self.current
+        level = 0
+        top = len(self.wheels) - 1
+        while level < top and delta >> (self.bits * (level + 1)):
+            level += 1
+        slot = (when >> (self.bits * level)) & self.mask
+        self.wheels[level][slot][key] = when
+        self.slots[key] = (level, slot)
+
+    def advance(self, now):
+        """ Advance the wheel to now
+
+        Returns:
+            list: The keys whose deadline was reached, in firing order.
+        """
+        target = int(now // self.tick)
+        fired = []
+        while self.current < target:
+            if not self.slots:
+                # Nothing scheduled, no need to step through the ticks
+                self.current = target
+                break
+            self.current += 1
+            tick = self.current
+            # Higher levels first, their timers may land in lower ones
+            for level in range(len(self.wheels) - 1, 0, -1):
+                if tick & ((1 << (self.bits * level)) - 1) == 0:
+                    self._cascade(level, tick, fired)
+            slot = self.wheels[0][tick & self.mask]
+            for key, when in list(slot.items()):
+                if when <= tick:
+                    del slot[key]
+                    del self.slots[key]
+                    fired.append(key)
+        return fired
+
+    def _cascade(self, level, tick, fired):
+        """ Move the timers of the current slot of a level down """
+        index = (tick >> (self.bits * level)) & self.mask
+        slot = self.wheels[level][index]
+        self.wheels[level][index] = {}
+        for key, when in slot.items():
+            del self.slots[key]
+            if when <= tick:
+                fired.append(key)
+            else:
+                self._place(key, when)